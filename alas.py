@@ -4,7 +4,6 @@
 # Modified: run, loop
 # Last Updated: 2025-09-01 00:03
 import os
-import re
 import threading
 import time
 from datetime import datetime, timedelta
@@ -14,7 +13,8 @@ from cached_property import cached_property
 
 from module.base.decorator import del_cached_property
 from module.base.api_client import ApiClient
-from module.config.config import AzurLaneConfig, TaskEnd
+from module.base.metrics import METRICS
+from module.config.config import AzurLaneConfig, TaskEnd, scheduler_priority
 from module.config.deep import deep_get, deep_set
 from module.exception import *
 from module.logger import logger
@@ -235,28 +235,40 @@ class AzurLaneAutoScript:
         """
         from module.base.utils import save_image
         from module.handler.sensitive_info import (handle_sensitive_image,
-                                                   handle_sensitive_logs)
+                                                   handle_sensitive_text)
+        from module.logger import read_last_section
         if self.config.Error_SaveError:
             if not os.path.exists('./log/error'):
                 os.mkdir('./log/error')
             folder = f'./log/error/{int(time.time() * 1000)}'
             logger.warning(f'Saving error: {folder}')
             os.mkdir(folder)
-            for data in self.device.screenshot_deque:
-                image_time = datetime.strftime(data['time'], '%Y-%m-%d_%H-%M-%S-%f')
-                image = handle_sensitive_image(data['image'])
+
+            def save(image_time, image):
+                image_time = datetime.strftime(image_time, '%Y-%m-%d_%H-%M-%S-%f')
+                image = handle_sensitive_image(image)
                 save_image(image, f'{folder}/{image_time}.png')
-            with open(logger.log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                start = 0
-                for index, line in enumerate(lines):
-                    line = line.strip(' \r\t\n')
-                    if re.match('^═{15,}$', line):
-                        start = index
-                lines = lines[start - 2:]
-                lines = handle_sensitive_logs(lines)
+
+            # Encoding PNGs takes seconds, save them in background.
+            # Pending saves are finished at process exit, even if Alas exits right after
+            # Ring frames are views of its buffer, copy them before following screenshots overwrite them.
+            # At most 8 copies are pending at once, so saving does not hold a second copy of the ring.
+            pool = self.error_log_pool
+            pending = threading.BoundedSemaphore(8)
+            for image_time, image in self.device.screenshot_ring:
+                pending.acquire()
+                future = pool.submit(save, image_time, image.copy())
+                future.add_done_callback(lambda _: pending.release())
+
+            # Seek to the last task instead of reading the whole log file
             with open(f'{folder}/log.txt', 'w', encoding='utf-8') as f:
-                f.writelines(lines)
+                for line in read_last_section(logger.log_file):
+                    f.write(handle_sensitive_text(line))
+
+    @cached_property
+    def error_log_pool(self):
+        from concurrent.futures import ThreadPoolExecutor
+        return ThreadPoolExecutor(max_workers=4, thread_name_prefix='save_error_log')
 
     def restart(self):
         from module.handler.login import LoginHandler
@@ -561,7 +573,8 @@ class AzurLaneAutoScript:
         future = future + timedelta(seconds=1)
         self.config.start_watching()
         while 1:
-            if datetime.now() > future:
+            now = datetime.now()
+            if now > future:
                 return True
             if self.stop_event is not None:
                 if self.stop_event.is_set():
@@ -569,9 +582,9 @@ class AzurLaneAutoScript:
                     logger.info(f"[{self.config_name}] exited. Reason: Update")
                     exit(0)
 
-            time.sleep(5)
-
-            if self.config.should_reload():
+            # Wake up immediately if GUI changed config, or at the task time
+            timeout = min((future - now).total_seconds(), 5)
+            if self.config.wait_change(timeout):
                 return False
 
     def get_next_task(self):
@@ -634,6 +647,7 @@ class AzurLaneAutoScript:
     def loop(self):
         logger.set_file_logger(self.config_name)
         logger.info(f'Start scheduler loop: {self.config_name}')
+        METRICS.set_sink(self.config_name)
 
         # --- 初始化计数器 ---
         consecutive_global_failures = 0
@@ -676,7 +690,21 @@ class AzurLaneAutoScript:
                 self.device.stuck_record_clear()
                 self.device.click_record_clear()
                 logger.hr(task, level=0)
-                success = self.run(inflection.underscore(task))
+                budget = AzurLaneConfig.task_budget
+                if budget is not None:
+                    priority = scheduler_priority(self.config.SCHEDULER_PRIORITY).get(task.lower(), 999)
+                    budget.acquire(
+                        priority=priority,
+                        on_wait=lambda running: logger.info(
+                            f'Wait for other instances, {running}/{budget.limit} instances running tasks')
+                    )
+                METRICS.set_task(task)
+                try:
+                    success = self.run(inflection.underscore(task))
+                finally:
+                    if budget is not None:
+                        budget.release()
+                METRICS.dump()
                 logger.info(f'Scheduler: End task `{task}`')
                 self.is_first_task = False
 
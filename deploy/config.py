@@ -37,6 +37,10 @@ class ConfigModel:
     OcrServerPort: int = 22268
     OcrClientAddress: str = "127.0.0.1:22268"
 
+    # Supervisor
+    PreforkInstance: bool = False
+    MaxRunningInstance: int = 0
+
     # Update
     EnableReload: bool = True
     CheckUpdateInterval: int = 5
@@ -0,0 +1,121 @@
+import ast
+import os
+
+import module.config.server as server
+from module.base.asset_pack import ASSET_PACK, button_key, file_stat, pack_file, template_key, write_pack
+from module.base.button import Button
+from module.base.template import Template
+from module.config.server import VALID_SERVER
+from module.logger import logger
+
+MODULE_FOLDER = './module'
+BUTTON_FILE = 'assets.py'
+
+
+def iter_assets_files():
+    for root, _, files in os.walk(MODULE_FOLDER):
+        if BUTTON_FILE in files:
+            yield os.path.join(root, BUTTON_FILE).replace('\\', '/')
+
+
+def parse_assets_file(file):
+    """
+    Parse assets.py generated by dev_tools/button_extract.py without importing it.
+
+    Args:
+        file (str):
+
+    Yields:
+        tuple[str, dict]: Class name 'Button' or 'Template', keyword arguments
+    """
+    with open(file, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or not isinstance(node.value, ast.Call):
+            continue
+        func = node.value.func
+        if not isinstance(func, ast.Name) or func.id not in ['Button', 'Template']:
+            continue
+        kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in node.value.keywords}
+        yield func.id, kwargs
+
+
+def as_list(image):
+    return image if isinstance(image, list) else [image]
+
+
+def is_color(image):
+    """
+    Args:
+        image (np.ndarray, list[np.ndarray]): Image or gif frames.
+
+    Returns:
+        bool: If image has color channels.
+            Binary and luma variants can only be derived from color images.
+    """
+    images = as_list(image)
+    return bool(images) and images[0].ndim == 3
+
+
+def build_server(s):
+    """
+    Decode all assets of a server the same way as Button and Template do, and write them into one pack.
+
+    Args:
+        s (str): Server.
+    """
+    logger.hr(f'Asset pack {s}', level=2)
+    server.server = s
+    assets = {}
+    for file in iter_assets_files():
+        for cls, kwargs in parse_assets_file(file):
+            if cls == 'Button':
+                button = Button(**kwargs)
+                if not button.file or not os.path.exists(button.file):
+                    continue
+                key = button_key(button.file, button.area)
+                button.ensure_template()
+                image, binary, luma = button.image, None, None
+                if is_color(image):
+                    button.ensure_binary_template()
+                    button.ensure_luma_template()
+                    binary, luma = button.image_binary, button.image_luma
+                asset_file, is_gif = button.file, button.is_gif
+            else:
+                template = Template(**kwargs)
+                if not os.path.exists(template.file):
+                    continue
+                key = template_key(template.file)
+                image, binary, luma = template.image, None, None
+                # Grayscale templates are never matched in binary or luma
+                if is_color(image):
+                    binary, luma = template.image_binary, template.image_luma
+                asset_file, is_gif = template.file, template.is_gif
+
+            assets[key] = {
+                'stat': file_stat(asset_file),
+                'gif': is_gif,
+                'image': as_list(image),
+                'binary': as_list(binary) if binary is not None else [],
+                'luma': as_list(luma) if luma is not None else [],
+            }
+
+    file = pack_file(s)
+    write_pack(file, assets)
+    logger.info(f'{len(assets)} assets written to {file}, {os.path.getsize(file) / 1048576:.1f}MB')
+
+
+def build_all():
+    # Decode from asset files, not from outdated packs
+    ASSET_PACK.enabled = False
+    ASSET_PACK.close()
+    for s in VALID_SERVER:
+        build_server(s)
+
+
+if __name__ == '__main__':
+    """
+    Build asset packs for all servers, run it after dev_tools/button_extract.py or after updating assets.
+    Assets modified after building are detected and loaded from asset files.
+    """
+    build_all()
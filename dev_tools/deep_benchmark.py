@@ -0,0 +1,82 @@
+"""
+Benchmark deep_* functions on real config data.
+
+Usage:
+    python -m dev_tools.deep_benchmark
+        Compare splitting paths on every call, compiled keys and PathIndex,
+        on ./config/template.json and ./module/config/argument/args.json
+"""
+import os
+import timeit
+
+from module.config.deep import PathIndex, deep_get, deep_iter, deep_set
+from module.config.utils import filepath_args, filepath_config, read_file
+
+
+def deep_get_split(d, keys, default=None):
+    """
+    deep_get() before keys were compiled, as a baseline.
+    """
+    if type(keys) is str:
+        keys = keys.split('.')
+    try:
+        for k in keys:
+            d = d[k]
+        return d
+    except (IndexError, KeyError, TypeError):
+        return default
+
+
+def bench(func, paths, number):
+    """
+    Args:
+        func (callable): Receives a path.
+        paths (list[str]):
+        number (int): Rounds over all paths.
+
+    Returns:
+        float: Best time per call in nanoseconds.
+    """
+
+    def run():
+        for path in paths:
+            func(path)
+
+    cost = min(timeit.repeat(run, number=number, repeat=5))
+    return cost / number / len(paths) * 1e9
+
+
+def show(name, data, depth, number=20):
+    """
+    Args:
+        name (str):
+        data (dict):
+        depth (int): Depth of paths to benchmark.
+        number (int):
+    """
+    paths = ['.'.join(path) for path, _ in deep_iter(data, depth=depth)]
+    index = PathIndex(data, depth=depth)
+    build = min(timeit.repeat(lambda: PathIndex(data, depth=depth), number=5, repeat=3)) / 5 * 1e3
+    print(f'{name}: {len(paths)} paths at depth {depth}, build PathIndex in {build:.2f}ms')
+
+    rows = [
+        ('deep_get, split', lambda p: deep_get_split(data, p)),
+        ('deep_get, compiled', lambda p: deep_get(data, p)),
+        ('PathIndex.get', lambda p: index.get(p)),
+        ('deep_set, compiled', lambda p: deep_set(data, p, 0)),
+        ('PathIndex.set', lambda p: index.set(p, 0)),
+    ]
+    for row, func in rows:
+        print(f'    {row:<20} {bench(func, paths, number):>8.1f}ns')
+
+
+def main():
+    show('config/template.json', read_file(filepath_config('template')), depth=3)
+    # Values are dicts like {'type': ..., 'value': ...}, index to argument level
+    show('args.json', read_file(filepath_args()), depth=3)
+
+
+if __name__ == '__main__':
+    # Run in Alas root folder
+    os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+    main()
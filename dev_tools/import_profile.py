@@ -0,0 +1,171 @@
+"""
+Profile imports at Alas startup, with `python -X importtime` aggregated per subsystem.
+
+Usage:
+    python -m dev_tools.import_profile
+        Profile cold start of `AzurLaneAutoScript('template').config`
+    python -m dev_tools.import_profile --task Commission
+        Profile imports of a task on top of the cold start
+    python -m dev_tools.import_profile --budget 1.5
+        Regression benchmark, exit with code 1 if cold start takes more than 1.5s
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+import time
+
+import inflection
+
+COLD_START = "from alas import AzurLaneAutoScript; AzurLaneAutoScript('template').config"
+# import time: self [us] | cumulative | imported package
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$')
+
+
+def task_imports(task):
+    """
+    Find imports in the method of a task in alas.py.
+
+    Args:
+        task (str): Task name, such as 'Commission'.
+
+    Returns:
+        list[str]: Import statements.
+    """
+    with open('./alas.py', 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    method = inflection.underscore(task)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef) and node.name == method:
+            imports = []
+            for child in ast.walk(node):
+                if isinstance(child, ast.ImportFrom) and child.level == 0:
+                    names = ', '.join(alias.name for alias in child.names)
+                    imports.append(f'from {child.module} import {names}')
+                elif isinstance(child, ast.Import):
+                    imports.append('import ' + ', '.join(alias.name for alias in child.names))
+            return imports
+    raise ValueError(f'Task method not found in alas.py: {method}')
+
+
+def run_importtime(code):
+    """
+    Args:
+        code (str):
+
+    Returns:
+        list[tuple[int, int, int, str]]: (depth, self_us, cumulative_us, module), in import order.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, encoding='utf-8',
+    )
+    if result.returncode:
+        print(result.stderr)
+        raise RuntimeError('Failed to run importtime')
+    rows = []
+    for line in result.stderr.splitlines():
+        res = IMPORT_TIME.match(line)
+        if res:
+            self_us, cumulative_us, indent, module = res.groups()
+            rows.append((len(indent) // 2, int(self_us), int(cumulative_us), module))
+    return rows
+
+
+def subsystem(module):
+    """
+    Args:
+        module (str): Such as 'module.ocr.al_ocr', 'mxnet.ndarray'
+
+    Returns:
+        str: Such as 'module.ocr', 'mxnet'
+    """
+    parts = module.split('.')
+    if parts[0] in ['module', 'submodule'] and len(parts) > 1:
+        return '.'.join(parts[:2])
+    return parts[0]
+
+
+def aggregate(rows):
+    """
+    Args:
+        rows: From run_importtime()
+
+    Returns:
+        list[tuple[str, int, int]]: (subsystem, self_us, modules), sorted by self time.
+    """
+    total = {}
+    for _, self_us, _, module in rows:
+        name = subsystem(module)
+        us, count = total.get(name, (0, 0))
+        total[name] = (us + self_us, count + 1)
+    return sorted(((k, v[0], v[1]) for k, v in total.items()), key=lambda x: -x[1])
+
+
+def show(rows, top=30, threshold=20):
+    """
+    Args:
+        rows: From run_importtime()
+        top (int): Number of subsystems to show.
+        threshold (int): Show modules in import tree if cumulative time exceeds this many milliseconds.
+    """
+    total = sum(row[1] for row in rows)
+    print(f'{len(rows)} modules imported in {total / 1e6:.3f}s')
+    print()
+    print(f'{"Subsystem":<32} {"Self":>9} {"Percent":>8} {"Modules":>8}')
+    for name, self_us, count in aggregate(rows)[:top]:
+        print(f'{name:<32} {self_us / 1e3:>7.1f}ms {self_us / total * 100:>7.1f}% {count:>8}')
+    print()
+    print(f'Import tree, cumulative > {threshold}ms')
+    # importtime prints children before parents, reverse it to print a tree
+    for depth, self_us, cumulative_us, module in reversed(rows):
+        if cumulative_us >= threshold * 1000:
+            print(f'{cumulative_us / 1e3:>9.1f}ms {"  " * depth}{module}')
+
+
+def cold_start_time(code, runs=3):
+    """
+    Args:
+        code (str):
+        runs (int):
+
+    Returns:
+        float: Minimum wall time in seconds of running the code in a new interpreter.
+    """
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        cost = time.perf_counter() - start
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile imports at Alas startup')
+    parser.add_argument('--task', type=str, help='Also import modules used by this task, such as Commission')
+    parser.add_argument('--budget', type=float, help='Exit with code 1 if cold start takes more than this seconds')
+    parser.add_argument('--threshold', type=int, default=20, help='Threshold of import tree in milliseconds')
+    args = parser.parse_args()
+
+    code = COLD_START
+    if args.task:
+        code = '; '.join([code] + task_imports(args.task))
+    print(f'Profiling: {code}')
+    show(run_importtime(code), threshold=args.threshold)
+
+    if args.budget is not None:
+        cost = cold_start_time(code)
+        print()
+        print(f'Cold start: {cost:.3f}s, budget: {args.budget:.3f}s')
+        if cost > args.budget:
+            print('Cold start exceeds budget')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    # Run in Alas root folder
+    os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+    main()
@@ -0,0 +1,235 @@
+"""
+Benchmark detections on recorded screenshots, no emulator required.
+
+Frames are replayed by ReplayDevice, each detection runs once per frame,
+CPU time, OCR calls and memory allocations are reported per frame.
+
+Usage:
+    python -m dev_tools.replay_benchmark ./log/error/1700000000000
+        Run all cases on screenshots saved by save_error_log()
+    python -m dev_tools.replay_benchmark ./screenshots --case ui shop --alloc
+        Run some cases, and also measure memory allocations
+    python -m dev_tools.replay_benchmark ./screenshots --case ui --budget 20
+        Regression benchmark, exit with code 1 if any case takes more than 20ms CPU time per frame on average
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def case_ui(device):
+    """
+    Page detection in ui_get_current_page()
+    """
+    from module.ui.ui import UI
+    ui = UI(device.config, device=device)
+    batch, _ = ui.ui_page_batch
+
+    def run():
+        return ui.appear_any(batch)
+
+    return run
+
+
+def case_view(device):
+    """
+    Map detection and grid prediction, in campaigns
+    """
+    from module.map_detection.view import View
+    view = View(device.config)
+
+    def run():
+        view.load(device.image)
+        view.predict()
+
+    return run
+
+
+def case_radar(device):
+    """
+    Radar prediction, in Operation Siren
+    """
+    from module.os.radar import Radar
+    radar = Radar(device.config)
+
+    def run():
+        radar.predict(device.image)
+
+    return run
+
+
+def case_shop(device):
+    """
+    Item, cost and price recognition, in general shop
+    """
+    from module.shop.shop_general import GeneralShop_250814
+    shop = GeneralShop_250814(device.config, device=device)
+    # Load templates before benchmarking
+    _ = shop.shop_items()
+
+    def run():
+        return shop.shop_detect_items(device.image)
+
+    return run
+
+
+def case_commission(device):
+    """
+    Commission list detection
+    """
+    from module.commission.commission import RewardCommission
+    commission = RewardCommission(device.config, device=device)
+
+    def run():
+        return commission._commission_detect(device.image)
+
+    return run
+
+
+CASES = {
+    'ui': case_ui,
+    'view': case_view,
+    'radar': case_radar,
+    'shop': case_shop,
+    'commission': case_commission,
+}
+
+
+class CaseResult:
+    def __init__(self, name):
+        self.name = name
+        # CPU time and wall time of each frame, in seconds
+        self.cpu = []
+        self.wall = []
+        # Images sent to OCR, and images actually predicted by OCR models, of each frame
+        self.ocr_images = []
+        self.ocr_model = []
+        # Peak of memory allocated during each frame, in bytes
+        self.alloc = []
+        # Frames raised exceptions, usually because the frame is not the scene of the case
+        self.errors = 0
+
+    @property
+    def frames(self):
+        return len(self.cpu)
+
+    def cpu_mean(self):
+        return float(np.mean(self.cpu)) if self.cpu else 0.
+
+
+def ocr_counter():
+    """
+    Returns:
+        tuple[int, int]: Images sent to OCR, and cache misses that ran OCR models.
+    """
+    from module.ocr.ocr import Ocr
+    return Ocr.CACHE.hit + Ocr.CACHE.miss, Ocr.CACHE.miss
+
+
+def run_case(device, name, folder, alloc=False):
+    """
+    Args:
+        device (ReplayDevice):
+        name (str): Case name in CASES.
+        folder (str):
+        alloc (bool): Also measure memory allocations, in another pass since tracemalloc is slow.
+
+    Returns:
+        CaseResult:
+    """
+    from module.device.method.replay import ReplayFinished
+    from module.logger import logger
+    result = CaseResult(name)
+    run = CASES[name](device)
+
+    device.replay_load(folder)
+    while 1:
+        try:
+            device.screenshot()
+        except ReplayFinished:
+            break
+        ocr_images, ocr_model = ocr_counter()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            run()
+        except Exception as e:
+            logger.warning(f'Case {name} failed on frame {device.replay_cursor}: {type(e).__name__}: {e}')
+            result.errors += 1
+        result.cpu.append(time.process_time() - cpu)
+        result.wall.append(time.perf_counter() - wall)
+        images, model = ocr_counter()
+        result.ocr_images.append(images - ocr_images)
+        result.ocr_model.append(model - ocr_model)
+
+    if alloc:
+        device.replay_load(folder)
+        while 1:
+            try:
+                device.screenshot()
+            except ReplayFinished:
+                break
+            tracemalloc.start()
+            try:
+                run()
+            except Exception:
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result.alloc.append(peak)
+
+    return result
+
+
+def show(results):
+    """
+    Args:
+        results (list[CaseResult]):
+    """
+    print()
+    print(f'{"Case":<12} {"Frames":>6} {"Errors":>6} {"CPU":>9} {"CPU p95":>9} {"Wall":>9} '
+          f'{"OCR":>6} {"OCR run":>7} {"Alloc":>9}')
+    for r in results:
+        if not r.frames:
+            print(f'{r.name:<12} {0:>6}')
+            continue
+        alloc = f'{np.mean(r.alloc) / 1024:>7.0f}KB' if r.alloc else f'{"-":>9}'
+        print(f'{r.name:<12} {r.frames:>6} {r.errors:>6} '
+              f'{r.cpu_mean() * 1e3:>7.2f}ms {np.percentile(r.cpu, 95) * 1e3:>7.2f}ms '
+              f'{np.mean(r.wall) * 1e3:>7.2f}ms '
+              f'{np.mean(r.ocr_images):>6.2f} {np.mean(r.ocr_model):>7.2f} {alloc}')
+    print()
+    print('Per frame on average. OCR: images sent to OCR, OCR run: images OCR models actually ran on')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark detections on recorded screenshots')
+    parser.add_argument('folder', type=str, help='Folder of PNG screenshots, such as ./log/error/<timestamp>')
+    parser.add_argument('--config', type=str, default='template', help='Config name under ./config')
+    parser.add_argument('--case', type=str, nargs='+', choices=list(CASES), default=list(CASES),
+                        help='Cases to run, default to all')
+    parser.add_argument('--alloc', action='store_true', help='Also measure memory allocations')
+    parser.add_argument('--budget', type=float,
+                        help='Exit with code 1 if any case takes more than this milliseconds CPU time per frame')
+    args = parser.parse_args()
+
+    from module.device.replay_device import ReplayDevice
+    device = ReplayDevice(args.config, folder=args.folder)
+    results = [run_case(device, name, args.folder, alloc=args.alloc) for name in args.case]
+    show(results)
+
+    if args.budget is not None:
+        over = [r.name for r in results if r.cpu_mean() * 1e3 > args.budget]
+        if over:
+            print(f'Cases exceed budget {args.budget:.2f}ms: {over}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    # Run in Alas root folder
+    os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+    main()
@@ -7,8 +7,6 @@ API 客户端模块
 import threading
 from typing import Any, Dict, List, Tuple, Optional
 
-import requests
-
 from module.base.device_id import get_device_id
 from module.logger import logger
 
@@ -84,7 +82,9 @@ class ApiClient:
         """
         if success_codes is None:
             success_codes = [200]
-            
+        # Lazy import, requests is only needed when reporting
+        import requests
+
         endpoints = cls._get_endpoints(path)
         last_error = None
         
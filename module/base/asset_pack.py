@@ -0,0 +1,203 @@
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+import module.config.server as server
+from module.logger import logger
+
+PACK_FOLDER = './bin/asset_pack'
+PACK_MAGIC = b'ALASPACK'
+PACK_VERSION = 1
+# magic, version, length of index
+PACK_HEADER = struct.Struct('<8sII')
+# Arrays in pack are aligned to 64 bytes
+PACK_ALIGN = 64
+
+
+def pack_file(s):
+    """
+    Args:
+        s (str): Server.
+
+    Returns:
+        str: Path to asset pack of the server.
+    """
+    return f'{PACK_FOLDER}/{s}.pack'
+
+
+def button_key(file, area):
+    return 'button:%s:%s' % (file, ','.join(str(int(i)) for i in area))
+
+
+def template_key(file):
+    return 'template:%s' % file
+
+
+def file_stat(file):
+    """
+    Args:
+        file (str):
+
+    Returns:
+        list[int]: [size, mtime_ns], used to check if asset file changed after the pack was built.
+    """
+    stat = os.stat(file)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class AssetPack:
+    """
+    Decoded assets of one server in one file, built by dev_tools/asset_pack_build.py.
+
+    File is an index followed by raw uint8 arrays, which are already cropped,
+    and have binary and luma variants precomputed.
+    Arrays are numpy views of the memory-mapped file, so loading an asset doesn't decode any PNG,
+    releasing an asset only drops the views, and the OS page cache shares asset memory across Alas instances.
+    File is mapped copy-on-write, in case someone modifies asset images in place.
+
+    Assets not in pack, or modified after the pack was built, are loaded from PNG files as usual.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        # Key: server, value: (mmap, index), or None if pack not available
+        self.packs = {}
+
+    def _load(self, s):
+        file = pack_file(s)
+        if not os.path.exists(file):
+            return None
+        try:
+            with open(file, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            magic, version, length = PACK_HEADER.unpack_from(mm, 0)
+            if magic != PACK_MAGIC or version != PACK_VERSION:
+                logger.warning(f'Asset pack {file} is outdated, rebuild it with dev_tools/asset_pack_build.py')
+                mm.close()
+                return None
+            start = PACK_HEADER.size
+            index = json.loads(mm[start:start + length].decode('utf-8'))
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f'Failed to load asset pack {file}: {e}')
+            return None
+
+        logger.info(f'Asset pack loaded: {file}, {len(index)} assets')
+        return mm, index
+
+    def pack(self, s=None):
+        """
+        Args:
+            s (str): Server, None for the current server.
+
+        Returns:
+            tuple[mmap.mmap, dict]: Or None if pack not available
+        """
+        if s is None:
+            s = server.server
+        try:
+            return self.packs[s]
+        except KeyError:
+            pack = self._load(s)
+            self.packs[s] = pack
+            return pack
+
+    def get(self, key, file):
+        """
+        Args:
+            key (str): Asset key, from button_key() or template_key()
+            file (str): Asset file, to check if it's modified after the pack was built.
+
+        Returns:
+            dict: Key: 'image', 'binary', 'luma', value: np.ndarray or list[np.ndarray] if asset is a gif.
+                Value is None if the variant is not in pack, like binary and luma of grayscale templates.
+                Or None if not in pack.
+        """
+        if not self.enabled:
+            return None
+        pack = self.pack()
+        if pack is None:
+            return None
+        mm, index = pack
+        try:
+            row = index[key]
+        except KeyError:
+            return None
+        try:
+            if file_stat(file) != row['stat']:
+                return None
+        except OSError:
+            return None
+
+        result = {}
+        for variant in ['image', 'binary', 'luma']:
+            arrays = [np.frombuffer(mm, dtype=np.uint8, count=int(np.prod(shape)), offset=offset).reshape(shape)
+                      for offset, shape in row[variant]]
+            if not arrays:
+                result[variant] = None
+            else:
+                result[variant] = arrays if row['gif'] else arrays[0]
+        return result
+
+    def close(self):
+        for pack in self.packs.values():
+            if pack is not None:
+                try:
+                    pack[0].close()
+                except BufferError:
+                    # Arrays still referencing the map
+                    pass
+        self.packs = {}
+
+
+# Shared by all Button and Template objects
+ASSET_PACK = AssetPack()
+
+
+def write_pack(file, assets):
+    """
+    Args:
+        file (str): Output file.
+        assets (dict): Key: asset key, value: dict of
+            'stat': file_stat() of asset file,
+            'gif': bool,
+            'image', 'binary', 'luma': list[np.ndarray], empty list if variant is not available.
+    """
+    index = {}
+    arrays = []
+    offset = 0
+    for key, asset in assets.items():
+        row = {'stat': asset['stat'], 'gif': asset['gif']}
+        for variant in ['image', 'binary', 'luma']:
+            row[variant] = []
+            for array in asset[variant]:
+                array = np.ascontiguousarray(array, dtype=np.uint8)
+                row[variant].append([offset, list(array.shape)])
+                arrays.append((offset, array))
+                offset += -(-array.nbytes // PACK_ALIGN) * PACK_ALIGN
+        index[key] = row
+
+    # Offsets in index are relative to data section, which starts after the index
+    # Index length changes with offsets, so fix data start with a stable upper bound first.
+    text = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    data_start = PACK_HEADER.size + len(text) + len(arrays) * 12 + PACK_ALIGN
+    data_start = -(-data_start // PACK_ALIGN) * PACK_ALIGN
+    for row in index.values():
+        for variant in ['image', 'binary', 'luma']:
+            for item in row[variant]:
+                item[0] += data_start
+    text = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    if PACK_HEADER.size + len(text) > data_start:
+        raise ValueError('Asset pack index overflow')
+
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    tmp = f'{file}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(text)))
+        f.write(text)
+        for offset, array in arrays:
+            f.seek(data_start + offset)
+            f.write(array.tobytes())
+    os.replace(tmp, file)
@@ -1,5 +1,9 @@
+import time
+
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.match_batch import offset_to_area
+from module.base.metrics import METRICS
 # 此文件定义了 Alas 逻辑模块的最高基类 ModuleBase。
 # 作为所有具体功能模块（如出击、大世界、每日任务等）的公共祖先，它整合了 UI 导航、任务循环控制及基本异常处理逻辑。
 from module.base.timer import Timer
@@ -20,6 +24,11 @@ class ModuleBase:
     device: Device
 
     EARLY_OCR_IMPORT = False
+    # Reuse the result of appear() if button area didn't change since last detection
+    APPEAR_REUSE = True
+    # Records of appear() results kept for reuse.
+    # Buttons from move(), crop() and match_result() have new areas every time, so records are cleared at this size.
+    APPEAR_RECORD_LIMIT = 1000
 
     def __init__(self, config, device=None, task=None):
         """
@@ -56,6 +65,8 @@ class ModuleBase:
             self.device = device
 
         self.interval_timer = {}
+        # Key: (button name, button color, method args), value: (frame id, appear, button offset)
+        self._appear_record = {}
         self.early_ocr_import()
 
     @cached_property
@@ -223,20 +234,81 @@ class ModuleBase:
             if not self.interval_timer[button.name].reached():
                 return False
 
+        start = time.perf_counter()
         if isinstance(button, HierarchyButton):
             appear = bool(button)
         elif offset:
             if isinstance(offset, bool):
                 offset = self.config.BUTTON_OFFSET
-            appear = button.match(self.device.image, offset=offset, similarity=similarity)
+            appear = self._appear_reuse(
+                button, key=('match', offset, similarity), area=offset_to_area(offset) + button.area,
+                func=lambda: button.match(self.device.image, offset=offset, similarity=similarity))
         else:
-            appear = button.appear_on(self.device.image, threshold=threshold)
+            appear = self._appear_reuse(
+                button, key=('appear_on', threshold), area=button.area,
+                func=lambda: button.appear_on(self.device.image, threshold=threshold))
+        METRICS.record('appear', button.name, time.perf_counter() - start, hit=appear)
 
         if appear and interval:
             self.interval_timer[button.name].reset()
 
         return appear
 
+    def _appear_reuse(self, button, key, area, func):
+        """
+        Reuse the previous detection result if nothing changed inside the search area,
+        so static screens don't need to be detected again and again.
+
+        Args:
+            button (Button):
+            key (tuple): Detection method and its arguments.
+            area (tuple, np.ndarray): Search area on screenshot.
+            func (callable): Function to do detection.
+
+        Returns:
+            bool: If appear.
+        """
+        device = self.device
+        if not self.APPEAR_REUSE \
+                or not hasattr(device, 'area_unchanged_since') \
+                or device.image is not device.frame_cache.frame:
+            # Image not from screenshot(), such as image_file for development
+            return func()
+
+        # Buttons from move(), crop() and match_result() keep the name, so area and file are in key
+        key = (button.name, button.file, tuple(button.area), tuple(button.color), key)
+        record = self._appear_record.get(key)
+        if record is not None:
+            frame_id, appear, button_offset = record
+            if device.area_unchanged_since(area, frame_id):
+                button._button_offset = button_offset
+                return appear
+
+        appear = func()
+        if len(self._appear_record) >= self.APPEAR_RECORD_LIMIT:
+            self._appear_record.clear()
+        self._appear_record[key] = (device.frame_cache.frame_id, appear, button._button_offset)
+        return appear
+
+    def appear_any(self, batch):
+        """
+        Evaluate a group of buttons in one pass.
+
+        Args:
+            batch (MatchBatch):
+
+        Returns:
+            Button: The first matched button in batch, or None if nothing matched.
+
+        Examples:
+            PAGE_BATCH = MatchBatch([PAGE_A_CHECK, PAGE_B_CHECK])
+            button = self.appear_any(PAGE_BATCH)
+        """
+        for button in batch:
+            self.device.stuck_record_add(button)
+
+        return batch.match_first(self.device.image)
+
     def match_template_color(self, button, offset=(20, 20), interval=0, similarity=0.85, threshold=30):
         """
         Args:
@@ -7,7 +7,10 @@ import traceback
 import imageio
 from PIL import ImageDraw
 
+from module.base.asset_pack import ASSET_PACK, button_key
 from module.base.decorator import cached_property
+from module.base.frame_cache import FRAME_CACHE
+from module.base.metrics import timed
 from module.base.resource import Resource
 from module.base.utils import *
 from module.config.server import VALID_SERVER
@@ -104,6 +107,7 @@ class Button(Resource):
         else:
             return self._button_offset
 
+    @timed('appear_on')
     def appear_on(self, image, threshold=10):
         """Check if the button appears on the image.
 
@@ -154,7 +158,15 @@ class Button(Resource):
         If needs to call self.match, call this first.
         """
         if not self._match_init:
-            if self.is_gif:
+            pack = ASSET_PACK.get(button_key(self.file, self.area), self.file)
+            if pack is not None:
+                self.image = pack['image']
+                self.image_binary = pack['binary']
+                self.image_luma = pack['luma']
+                # Variants missing in pack are computed on demand
+                self._match_binary_init = self.image_binary is not None
+                self._match_luma_init = self.image_luma is not None
+            elif self.is_gif:
                 self.image = []
                 for image in imageio.mimread(self.file):
                     image = image[:, :, :3].copy() if len(image.shape) == 3 else image
@@ -201,6 +213,7 @@ class Button(Resource):
         self._match_binary_init = False
         self._match_luma_init = False
 
+    @timed('match')
     def match(self, image, offset=30, similarity=0.85):
         """Detects button by template matching. To Some button, its location may not be static.
 
@@ -237,6 +250,7 @@ class Button(Resource):
             self._button_offset = area_offset(self._button, offset[:2] + np.array(point))
             return sim > similarity
 
+    @timed('match_binary')
     def match_binary(self, image, offset=30, similarity=0.85):
         """Detects button by template matching. To Some button, its location may not be static.
            This method will apply template matching under binarization.
@@ -259,14 +273,11 @@ class Button(Resource):
                 offset = np.array(offset)
         else:
             offset = np.array((-3, -offset, 3, offset))
-        image = crop(image, offset + self.area, copy=False)
+        # graying and binarization, cached if image is the current screenshot
+        image_binary = FRAME_CACHE.derive(image, 'binary', offset + self.area)
 
         if self.is_gif:
             for template in self.image_binary:
-                # graying
-                image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                # binarization
-                _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
                 # template matching
                 res = cv2.matchTemplate(template, image_binary, cv2.TM_CCOEFF_NORMED)
                 _, sim, _, point = cv2.minMaxLoc(res)
@@ -275,16 +286,13 @@ class Button(Resource):
                     return True
             return False
         else:
-            # graying
-            image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # binarization
-            _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             # template matching
             res = cv2.matchTemplate(self.image_binary, image_binary, cv2.TM_CCOEFF_NORMED)
             _, sim, _, point = cv2.minMaxLoc(res)
             self._button_offset = area_offset(self._button, offset[:2] + np.array(point))
             return sim > similarity
 
+    @timed('match_luma')
     def match_luma(self, image, offset=30, similarity=0.85):
         """
         Detects button by template matching under Y channel (Luminance)
@@ -307,10 +315,9 @@ class Button(Resource):
                 offset = np.array(offset)
         else:
             offset = np.array((-3, -offset, 3, offset))
-        image = crop(image, offset + self.area, copy=False)
+        image_luma = FRAME_CACHE.derive(image, 'luma', offset + self.area)
 
         if self.is_gif:
-            image_luma = rgb2luma(image)
             for template in self.image_luma:
                 res = cv2.matchTemplate(template, image_luma, cv2.TM_CCOEFF_NORMED)
                 _, sim, _, point = cv2.minMaxLoc(res)
@@ -318,12 +325,12 @@ class Button(Resource):
                 if sim > similarity:
                     return True
         else:
-            image_luma = rgb2luma(image)
             res = cv2.matchTemplate(self.image_luma, image_luma, cv2.TM_CCOEFF_NORMED)
             _, sim, _, point = cv2.minMaxLoc(res)
             self._button_offset = area_offset(self._button, offset[:2] + np.array(point))
             return sim > similarity
 
+    @timed('match_color')
     def match_template_color(self, image, offset=(20, 20), similarity=0.85, threshold=30):
         """
         Template match first, color match then
@@ -0,0 +1,87 @@
+from module.base.utils import *
+
+
+def _binary(image):
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, image = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return image
+
+
+TRANSFORMS = {
+    # Same as the graying in Button.match_binary()
+    'gray': lambda image: cv2.cvtColor(image, cv2.COLOR_BGR2GRAY),
+    # Otsu binarization depends on the crop area, so it's cached per area
+    'binary': _binary,
+    'luma': rgb2luma,
+    'rgb2gray': rgb2gray,
+    'hsv': rgb2hsv,
+    'yuv': rgb2yuv,
+}
+
+
+class FrameCache:
+    """
+    Cache of images derived from the current screenshot, such as gray, luma, hsv and binarization.
+    Many matchers convert the same frame again and again, this cache makes them convert once per frame.
+
+    Derived images are keyed by (transform, area) and belong to one frame.
+    Cache is used only if the given image is the registered frame itself, any other image,
+    like a crop or an image loaded from file, is converted directly.
+    Cached images are shared, callers should not modify them in place.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self.frame_id = 0
+        self.cache = {}
+        self.hit = 0
+        self.miss = 0
+
+    def new_frame(self, image):
+        """
+        Register a new screenshot and drop everything derived from the previous one.
+
+        Args:
+            image (np.ndarray):
+        """
+        self.frame = image
+        self.frame_id += 1
+        self.cache.clear()
+
+    def clear(self):
+        self.frame = None
+        self.cache.clear()
+
+    def derive(self, image, transform, area=None):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+            transform (str): Key of TRANSFORMS.
+            area (tuple, np.ndarray): Crop area before transform, or None for the entire image.
+
+        Returns:
+            np.ndarray:
+        """
+        if area is not None:
+            area = tuple(int(round(i)) for i in area)
+        if image is not self.frame:
+            if area is not None:
+                image = crop(image, area, copy=False)
+            return TRANSFORMS[transform](image)
+
+        key = (transform, area)
+        try:
+            result = self.cache[key]
+            self.hit += 1
+            return result
+        except KeyError:
+            self.miss += 1
+            if area is not None:
+                image = crop(image, area, copy=False)
+            result = TRANSFORMS[transform](image)
+            self.cache[key] = result
+            return result
+
+
+# There is one device in each Alas instance, so one cache for each process
+FRAME_CACHE = FrameCache()
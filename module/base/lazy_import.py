@@ -0,0 +1,49 @@
+import importlib
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """
+    A module imported on first attribute access.
+
+    Heavy dependencies imported at the top of widely used modules are loaded by every task,
+    even if only a few code paths use them. Replace `from scipy import signal` by
+    `signal = lazy_import('scipy.signal')` to pay the import only when it's used.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if self.__dict__['_lazy_module'] is None:
+            return f'<lazy module {self.__name__!r}>'
+        return repr(self.__dict__['_lazy_module'])
+
+
+def lazy_import(name):
+    """
+    Args:
+        name (str): Full module name, such as 'scipy.signal'.
+
+    Returns:
+        ModuleType: The module itself if already imported, or a LazyModule.
+    """
+    try:
+        return sys.modules[name]
+    except KeyError:
+        return LazyModule(name)
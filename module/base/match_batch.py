@@ -0,0 +1,183 @@
+import module.config.server as server
+from module.base.button import Button
+from module.base.frame_cache import FRAME_CACHE
+from module.base.utils import *
+from module.exception import ScriptError
+
+
+def offset_to_area(offset):
+    """
+    Convert the `offset` argument of Button.match() into a relative area.
+
+    Args:
+        offset (int, tuple):
+
+    Returns:
+        np.ndarray: (x1, y1, x2, y2)
+    """
+    if isinstance(offset, tuple):
+        if len(offset) == 2:
+            return np.array((-offset[0], -offset[1], offset[0], offset[1]))
+        else:
+            return np.array(offset)
+    else:
+        return np.array((-3, -offset, 3, offset))
+
+
+class MatchBatch:
+    def __init__(self, buttons, offset=(30, 30), similarity=0.85, threshold=10, mode='rgb', name='MATCH_BATCH'):
+        """
+        Evaluate a group of buttons on one screenshot in one pass.
+
+        The union of all search windows is cropped once (with a single black border if it goes out of the
+        screen), converted once if `mode` requires it, then every button is matched on a view of it.
+        Results are the same as calling Button.match() / Button.match_luma() / Button.appear_on() one by one.
+
+        Args:
+            buttons (list[Button, tuple]):
+                Button, or tuple of (button, offset) or (button, offset, similarity).
+                Offset 0 means color match using Button.appear_on().
+            offset (int, tuple): Default offset.
+            similarity (float): Default similarity, 0 to 1.
+            threshold (int): Threshold of color match, 0 to 255.
+            mode (str): 'rgb' to match like Button.match(), 'luma' to match like Button.match_luma()
+            name (str):
+
+        Examples:
+            batch = MatchBatch([POPUP_CONFIRM, POPUP_CANCEL, (GET_MISSION, (3, 30))])
+            button = batch.match_first(self.device.image)
+        """
+        if mode not in ['rgb', 'luma']:
+            raise ScriptError(f'Unknown MatchBatch mode: {mode}')
+        self.entries = []
+        for button in buttons:
+            if isinstance(button, Button):
+                button = (button,)
+            button, offset_, similarity_ = (tuple(button) + (offset, similarity))[:3]
+            self.entries.append((button, offset_, similarity_))
+        self.threshold = threshold
+        self.mode = mode
+        self.name = name
+
+        self._windows_server = None
+        self._windows = []
+        self._union = None
+        # Button -> similarity of the last evaluation, color matches are 1 or 0
+        self.scores = {}
+
+    def __str__(self):
+        return self.name
+
+    __repr__ = __str__
+
+    def __iter__(self):
+        for button, _, _ in self.entries:
+            yield button
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _ensure_windows(self):
+        """
+        Search windows depend on Button.area, which is server specific.
+        """
+        if self._windows_server == server.server and self._union is not None:
+            return
+
+        windows = []
+        for button, offset, _ in self.entries:
+            if offset:
+                windows.append(offset_to_area(offset) + button.area)
+            else:
+                windows.append(None)
+        areas = np.array([w for w in windows if w is not None])
+        if len(areas):
+            union = np.concatenate([np.min(areas[:, :2], axis=0), np.max(areas[:, 2:], axis=0)])
+            self._union = tuple(int(round(i)) for i in union)
+        else:
+            self._union = (0, 0, 0, 0)
+        self._windows = windows
+        self._windows_server = server.server
+
+    def _templates(self, button):
+        button.ensure_template()
+        if self.mode == 'luma':
+            button.ensure_luma_template()
+            templates = button.image_luma
+        else:
+            templates = button.image
+        if button.is_gif:
+            return templates
+        else:
+            return [templates]
+
+    def evaluate(self, image, first=False):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+            first (bool): True to stop at the first matched button.
+
+        Returns:
+            list[Button]: Matched buttons, in the order they were given.
+        """
+        self._ensure_windows()
+        self.scores = {}
+        matched = []
+
+        source = None
+        ux, uy = self._union[:2]
+        for (button, offset, similarity), window in zip(self.entries, self._windows):
+            if window is None:
+                appear = button.appear_on(image, threshold=self.threshold)
+                self.scores[button] = float(appear)
+            else:
+                if source is None:
+                    # Crop and convert once
+                    if self.mode == 'luma':
+                        source = FRAME_CACHE.derive(image, 'luma', self._union)
+                    else:
+                        source = crop(image, self._union, copy=False)
+                x1, y1, x2, y2 = (int(round(i)) for i in window)
+                search = source[y1 - uy:y2 - uy, x1 - ux:x2 - ux]
+                appear = False
+                sim = 0.
+                for template in self._templates(button):
+                    res = cv2.matchTemplate(template, search, cv2.TM_CCOEFF_NORMED)
+                    _, sim, _, point = cv2.minMaxLoc(res)
+                    button._button_offset = area_offset(button._button, (x1 - button.area[0] + point[0],
+                                                                         y1 - button.area[1] + point[1]))
+                    if sim > similarity:
+                        appear = True
+                        break
+                self.scores[button] = sim
+
+            if appear:
+                matched.append(button)
+                if first:
+                    break
+
+        return matched
+
+    def match_first(self, image):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+
+        Returns:
+            Button: The first matched button, or None if nothing matched.
+        """
+        matched = self.evaluate(image, first=True)
+        if matched:
+            return matched[0]
+        else:
+            return None
+
+    def match_any(self, image):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+
+        Returns:
+            bool: If any button matched.
+        """
+        return self.match_first(image) is not None
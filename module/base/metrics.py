@@ -0,0 +1,186 @@
+import json
+import os
+import time
+from functools import wraps
+
+from deploy.atomic import atomic_write
+
+METRICS_FOLDER = './log/metrics'
+
+
+class Metrics:
+    """
+    Low-overhead counters of hot paths, such as appear(), Button.match(), Ocr.ocr(), screenshots and clicks.
+
+    Records are aggregated in place, key: (task, kind, name), value: [calls, hits, total time, max time],
+    so there's no allocation per call except the first call of a key.
+    If `sink` is set, aggregates are dumped into it every DUMP_INTERVAL seconds and at the end of each task.
+    Web UI reads sinks of all instances in the profiling page.
+    """
+    # Seconds between two dumps
+    DUMP_INTERVAL = 10
+
+    def __init__(self):
+        self.enabled = True
+        # Current task, records are grouped by task
+        self.task = 'Alas'
+        self.records = {}
+        # File to dump aggregates, None to keep them in memory only
+        self.sink = None
+        self.config_name = ''
+        self._last_screenshot = 0.
+        self._dump_at = 0.
+
+    def set_sink(self, config_name):
+        """
+        Args:
+            config_name (str):
+        """
+        self.config_name = config_name
+        self.sink = os.path.join(METRICS_FOLDER, f'{config_name}.json')
+
+    def record(self, kind, name, cost, hit=False):
+        """
+        Args:
+            kind (str): Such as 'appear', 'match', 'ocr', 'screenshot', 'click'
+            name (str): Such as button name
+            cost (float): Time cost in seconds.
+            hit (bool): If the check returns True.
+        """
+        key = (self.task, kind, name)
+        try:
+            row = self.records[key]
+        except KeyError:
+            row = [0, 0, 0., 0.]
+            self.records[key] = row
+        row[0] += 1
+        if hit:
+            row[1] += 1
+        row[2] += cost
+        if cost > row[3]:
+            row[3] = cost
+
+    def record_screenshot(self, method, cost):
+        """
+        Record screenshot cost and interval between two screenshots.
+
+        Args:
+            method (str): Screenshot method.
+            cost (float): Time cost in seconds.
+        """
+        now = time.perf_counter()
+        if self._last_screenshot:
+            self.record('interval', 'screenshot', now - self._last_screenshot)
+        self._last_screenshot = now
+        self.record('screenshot', method, cost)
+        if self.sink is not None and now > self._dump_at:
+            self._dump_at = now + self.DUMP_INTERVAL
+            self.dump()
+
+    def set_task(self, task):
+        """
+        Args:
+            task (str): Task name, such as 'Commission'
+        """
+        self.task = task
+        self._last_screenshot = 0.
+
+    def to_dict(self):
+        return {
+            'config_name': self.config_name,
+            'pid': os.getpid(),
+            'time': time.time(),
+            # task, kind, name, calls, hits, total, max
+            'records': [list(key) + row for key, row in self.records.items()],
+        }
+
+    def dump(self):
+        if self.sink is None:
+            return
+        try:
+            os.makedirs(METRICS_FOLDER, exist_ok=True)
+            atomic_write(self.sink, json.dumps(self.to_dict()))
+        except OSError:
+            # Metrics are not worth crashing tasks
+            pass
+
+    def clear(self):
+        self.records.clear()
+
+
+METRICS = Metrics()
+
+
+def timed(kind):
+    """
+    Record calls of a method, the name of record is `self.name`, result of the method is used as hit.
+
+    Args:
+        kind (str):
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not METRICS.enabled:
+                return func(self, *args, **kwargs)
+            start = time.perf_counter()
+            result = func(self, *args, **kwargs)
+            METRICS.record(kind, self.name, time.perf_counter() - start, hit=result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def read_metrics(folder=METRICS_FOLDER):
+    """
+    Read dumps of all instances.
+
+    Args:
+        folder (str):
+
+    Returns:
+        list[dict]: Output of Metrics.to_dict()
+    """
+    out = []
+    try:
+        files = sorted(os.listdir(folder))
+    except FileNotFoundError:
+        return out
+    for file in files:
+        if not file.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(folder, file), 'r', encoding='utf-8') as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def aggregate_metrics(dumps, group):
+    """
+    Args:
+        dumps (list[dict]): Output of read_metrics()
+        group (callable): Receives (config_name, task, kind, name), returns a tuple as group key.
+
+    Returns:
+        list[tuple]: group key + (calls, hits, total, max), sorted by total time.
+    """
+    out = {}
+    for dump in dumps:
+        config_name = dump.get('config_name', '')
+        for task, kind, name, calls, hits, total, max_ in dump.get('records', []):
+            key = group(config_name, task, kind, name)
+            try:
+                row = out[key]
+            except KeyError:
+                row = [0, 0, 0., 0.]
+                out[key] = row
+            row[0] += calls
+            row[1] += hits
+            row[2] += total
+            row[3] = max(row[3], max_)
+    return sorted((key + tuple(row) for key, row in out.items()), key=lambda x: -x[-2])
@@ -0,0 +1,110 @@
+import os
+
+
+class TaskBudget:
+    """
+    Limit the number of Alas instances running tasks at the same time, across processes.
+
+    Instances waiting for the budget are admitted by task priority, then by the order they started waiting.
+    Created by ProcessManager and shared to all instances it starts.
+    Instances that died without releasing are cleaned up by ProcessManager with release(pid).
+    """
+
+    def __init__(self, limit, ctx, size=64):
+        """
+        Args:
+            limit (int): Maximum instances running tasks.
+            ctx: multiprocessing context to start instances.
+            size (int): Maximum instances tracked, instances beyond it run without budget.
+        """
+        self.limit = limit
+        self.size = size
+        self.cond = ctx.Condition(ctx.Lock())
+        # Process id of each slot, 0 for empty
+        self.pid = ctx.RawArray('i', size)
+        # Task priority, smaller is higher
+        self.priority = ctx.RawArray('i', size)
+        # Waiting order
+        self.ticket = ctx.RawArray('q', size)
+        # 1 for running, 0 for waiting
+        self.running = ctx.RawArray('b', size)
+        self.counter = ctx.RawValue('q', 0)
+
+    def _find(self, pid):
+        for index in range(self.size):
+            if self.pid[index] == pid:
+                return index
+        return None
+
+    def _count_running(self):
+        return sum(1 for index in range(self.size) if self.pid[index] and self.running[index])
+
+    def _is_first(self, slot):
+        key = (self.priority[slot], self.ticket[slot])
+        for index in range(self.size):
+            if index == slot or not self.pid[index] or self.running[index]:
+                continue
+            if (self.priority[index], self.ticket[index]) < key:
+                return False
+        return True
+
+    def acquire(self, priority=0, on_wait=None):
+        """
+        Block until this instance is allowed to run a task.
+
+        Args:
+            priority (int): Task priority, smaller is higher.
+            on_wait (callable): Called once if have to wait, receives number of running instances.
+        """
+        pid = os.getpid()
+        # Instances are killed by GUI at any time, a kill inside the lock leaves it held forever.
+        # So critical sections only update shared arrays, on_wait() is called outside.
+        with self.cond:
+            slot = self._find(pid)
+            if slot is None:
+                slot = self._find(0)
+                if slot is None:
+                    # Too many instances, run without budget
+                    return
+            self.counter.value += 1
+            self.pid[slot] = pid
+            self.priority[slot] = priority
+            self.ticket[slot] = self.counter.value
+            self.running[slot] = 0
+
+        waited = False
+        while 1:
+            with self.cond:
+                if self._count_running() < self.limit and self._is_first(slot):
+                    self.running[slot] = 1
+                    return
+                if waited:
+                    # Timeout in case a dead instance is released by ProcessManager without notifying
+                    self.cond.wait(timeout=5)
+                    continue
+                running = self._count_running()
+            waited = True
+            if on_wait is not None:
+                on_wait(running)
+
+    def release(self, pid=None, timeout=None):
+        """
+        Args:
+            pid (int): Process id to release, None for current process.
+            timeout (float): Seconds to wait for the lock, None to wait forever.
+                If lock not acquired, the slot is still cleared but waiting instances are not notified.
+        """
+        if pid is None:
+            pid = os.getpid()
+        locked = self.cond.acquire(timeout=timeout)
+        try:
+            slot = self._find(pid)
+            if slot is None:
+                return
+            self.pid[slot] = 0
+            self.running[slot] = 0
+            if locked:
+                self.cond.notify_all()
+        finally:
+            if locked:
+                self.cond.release()
@@ -2,8 +2,11 @@ import os
 
 import imageio
 
+from module.base.asset_pack import ASSET_PACK, template_key
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.frame_cache import FRAME_CACHE
+from module.base.metrics import timed
 from module.base.resource import Resource
 from module.base.utils import *
 from module.config.server import VALID_SERVER
@@ -40,7 +43,12 @@ class Template(Resource):
     @property
     def image(self):
         if self._image is None:
-            if self.is_gif:
+            pack = ASSET_PACK.get(template_key(self.file), self.file)
+            if pack is not None:
+                self._image = pack['image']
+                self._image_binary = pack['binary']
+                self._image_luma = pack['luma']
+            elif self.is_gif:
                 self._image = []
                 channel = 0
                 for image in imageio.mimread(self.file):
@@ -114,6 +122,7 @@ class Template(Resource):
         else:
             return self.image.shape[0:2][::-1]
 
+    @timed('match')
     def match(self, image, scaling=1.0, similarity=0.85):
         """
         Args:
@@ -144,6 +153,7 @@ class Template(Resource):
             # print(self.file, sim)
             return sim > similarity
 
+    @timed('match_binary')
     def match_binary(self, image, similarity=0.85):
         """
         Use template match after binarization.
@@ -155,11 +165,9 @@ class Template(Resource):
         Returns:
             bool: If matches.
         """
+        # graying and binarization, cached if image is the current screenshot
+        image_binary = FRAME_CACHE.derive(image, 'binary')
         if self.is_gif:
-            # graying
-            image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # binarization
-            _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             for template in self.image_binary:
                 # template matching
                 res = cv2.matchTemplate(template, image_binary, cv2.TM_CCOEFF_NORMED)
@@ -171,19 +179,16 @@ class Template(Resource):
             return False
 
         else:
-            # graying
-            image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # binarization
-            _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             # template matching
             res = cv2.matchTemplate(self.image_binary, image_binary, cv2.TM_CCOEFF_NORMED)
             _, sim, _, _ = cv2.minMaxLoc(res)
             # print(self.file, sim)
             return sim > similarity
 
+    @timed('match_luma')
     def match_luma(self, image, similarity=0.85):
         if self.is_gif:
-            image = rgb2luma(image)
+            image = FRAME_CACHE.derive(image, 'luma')
             for template in self.image_luma:
                 res = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
                 _, sim, _, _ = cv2.minMaxLoc(res)
@@ -235,7 +240,7 @@ class Template(Resource):
         return sim, button
 
     def match_luma_result(self, image, name=None):
-        image = rgb2luma(image)
+        image = FRAME_CACHE.derive(image, 'luma')
         res = cv2.matchTemplate(image, self.image_luma, cv2.TM_CCOEFF_NORMED)
         _, sim, _, point = cv2.minMaxLoc(res)
         # print(self.file, sim)
@@ -1,5 +1,6 @@
 import copy
 import operator
+import os
 import threading
 from datetime import datetime, timedelta
 
@@ -9,7 +10,7 @@ from module.base.filter import Filter
 from module.config.config_generated import GeneratedConfig
 from module.config.config_manual import ManualConfig, OutputConfig
 from module.config.config_updater import ConfigUpdater, ensure_time, get_server_next_update, nearest_future
-from module.config.deep import deep_get, deep_set
+from module.config.deep import PathIndex, deep_get, deep_set
 from module.config.utils import DEFAULT_TIME, dict_to_kv, filepath_config, get_os_reset_remain, path_to_arg
 from module.config.watcher import ConfigWatcher
 from module.exception import RequestHumanTakeover, ScriptError
@@ -21,6 +22,53 @@ class TaskEnd(Exception):
     pass
 
 
+# Key: SCHEDULER_PRIORITY string, value: dict of lowercase command to priority
+_SCHEDULER_PRIORITY = {}
+
+
+def scheduler_priority(string):
+    """
+    Parse SCHEDULER_PRIORITY once, so tasks can be sorted by a dict lookup
+    instead of matching every task against every filter.
+
+    Args:
+        string (str): SCHEDULER_PRIORITY
+
+    Returns:
+        dict[str, int]: Key: lowercase command, value: priority, smaller is higher.
+            Commands not in the dict are dropped, same as Filter.apply().
+    """
+    try:
+        return _SCHEDULER_PRIORITY[string]
+    except KeyError:
+        pass
+
+    f = Filter(regex=r"(.*)", attr=["command"])
+    f.load(string)
+    priority = {}
+    for index, filter in enumerate(f.filter):
+        # First occurrence wins
+        priority.setdefault(filter[0], index)
+    _SCHEDULER_PRIORITY[string] = priority
+    return priority
+
+
+def sort_by_priority(functions, priority):
+    """
+    Same result as Filter.apply() on SCHEDULER_PRIORITY.
+
+    Args:
+        functions (list[Function]):
+        priority (dict[str, int]): From scheduler_priority()
+
+    Returns:
+        list[Function]:
+    """
+    functions = [func for func in functions if str(func.command).lower() in priority]
+    # Sort is stable, tasks of the same priority keep their order
+    return sorted(functions, key=lambda func: priority[str(func.command).lower()])
+
+
 class Function:
     def __init__(self, data):
         self.enable = deep_get(data, keys="Scheduler.Enable", default=False)
@@ -59,6 +107,8 @@ def name_to_function(name):
 
 class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher):
     stop_event: threading.Event = None
+    # TaskBudget shared by instances started from GUI, None to run tasks without limit
+    task_budget = None
     bound = {}
 
     # Class property
@@ -79,6 +129,8 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.config_name = config_name
         # Raw json data in yaml file.
         self.data = {}
+        # Flat index of `data`, see data_index
+        self._data_index = None
         # Modified arguments. Key: Argument path in yaml file. Value: Modified value.
         # All variable modifications will be record here and saved in method `save()`.
         self.modified = {}
@@ -99,6 +151,11 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.task: Function
         # Template config is used for dev tools
         self.is_template_config = config_name.startswith("template")
+        # Saved but not yet written. Key: Argument path in yaml file. Value: Modified value.
+        self.journal = {}
+        # (inode, size, mtime) of config file when it's read or written
+        self._file_stat = None
+        self._write_lock = threading.RLock()
 
         if self.is_template_config:
             # For dev tools
@@ -123,11 +180,29 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.save()
 
     def load(self):
-        self.data = self.read_file(self.config_name)
-        self.config_override()
+        with self._write_lock:
+            stat = self._get_file_stat()
+            if stat is None or stat != self._file_stat:
+                self.data = self.read_file(self.config_name)
+                self._file_stat = stat
+                # Not written yet
+                for path, value in self.journal.items():
+                    deep_set(self.data, keys=path, value=value)
+            self.config_override()
+
+            for path, value in self.modified.items():
+                deep_set(self.data, keys=path, value=value)
 
-        for path, value in self.modified.items():
-            deep_set(self.data, keys=path, value=value)
+    def _get_file_stat(self):
+        """
+        Returns:
+            tuple: (inode, size, mtime), or None if file not exists
+        """
+        try:
+            stat = os.stat(filepath_config(self.config_name))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
 
     def bind(self, func, func_list=None):
         """
@@ -183,17 +258,13 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
     @property
     def hoarding(self):
         minutes = int(
-            deep_get(
-                self.data, keys="Alas.Optimization.TaskHoardingDuration", default=0
-            )
+            self.cross_get(keys="Alas.Optimization.TaskHoardingDuration", default=0)
         )
         return timedelta(minutes=max(minutes, 0))
 
     @property
     def close_game(self):
-        return deep_get(
-            self.data, keys="Alas.Optimization.CloseGameDuringWait", default=False
-        )
+        return self.cross_get(keys="Alas.Optimization.CloseGameDuringWait", default=False)
 
     @property
     def is_actual_task(self):
@@ -220,12 +291,11 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             else:
                 waiting.append(func)
 
-        f = Filter(regex=r"(.*)", attr=["command"])
-        f.load(self.SCHEDULER_PRIORITY)
+        priority = scheduler_priority(self.SCHEDULER_PRIORITY)
         if pending:
-            pending = f.apply(pending)
+            pending = sort_by_priority(pending, priority)
         if waiting:
-            waiting = f.apply(waiting)
+            waiting = sort_by_priority(waiting, priority)
             waiting = sorted(waiting, key=operator.attrgetter("next_run"))
         if error:
             pending = error + pending
@@ -264,15 +334,49 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         if not self.modified:
             return False
 
-        for path, value in self.modified.items():
-            deep_set(self.data, keys=path, value=value)
+        with self._write_lock:
+            for path, value in self.modified.items():
+                deep_set(self.data, keys=path, value=value)
+                self.journal[path] = value
 
-        logger.info(
-            f"Save config {filepath_config(self.config_name, mod_name)}, {dict_to_kv(self.modified)}"
-        )
-        # Don't use self.modified = {}, that will create a new object.
-        self.modified.clear()
-        self.write_file(self.config_name, data=self.data)
+            logger.info(
+                f"Save config {filepath_config(self.config_name, mod_name)}, {dict_to_kv(self.modified)}"
+            )
+            # Don't use self.modified = {}, that will create a new object.
+            self.modified.clear()
+
+        # Written synchronously, Alas instances are killed by GUI without a chance to flush.
+        # Use multi_set() to set multiple arguments with one write.
+        return self.flush()
+
+    def flush(self):
+        """
+        Write saved changes into file.
+        Called automatically by save().
+
+        Returns:
+            bool: If wrote.
+        """
+        with self._write_lock:
+            if not self.journal:
+                return False
+
+            stat = self._get_file_stat()
+            if stat is not None and stat == self._file_stat:
+                self.write_file(self.config_name, data=self.data)
+                self._file_stat = self._get_file_stat()
+            else:
+                # File modified by others, probably GUI, merge changes into it
+                self.data = self.read_file(self.config_name)
+                for path, value in self.journal.items():
+                    deep_set(self.data, keys=path, value=value)
+                # NextRun limits are not in journal, apply them again as load() does
+                self.config_override()
+                self.write_file(self.config_name, data=self.data)
+                self._file_stat = self._get_file_stat()
+
+            self.journal.clear()
+            return True
 
     def update(self):
         self.load()
@@ -289,11 +393,9 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
                 if task in limited:
                     continue
                 limited.add(task)
-                next_run = deep_get(
-                    self.data, keys=f"{task}.Scheduler.NextRun", default=None
-                )
+                next_run = self.cross_get(keys=f"{task}.Scheduler.NextRun", default=None)
                 if isinstance(next_run, datetime) and next_run > limit:
-                    deep_set(self.data, keys=f"{task}.Scheduler.NextRun", value=now)
+                    self.data_index.set(f"{task}.Scheduler.NextRun", now)
 
         limit_next_run(["Commission", "Reward"], limit=now + timedelta(hours=12, seconds=-1))
         limit_next_run(["Research"], limit=now + timedelta(hours=24, seconds=-1))
@@ -336,6 +438,21 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         """
         return MultiSetWrapper(main=self)
 
+    @property
+    def data_index(self):
+        """
+        Flat index of `data`, rebuilt when `data` is reloaded.
+        Scheduler reads arguments of all tasks every loop, an indexed lookup is a single dict read.
+
+        Returns:
+            PathIndex:
+        """
+        index = self._data_index
+        if index is None or index.data is not self.data:
+            index = PathIndex(self.data)
+            self._data_index = index
+        return index
+
     def cross_get(self, keys, default=None):
         """
         Get configs from other tasks.
@@ -347,7 +464,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         Returns:
             Any:
         """
-        return deep_get(self.data, keys=keys, default=default)
+        return self.data_index.get(keys, default=default)
 
     def cross_set(self, keys, value):
         """
@@ -455,38 +572,28 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             )
             for task in task_list:
                 keys = f"{task}.Scheduler.NextRun"
-                current = deep_get(self.data, keys=keys, default=DEFAULT_TIME)
+                current = self.cross_get(keys=keys, default=DEFAULT_TIME)
                 if current < next_run:
                     logger.info(f"Delay task `{task}` to {next_run} ({kv})")
                     self.modified[keys] = next_run
 
         def is_submarine_call(task):
             return (
-                deep_get(self.data, keys=f"{task}.OpsiFleet.Submarine", default=False)
+                self.cross_get(keys=f"{task}.OpsiFleet.Submarine", default=False)
                 or "submarine"
-                in deep_get(
-                    self.data, keys=f"{task}.OpsiFleetFilter.Filter", default=""
-                ).lower()
+                in self.cross_get(keys=f"{task}.OpsiFleetFilter.Filter", default="").lower()
             )
 
         def is_force_run(task):
             return (
-                deep_get(self.data, keys=f"{task}.OpsiExplore.ForceRun", default=False)
-                or deep_get(
-                    self.data, keys=f"{task}.OpsiObscure.ForceRun", default=False
-                )
-                or deep_get(
-                    self.data, keys=f"{task}.OpsiAbyssal.ForceRun", default=False
-                )
-                or deep_get(
-                    self.data, keys=f"{task}.OpsiStronghold.ForceRun", default=False
-                )
+                self.cross_get(keys=f"{task}.OpsiExplore.ForceRun", default=False)
+                or self.cross_get(keys=f"{task}.OpsiObscure.ForceRun", default=False)
+                or self.cross_get(keys=f"{task}.OpsiAbyssal.ForceRun", default=False)
+                or self.cross_get(keys=f"{task}.OpsiStronghold.ForceRun", default=False)
             )
 
         def is_special_radar(task):
-            return deep_get(
-                self.data, keys=f"{task}.OpsiExplore.SpecialRadar", default=False
-            )
+            return self.cross_get(keys=f"{task}.OpsiExplore.SpecialRadar", default=False)
 
         if recon_scan:
             tasks = SelectedGrids(["OpsiExplore", "OpsiObscure", "OpsiStronghold"])
@@ -557,7 +664,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         Returns:
             bool: If called.
         """
-        if deep_get(self.data, keys=f"{task}.Scheduler.NextRun", default=None) is None:
+        if self.cross_get(keys=f"{task}.Scheduler.NextRun", default=None) is None:
             raise ScriptError(f"Task to call: `{task}` does not exist in user config")
 
         if force_call or self.is_task_enabled(task):
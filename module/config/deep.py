@@ -1,3 +1,4 @@
+import sys
 from collections import deque
 
 # deep_* functions are used for access nested dictionary.
@@ -12,6 +13,33 @@ OP_ADD = 'add'
 OP_SET = 'set'
 OP_DEL = 'del'
 
+# Key: dotted path, value: tuple of keys, see compile_keys()
+_COMPILED_KEYS = {}
+# Paths can be formatted at runtime like f"{task}.Scheduler.NextRun", keep the cache bounded
+_COMPILED_KEYS_LIMIT = 8192
+
+
+def compile_keys(keys):
+    """
+    Split a dotted path into a tuple of interned keys, cached.
+    deep_* functions look up this cache instead of splitting the same path again and again.
+
+    Args:
+        keys (str): Such as 'Scheduler.NextRun.value'
+
+    Returns:
+        tuple[str]: Such as ('Scheduler', 'NextRun', 'value')
+    """
+    try:
+        return _COMPILED_KEYS[keys]
+    except KeyError:
+        pass
+    compiled = tuple(sys.intern(k) for k in keys.split('.'))
+    if len(_COMPILED_KEYS) >= _COMPILED_KEYS_LIMIT:
+        _COMPILED_KEYS.clear()
+    _COMPILED_KEYS[keys] = compiled
+    return compiled
+
 
 def deep_get(d, keys, default=None):
     """
@@ -28,7 +56,10 @@ def deep_get(d, keys, default=None):
     """
     # 240 + 30 * depth (ns)
     if type(keys) is str:
-        keys = keys.split('.')
+        try:
+            keys = _COMPILED_KEYS[keys]
+        except KeyError:
+            keys = compile_keys(keys)
 
     try:
         for k in keys:
@@ -62,7 +93,10 @@ def deep_get_with_error(d, keys):
     """
     # 240 + 30 * depth (ns)
     if type(keys) is str:
-        keys = keys.split('.')
+        try:
+            keys = _COMPILED_KEYS[keys]
+        except KeyError:
+            keys = compile_keys(keys)
 
     try:
         for k in keys:
@@ -93,7 +127,10 @@ def deep_exist(d, keys):
     """
     # 240 + 30 * depth (ns)
     if type(keys) is str:
-        keys = keys.split('.')
+        try:
+            keys = _COMPILED_KEYS[keys]
+        except KeyError:
+            keys = compile_keys(keys)
 
     try:
         for k in keys:
@@ -118,7 +155,10 @@ def deep_set(d, keys, value):
     """
     # 150 * depth (ns)
     if type(keys) is str:
-        keys = keys.split('.')
+        try:
+            keys = _COMPILED_KEYS[keys]
+        except KeyError:
+            keys = compile_keys(keys)
 
     first = True
     exist = True
@@ -172,7 +212,10 @@ def deep_default(d, keys, value):
     """
     # 150 * depth (ns)
     if type(keys) is str:
-        keys = keys.split('.')
+        try:
+            keys = _COMPILED_KEYS[keys]
+        except KeyError:
+            keys = compile_keys(keys)
 
     first = True
     exist = True
@@ -224,7 +267,10 @@ def deep_pop(d, keys, default=None):
     Pop value from nested dict and list
     """
     if type(keys) is str:
-        keys = keys.split('.')
+        try:
+            keys = _COMPILED_KEYS[keys]
+        except KeyError:
+            keys = compile_keys(keys)
 
     try:
         for k in keys[:-1]:
@@ -531,3 +577,67 @@ def deep_iter_patch(before, after):
         queue = new_queue
         if not queue:
             break
+
+
+class PathIndex:
+    """
+    Flat index of a nested dict, dotted path -> (parent dict, key), at a fixed depth.
+    A lookup is a single dict read, instead of walking nested dicts.
+
+    Index stores parent dicts instead of values, so it stays valid
+    when values are set in place, by either PathIndex.set() or deep_set() on the same data.
+    Rebuild it if dicts on the path are replaced.
+    Paths not in the index fall back to deep_get() and deep_set().
+    """
+
+    def __init__(self, data, depth=3):
+        """
+        Args:
+            data (dict):
+            depth (int): Depth of indexed paths, at least 2. 3 for config data, such as 'Alas.Emulator.Serial'
+        """
+        self.data = data
+        self.depth = depth
+        self.index = {}
+        for path, parent in deep_iter(data, depth=depth - 1):
+            if type(parent) is not dict:
+                continue
+            prefix = '.'.join(path)
+            for key in parent:
+                self.index[f'{prefix}.{key}'] = (parent, key)
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, keys, default=None):
+        """
+        Args:
+            keys (str, list[str]): Such as 'Alas.Emulator.Serial'
+            default: Default return if key not found.
+
+        Returns:
+            Value on given keys
+        """
+        try:
+            parent, key = self.index[keys]
+        except (KeyError, TypeError):
+            # Not indexed, or `keys` is a list
+            return deep_get(self.data, keys=keys, default=default)
+        try:
+            return parent[key]
+        except KeyError:
+            # Popped after indexing
+            return default
+
+    def set(self, keys, value):
+        """
+        Args:
+            keys (str, list[str]): Such as 'Alas.Emulator.Serial'
+            value:
+        """
+        try:
+            parent, key = self.index[keys]
+        except (KeyError, TypeError):
+            deep_set(self.data, keys=keys, value=value)
+            return
+        parent[key] = value
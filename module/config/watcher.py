@@ -1,4 +1,5 @@
 import os
+import time
 from datetime import datetime
 
 from module.config.utils import filepath_config, DEFAULT_TIME
@@ -8,9 +9,15 @@ from module.logger import logger
 class ConfigWatcher:
     config_name = 'alas'
     start_mtime = DEFAULT_TIME
+    # multiprocessing.Event set by GUI after writing this config, see ProcessManager.notify_config_changed()
+    # None if running without GUI, then config file is polled.
+    config_event = None
 
     def start_watching(self) -> None:
         self.start_mtime = self.get_mtime()
+        if self.config_event is not None:
+            # Forget changes before watching, they are already loaded
+            self.config_event.clear()
 
     def get_mtime(self) -> datetime:
         """
@@ -31,3 +38,21 @@ class ConfigWatcher:
             return True
         else:
             return False
+
+    def wait_change(self, timeout) -> bool:
+        """
+        Block until GUI notifies a config change, or until timeout.
+
+        Args:
+            timeout (float): Seconds.
+
+        Returns:
+            bool: Whether configs should reload
+        """
+        if self.config_event is not None and self.config_event.wait(timeout):
+            self.config_event.clear()
+            logger.info(f'Config "{self.config_name}" changed by GUI')
+            return True
+        elif self.config_event is None:
+            time.sleep(timeout)
+        return self.should_reload()
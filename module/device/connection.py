@@ -21,7 +21,7 @@ from module.device.env import IS_LINUX, IS_MACINTOSH, IS_WINDOWS
 from module.device.method.pool import WORKER_POOL
 from module.device.method.utils import (PackageNotInstalled, RETRY_TRIES, get_serial_pair, handle_adb_error,
                                         handle_unknown_host_service, possible_reasons, random_port, recv_all,
-                                        remove_shell_warning, retry_sleep)
+                                        recv_into, remove_shell_warning, retry_sleep)
 from module.exception import EmulatorNotRunningError, RequestHumanTakeover
 from module.logger import logger
 from module.map.map_grids import SelectedGrids
@@ -522,15 +522,16 @@ class Connection(ConnectionAttr):
         logger.error('No `netcat` command available, please use screenshot methods without `_nc` suffix')
         raise RequestHumanTakeover
 
-    def adb_shell_nc(self, cmd, timeout=5, chunk_size=262144):
+    def adb_shell_nc(self, cmd, timeout=5, chunk_size=262144, buffer=None):
         """
         Args:
             cmd (list):
             timeout (int):
             chunk_size (int): Default to 262144
+            buffer (bytearray): Receive data into this buffer to avoid copying, see recv_into()
 
         Returns:
-            bytes:
+            bytes: Or memoryview of buffer if buffer is given
         """
         # Server start listening
         server = self.reverse_server
@@ -548,7 +549,10 @@ class Connection(ConnectionAttr):
             raise AdbTimeout('reverse server accept timeout')
 
         # Server receive data
-        data = recv_all(conn, chunk_size=chunk_size, recv_interval=0.001)
+        if buffer is None:
+            data = recv_all(conn, chunk_size=chunk_size, recv_interval=0.001)
+        else:
+            data = recv_into(conn, buffer, chunk_size=chunk_size, recv_interval=0.001)
 
         # Server close connection
         conn.close()
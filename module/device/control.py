@@ -1,16 +1,20 @@
+import time
+
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.metrics import METRICS
 from module.base.timer import Timer
 from module.base.utils import *
 from module.device.method.hermit import Hermit
 from module.device.method.maatouch import MaaTouch
 from module.device.method.minitouch import Minitouch
 from module.device.method.nemu_ipc import NemuIpc
+from module.device.method.replay import Replay
 from module.device.method.scrcpy import Scrcpy
 from module.logger import logger
 
 
-class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
+class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc, Replay):
     def handle_control_check(self, button):
         # Will be overridden in Device
         pass
@@ -24,6 +28,7 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             'Hermit': self.click_hermit,
             'MaaTouch': self.click_maatouch,
             'nemu_ipc': self.click_nemu_ipc,
+            'Replay': self.click_replay,
         }
 
     def click(self, button, control_check=True):
@@ -44,7 +49,9 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             self.config.Emulator_ControlMethod,
             self.click_adb
         )
+        start = time.perf_counter()
         method(x, y)
+        METRICS.record('click', str(button), time.perf_counter() - start)
 
     def multi_click(self, button, n, interval=(0.1, 0.2)):
         self.handle_control_check(button)
@@ -82,6 +89,8 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             self.long_click_maatouch(x, y, duration)
         elif method == 'nemu_ipc':
             self.long_click_nemu_ipc(x, y, duration)
+        elif method == 'Replay':
+            self.long_click_replay(x, y, duration)
         else:
             self.swipe_adb((x, y), (x, y), duration)
 
@@ -92,7 +101,7 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
         method = self.config.Emulator_ControlMethod
         if method == 'uiautomator2':
             logger.info('Swipe %s -> %s, %s' % (point2str(*p1), point2str(*p2), duration))
-        elif method in ['minitouch', 'MaaTouch', 'scrcpy', 'nemu_ipc']:
+        elif method in ['minitouch', 'MaaTouch', 'scrcpy', 'nemu_ipc', 'Replay']:
             logger.info('Swipe %s -> %s' % (point2str(*p1), point2str(*p2)))
         else:
             # ADB needs to be slow, or swipe doesn't work
@@ -116,6 +125,8 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             self.swipe_maatouch(p1, p2)
         elif method == 'nemu_ipc':
             self.swipe_nemu_ipc(p1, p2)
+        elif method == 'Replay':
+            self.swipe_replay(p1, p2)
         else:
             self.swipe_adb(p1, p2, duration=duration)
 
@@ -167,6 +178,8 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             self.drag_maatouch(p1, p2, point_random=point_random)
         elif method == 'nemu_ipc':
             self.drag_nemu_ipc(p1, p2, point_random=point_random)
+        elif method == 'Replay':
+            self.drag_replay(p1, p2)
         else:
             logger.warning(f'Control method {method} does not support drag well, '
                            f'falling back to ADB swipe may cause unexpected behaviour')
@@ -1,6 +1,7 @@
 # 此文件定义了 Device 类，是脚本与设备交互的综合管理入口。
 # 负责整合截图、点击、输入功能，并由于内置了防卡死检测和点击频率控制，能有效提高脚本自动化运行的稳定性。
 import collections
+import time
 from datetime import datetime
 
 from lxml import etree
@@ -12,6 +13,7 @@ from module.device.pkg_resources import get_distribution
 # Just avoid being removed by import optimization
 _ = get_distribution
 
+from module.base.metrics import METRICS
 from module.base.timer import Timer
 from module.config.utils import get_server_next_update
 from module.device.app_control import AppControl
@@ -190,6 +192,7 @@ class Device(Screenshot, Control, AppControl, Input):
         """
         self.stuck_record_check()
 
+        start = time.perf_counter()
         try:
             super().screenshot()
         except RequestHumanTakeover:
@@ -203,6 +206,7 @@ class Device(Screenshot, Control, AppControl, Input):
         if self.handle_night_commission():
             super().screenshot()
 
+        METRICS.record_screenshot(self.config.Emulator_ScreenshotMethod, time.perf_counter() - start)
         return self.image
 
     def dump_hierarchy(self) -> etree._Element:
@@ -0,0 +1,168 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+# magic, sequence, time of the frame, time of the last watch, width, height
+LIVE_FRAME_HEADER = struct.Struct('<8sQddII')
+LIVE_FRAME_MAGIC = b'ALASLIVE'
+# Frame data starts after the header, aligned to 64 bytes
+LIVE_FRAME_OFFSET = 64
+LIVE_FRAME_SHAPE = (720, 1280, 3)
+LIVE_FRAME_SIZE = LIVE_FRAME_OFFSET + int(np.prod(LIVE_FRAME_SHAPE))
+
+
+def live_frame_path(name):
+    """
+    Args:
+        name (str): Config name.
+
+    Returns:
+        str: Path to the backing file on non-Windows systems, in tmpfs if possible.
+    """
+    folder = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(folder, f'alas_live_{name}')
+
+
+class LiveFrame:
+    """
+    Latest screenshot of an Alas instance, shared between the instance and the web UI.
+
+    The segment is a header and a fixed 1280x720x3 slot.
+    Windows uses a named memory mapping, other systems use a file in /dev/shm, which is shared memory too.
+    Web UI creates the segment and renews `watched` when a browser is showing the instance,
+    instance publishes screenshots only if it has been watched within WATCH_TIMEOUT,
+    so there's no cost when nobody is looking.
+
+    Sequence works as a seqlock, it's odd while the instance is writing the frame.
+    """
+
+    # Instance stops publishing if web UI didn't watch in this many seconds
+    WATCH_TIMEOUT = 5
+    # Interval to retry attaching, if web UI didn't create the segment yet
+    ATTACH_INTERVAL = 5
+
+    def __init__(self, name):
+        """
+        Args:
+            name (str): Config name.
+        """
+        self.name = name
+        self.mm = None
+        self.frame = None
+        self._attach_at = 0.
+
+    def _open(self, create):
+        if os.name == 'nt':
+            # Named mapping is created if not exists, and released after all processes closed it
+            return mmap.mmap(-1, LIVE_FRAME_SIZE, tagname=f'alas_live_{self.name}')
+
+        path = live_frame_path(self.name)
+        if create:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        else:
+            try:
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:
+                return None
+        try:
+            if os.fstat(fd).st_size < LIVE_FRAME_SIZE:
+                if not create:
+                    return None
+                os.ftruncate(fd, LIVE_FRAME_SIZE)
+            return mmap.mmap(fd, LIVE_FRAME_SIZE)
+        finally:
+            os.close(fd)
+
+    def attach(self, create=False):
+        """
+        Args:
+            create (bool): True to create the segment if not exists, used by web UI.
+
+        Returns:
+            bool: If attached.
+        """
+        if self.mm is not None:
+            return True
+        try:
+            mm = self._open(create)
+        except OSError:
+            return False
+        if mm is None:
+            return False
+        if mm[:8] != LIVE_FRAME_MAGIC:
+            if not create:
+                mm.close()
+                return False
+            height, width = LIVE_FRAME_SHAPE[:2]
+            LIVE_FRAME_HEADER.pack_into(mm, 0, LIVE_FRAME_MAGIC, 0, 0., 0., width, height)
+        self.mm = mm
+        self.frame = np.ndarray(LIVE_FRAME_SHAPE, dtype=np.uint8, buffer=mm, offset=LIVE_FRAME_OFFSET)
+        return True
+
+    def close(self):
+        self.frame = None
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def watch(self):
+        """
+        Called by web UI, to request the instance to publish frames.
+        """
+        if self.attach(create=True):
+            struct.pack_into('<d', self.mm, 24, time.time())
+
+    def publish(self, image):
+        """
+        Called by the instance on every screenshot, takes 0.2ms to copy a frame if watched, or nothing if not.
+
+        Args:
+            image (np.ndarray): Screenshot.
+        """
+        if self.mm is None:
+            now = time.time()
+            if now < self._attach_at:
+                return
+            self._attach_at = now + self.ATTACH_INTERVAL
+            if not self.attach():
+                return
+
+        _, sequence, _, watched, _, _ = LIVE_FRAME_HEADER.unpack_from(self.mm, 0)
+        now = time.time()
+        if now - watched > self.WATCH_TIMEOUT:
+            return
+        if image.shape != LIVE_FRAME_SHAPE:
+            # Unexpected resolution, check_screen_size() will handle it
+            return
+
+        # Odd while writing
+        sequence |= 1
+        struct.pack_into('<Q', self.mm, 8, sequence)
+        np.copyto(self.frame, image)
+        struct.pack_into('<Qd', self.mm, 8, sequence + 1, now)
+
+    def read(self, last_sequence=0):
+        """
+        Called by web UI.
+
+        Args:
+            last_sequence (int): Sequence of the frame read last time.
+
+        Returns:
+            tuple[int, float, np.ndarray]: Sequence, time of the frame, a copy of the frame.
+                Or None if no new frame, or the instance is writing it.
+        """
+        if self.mm is None:
+            return None
+        sequence, updated = struct.unpack_from('<Qd', self.mm, 8)
+        if sequence == last_sequence or sequence % 2 or sequence == 0:
+            return None
+        frame = self.frame.copy()
+        if struct.unpack_from('<Q', self.mm, 8)[0] != sequence:
+            # Overwritten while copying
+            return None
+        return sequence, updated, frame
@@ -7,7 +7,7 @@ import numpy as np
 from adbutils.errors import AdbError
 from lxml import etree
 
-from module.base.decorator import Config
+from module.base.decorator import Config, cached_property
 from module.config.server import DICT_PACKAGE_TO_ACTIVITY
 from module.device.connection import Connection
 from module.device.method.utils import (ImageTruncated, PackageNotInstalled, RETRY_TRIES, handle_adb_error,
@@ -84,25 +84,39 @@ def retry(func):
     return retry_wrapper
 
 
-def load_screencap(data):
+class ScreencapSizeMismatch(ImageTruncated):
+    pass
+
+
+def load_screencap(data, exact=False):
     """
     Args:
-        data: Raw data from `screencap`
+        data (bytes, bytearray, memoryview): Raw data from `screencap`
+        exact (bool): True to check if data is exactly a 12 or 16 bytes header plus pixels.
+            Raise ScreencapSizeMismatch if data is larger,
+            which means line endings were converted by old adb on some emulators.
 
     Returns:
         np.ndarray:
     """
     # Load data
-    header = np.frombuffer(data[0:12], dtype=np.uint32)
+    # Header is (width, height, format) and Android 12+ adds a 4 bytes colorspace.
+    if len(data) < 12:
+        raise ImageTruncated('Empty image after reading from buffer')
+    header = np.frombuffer(data, dtype=np.uint32, count=3)
     channel = 4  # screencap sends an RGBA image
     width, height, _ = header  # Usually to be 1280, 720, 1
+    size = int(width * height * channel)
+    if exact and len(data) - size not in [12, 16]:
+        if len(data) > size + 16:
+            raise ScreencapSizeMismatch(f'Unexpected screencap size {len(data)} of image {width}x{height}')
+        else:
+            raise ImageTruncated(f'Screencap truncated, size {len(data)} of image {width}x{height}')
 
-    image = np.frombuffer(data, dtype=np.uint8)
-    if image is None:
-        raise ImageTruncated('Empty image after reading from buffer')
-
+    # View the payload without copying
     try:
-        image = image[-int(width * height * channel):].reshape(height, width, channel)
+        image = np.frombuffer(data, dtype=np.uint8, count=size, offset=len(data) - size)
+        image = image.reshape(height, width, channel)
     except ValueError as e:
         # ValueError: cannot reshape array of size 0 into shape (720,1280,4)
         raise ImageTruncated(str(e))
@@ -117,6 +131,27 @@ def load_screencap(data):
 class Adb(Connection):
     __screenshot_method = [0, 1, 2]
     __screenshot_method_fixed = [0, 1, 2]
+    # Use raw `screencap` instead of `screencap -p` in screenshot_adb(),
+    # this skips PNG encoding on device and decoding here, which cost 60~120ms per frame.
+    # Will fallback to `screencap -p` if line endings of raw data get converted.
+    SCREENCAP_RAW = True
+    # Compress raw `screencap` on device with `lz4` if the binary exists, for slow adb connections
+    SCREENCAP_LZ4 = False
+    __screencap_raw_available = True
+
+    @cached_property
+    def screencap_buffer(self):
+        """
+        Receive buffer reused by screenshot_adb_nc()
+        """
+        return bytearray()
+
+    @cached_property
+    def screencap_lz4_available(self):
+        result = self.adb_shell(['which', 'lz4'])
+        available = bool(result) and 'not found' not in result
+        logger.attr('ScreencapLz4', available)
+        return available
 
     @staticmethod
     def __load_screenshot(screenshot, method):
@@ -162,9 +197,41 @@ class Adb(Connection):
             logger.warning(f'Unexpected screenshot: {screenshot}')
         raise OSError(f'cannot load screenshot')
 
+    def __screenshot_adb_raw(self):
+        """
+        Returns:
+            np.ndarray: Or None if raw screencap not available
+        """
+        lz4 = self.SCREENCAP_LZ4 and self.screencap_lz4_available
+        if lz4:
+            data = self.adb_shell('screencap | lz4 -1 -c', stream=True)
+            from lz4.frame import decompress
+            try:
+                data = decompress(data)
+            except RuntimeError as e:
+                logger.warning(f'Failed to decompress screencap: {e}')
+                self.__screencap_raw_available = False
+                return None
+        else:
+            data = self.adb_shell(['screencap'], stream=True)
+        data = remove_prefix(data, b'long long=8 fun*=10\n')
+
+        try:
+            return load_screencap(data, exact=True)
+        except ScreencapSizeMismatch as e:
+            logger.warning(e)
+            logger.warning('Raw screencap not available, fallback to `screencap -p`')
+            self.__screencap_raw_available = False
+            return None
+
     @retry
     @Config.when(DEVICE_OVER_HTTP=False)
     def screenshot_adb(self):
+        if self.SCREENCAP_RAW and self.__screencap_raw_available:
+            image = self.__screenshot_adb_raw()
+            if image is not None:
+                return image
+
         data = self.adb_shell(['screencap', '-p'], stream=True)
         if len(data) < 500:
             logger.warning(f'Unexpected screenshot: {data}')
@@ -182,9 +249,9 @@ class Adb(Connection):
 
     @retry
     def screenshot_adb_nc(self):
-        data = self.adb_shell_nc(['screencap'])
+        data = self.adb_shell_nc(['screencap'], buffer=self.screencap_buffer)
         if len(data) < 500:
-            logger.warning(f'Unexpected screenshot: {data}')
+            logger.warning(f'Unexpected screenshot: {bytes(data)}')
 
         return load_screencap(data)
 
@@ -0,0 +1,135 @@
+import os
+import re
+
+from module.base.decorator import cached_property
+from module.base.utils import load_image
+from module.device.connection import Connection
+from module.logger import logger
+
+
+class ReplayFinished(Exception):
+    pass
+
+
+class ReplayAction:
+    def __init__(self, frame, action, args):
+        """
+        Args:
+            frame (int): Index of the frame on screen when action was sent.
+            action (str): 'click', 'long_click', 'swipe', 'drag'
+            args (tuple):
+        """
+        self.frame = frame
+        self.action = action
+        self.args = args
+
+    def __str__(self):
+        return f'ReplayAction({self.frame}, {self.action}, {self.args})'
+
+    __repr__ = __str__
+
+
+def replay_frames(folder):
+    """
+    Args:
+        folder (str): Folder of PNG screenshots, such as ./log/error/<timestamp> saved by save_error_log()
+
+    Returns:
+        list[str]: Paths of frames in order of recording.
+            Files named by time like 2020-01-01_00-00-00-000000.png, or by index like 1.png, 2.png
+    """
+    files = [file for file in os.listdir(folder) if file.lower().endswith('.png')]
+
+    def key(file):
+        # Natural sort, so 10.png follows 9.png
+        return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', file)]
+
+    return [os.path.join(folder, file) for file in sorted(files, key=key)]
+
+
+class Replay(Connection):
+    """
+    Screenshot and control method that replays recorded screenshots, no emulator required.
+
+    Each screenshot() takes the next frame from disk, controls are recorded into `replay_actions`
+    instead of being sent, so that detections can be benchmarked and tested offline.
+    Set screenshot method and control method to 'Replay', and call replay_load() before screenshots.
+    """
+    # Paths of frames
+    replay_files = []
+    # Index of the current frame, -1 if no screenshot taken
+    replay_cursor = -1
+    # Start over after the last frame, or raise ReplayFinished
+    replay_loop = False
+
+    @cached_property
+    def replay_actions(self):
+        """
+        Returns:
+            list[ReplayAction]:
+        """
+        return []
+
+    @cached_property
+    def replay_cache(self):
+        """
+        Decoded frames, key: path, value: image. Frames are decoded once even if replayed in loop.
+
+        Returns:
+            dict[str, np.ndarray]:
+        """
+        return {}
+
+    def replay_load(self, folder, loop=False):
+        """
+        Args:
+            folder (str): Folder of PNG screenshots.
+            loop (bool): Start over after the last frame.
+        """
+        self.replay_files = replay_frames(folder)
+        self.replay_cursor = -1
+        self.replay_loop = loop
+        self.replay_cache.clear()
+        self.replay_actions.clear()
+        logger.attr('ReplayFrames', f'{len(self.replay_files)} from {folder}')
+
+    def screenshot_replay(self):
+        """
+        Returns:
+            np.ndarray:
+
+        Raises:
+            ReplayFinished: If all frames are replayed and not in loop.
+        """
+        if not self.replay_files:
+            raise ReplayFinished('No frames to replay')
+        cursor = self.replay_cursor + 1
+        if cursor >= len(self.replay_files):
+            if not self.replay_loop:
+                raise ReplayFinished(f'All {len(self.replay_files)} frames replayed')
+            cursor = 0
+        self.replay_cursor = cursor
+
+        file = self.replay_files[cursor]
+        try:
+            image = self.replay_cache[file]
+        except KeyError:
+            image = load_image(file)
+            self.replay_cache[file] = image
+        # Screenshot is modified in place by some detections
+        return image.copy()
+
+    def _replay_record(self, action, *args):
+        self.replay_actions.append(ReplayAction(self.replay_cursor, action, args))
+
+    def click_replay(self, x, y):
+        self._replay_record('click', x, y)
+
+    def long_click_replay(self, x, y, duration=1.0):
+        self._replay_record('long_click', x, y, duration)
+
+    def swipe_replay(self, p1, p2):
+        self._replay_record('swipe', tuple(p1), tuple(p2))
+
+    def drag_replay(self, p1, p2):
+        self._replay_record('drag', tuple(p1), tuple(p2))
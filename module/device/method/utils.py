@@ -163,6 +163,47 @@ def recv_all(stream, chunk_size=4096, recv_interval=0.000) -> bytes:
         raise AdbTimeout('adb read timeout')
 
 
+def recv_into(stream, buffer, chunk_size=262144, recv_interval=0.000) -> memoryview:
+    """
+    Same as recv_all(), but receive into a reusable buffer instead of joining fragments into new bytes.
+
+    Args:
+        stream:
+        buffer (bytearray): Buffer to reuse, will be enlarged if data doesn't fit in.
+        chunk_size:
+        recv_interval (float): Default to 0.000, use 0.001 if receiving as server
+
+    Returns:
+        memoryview: View of the received data in buffer, valid until the next call with the same buffer.
+            Or bytes if there are shell warnings to remove, which is rare.
+
+    Raises:
+        AdbTimeout
+    """
+    if isinstance(stream, AdbConnection):
+        stream = stream.conn
+    stream.settimeout(10)
+
+    size = 0
+    try:
+        while 1:
+            if len(buffer) - size < chunk_size:
+                buffer.extend(bytes(max(chunk_size, len(buffer))))
+            received = stream.recv_into(memoryview(buffer)[size:size + chunk_size])
+            if received:
+                size += received
+                time.sleep(recv_interval)
+            else:
+                break
+    except socket.timeout:
+        raise AdbTimeout('adb read timeout')
+
+    head = bytes(buffer[:min(size, 512)])
+    if remove_shell_warning(head) != head:
+        return remove_shell_warning(bytes(buffer[:size]))
+    return memoryview(buffer)[:size]
+
+
 def possible_reasons(*args):
     """
     Show possible reasons
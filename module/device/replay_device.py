@@ -0,0 +1,61 @@
+from module.base.timer import Timer
+from module.config.config import AzurLaneConfig
+from module.device.device import Device
+from module.logger import logger
+
+
+class ReplayDevice(Device):
+    """
+    Device that replays recorded screenshots, see module/device/method/replay.py
+
+    Usage:
+        device = ReplayDevice('alas', folder='./log/error/1700000000000')
+        ui = UI('alas', device=device)
+        ui.device.screenshot()
+    """
+
+    def __init__(self, config, folder, loop=False):
+        """
+        Args:
+            config (AzurLaneConfig, str): Name of the user config under ./config
+            folder (str): Folder of PNG screenshots.
+            loop (bool): Start over after the last frame.
+        """
+        # No emulator to connect, skip Connection.__init__()
+        logger.hr('Replay device', level=1)
+        if isinstance(config, str):
+            config = AzurLaneConfig(config, task=None)
+        self.config = config
+        self.serial = 'replay'
+        self.package = self.config.Emulator_PackageName
+        self.config.override(
+            Emulator_ScreenshotMethod='Replay',
+            Emulator_ControlMethod='Replay',
+            Emulator_ScreenshotDedithering=False,
+            Error_SaveError=False,
+        )
+        # Replay as fast as possible
+        self._screenshot_interval = Timer(0)
+        # Recorded frames are not checked for resolution and black screen,
+        # because these checks need adb
+        self._screen_size_checked = True
+        self._screen_black_checked = True
+        # Frames don't change on clicks, detections would be considered stuck
+        self.disable_stuck_detection()
+        self.replay_load(folder, loop=loop)
+
+    def app_is_running(self):
+        return True
+
+    def app_start(self):
+        logger.info('Replay device, app_start() ignored')
+
+    def app_stop(self):
+        logger.info('Replay device, app_stop() ignored')
+
+    def release_during_wait(self):
+        pass
+
+    def sleep(self, second):
+        # Nothing to wait in replay
+        pass
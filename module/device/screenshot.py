@@ -1,7 +1,5 @@
 import os
 import time
-from collections import deque
-from datetime import datetime
 from PIL import Image
 # 此文件定义了截图处理逻辑。
 # 管理各种截图捕获方式，并包含后台编码线程用于将图像序列化并通过 Base64 供 WebUI 实时渲染预览。
@@ -13,19 +11,23 @@ import cv2
 import numpy as np
 
 from module.base.decorator import cached_property
+from module.base.frame_cache import FRAME_CACHE, FrameCache
 from module.base.timer import Timer
 from module.base.utils import get_color, image_size, limit_in, save_image
+from module.device.live_frame import LiveFrame
 from module.device.method.adb import Adb
 from module.device.method.ascreencap import AScreenCap
 from module.device.method.droidcast import DroidCast
 from module.device.method.ldopengl import LDOpenGL
 from module.device.method.nemu_ipc import NemuIpc
+from module.device.method.replay import Replay
 from module.device.method.scrcpy import Scrcpy
 from module.device.method.wsa import WSA
+from module.device.screenshot_ring import ScreenshotRing
 from module.exception import RequestHumanTakeover, ScriptError
 from module.logger import logger
 
-class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
+class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL, Replay):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -36,6 +38,17 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
     _last_save_time = {}
     image: np.ndarray
 
+    # Frame diff, screenshots are compared in blocks of 16x16 pixels
+    FRAME_DIFF_BLOCK = 16
+    # If current screenshot is different from the previous one
+    frame_changed = True
+    # Copy of the previous screenshot
+    _frame_prev = None
+    # Frame id of the last change of each block
+    _block_changed_at = None
+    # Downscale screenshots kept for error logs, 1.0 to keep the original resolution
+    SCREENSHOT_RING_SCALE = 1.0
+
     @cached_property
     def screenshot_methods(self):
         return {
@@ -49,6 +62,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             'scrcpy': self.screenshot_scrcpy,
             'nemu_ipc': self.screenshot_nemu_ipc,
             'ldopengl': self.screenshot_ldopengl,
+            'Replay': self.screenshot_replay,
         }
 
     @cached_property
@@ -78,15 +92,104 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             self.image = self._handle_orientated_image(self.image)
 
             if self.config.Error_SaveError:
-                self.screenshot_deque.append({'time': datetime.now(), 'image': self.image})
+                self.screenshot_ring.append(self.image, time.time())
 
             if self.check_screen_size() and self.check_screen_black():
                 break
             else:
                 continue
 
+        self.frame_cache.new_frame(self.image)
+        self._frame_diff(self.image)
+        self.live_frame.publish(self.image)
         return self.image
 
+    @cached_property
+    def live_frame(self) -> LiveFrame:
+        """
+        Latest screenshot shared with the web UI, published only when someone is watching.
+        """
+        return LiveFrame(self.config.config_name)
+
+    @property
+    def frame_cache(self) -> FrameCache:
+        """
+        Gray, luma, hsv and binary images derived from the current screenshot,
+        shared by all Button, Template and Ocr calls until the next screenshot.
+        """
+        return FRAME_CACHE
+
+    def _frame_diff(self, image):
+        """
+        Compare the new screenshot with the previous one block by block.
+        Blocks are compared pixel by pixel, so shifts and swaps inside a block are detected.
+        This takes a few milliseconds on 1280x720 images.
+
+        Args:
+            image (np.ndarray):
+        """
+        frame_id = self.frame_cache.frame_id
+        block = self.FRAME_DIFF_BLOCK
+        height, width = image.shape[:2]
+        if width % block or height % block:
+            # Unexpected resolution, treat as all changed
+            self._frame_prev = None
+            self._block_changed_at = None
+            self.frame_changed = True
+            return
+
+        shape = (height // block, width // block)
+        prev = self._frame_prev
+        if prev is None or prev.shape != image.shape:
+            self._block_changed_at = np.full(shape, frame_id, dtype=np.int64)
+            self.frame_changed = True
+        else:
+            diff = cv2.absdiff(prev, image)
+            # Max difference of each block, any non-zero pixel marks the block as changed
+            # Channels are folded into the row so reshape needs no copy
+            changed = diff.reshape(shape[0], block, shape[1], -1).max(axis=(1, 3)) > 0
+            self._block_changed_at[changed] = frame_id
+            self.frame_changed = bool(changed.any())
+        # Screenshots may be views of reused buffers, keep a copy
+        self._frame_prev = image.copy()
+
+    @property
+    def changed_regions(self):
+        """
+        Returns:
+            list[tuple[int]]: Areas of blocks that changed in the current screenshot,
+                (upper_left_x, upper_left_y, bottom_right_x, bottom_right_y).
+        """
+        if self._block_changed_at is None:
+            width, height = image_size(self.image)
+            return [(0, 0, width, height)]
+        block = self.FRAME_DIFF_BLOCK
+        ys, xs = np.where(self._block_changed_at == self.frame_cache.frame_id)
+        return [(x * block, y * block, (x + 1) * block, (y + 1) * block) for x, y in zip(xs, ys)]
+
+    def area_unchanged_since(self, area, frame_id):
+        """
+        Args:
+            area (tuple, np.ndarray): (upper_left_x, upper_left_y, bottom_right_x, bottom_right_y)
+            frame_id (int): `frame_cache.frame_id` of a previous screenshot.
+
+        Returns:
+            bool: True if no pixel inside area changed after that screenshot.
+        """
+        if self._block_changed_at is None:
+            return False
+        block = self.FRAME_DIFF_BLOCK
+        height, width = self._block_changed_at.shape
+        x1, y1, x2, y2 = area
+        x1 = limit_in(int(x1 // block), 0, width)
+        y1 = limit_in(int(y1 // block), 0, height)
+        x2 = limit_in(int(-(-x2 // block)), 0, width)
+        y2 = limit_in(int(-(-y2 // block)), 0, height)
+        blocks = self._block_changed_at[y1:y2, x1:x2]
+        if not blocks.size:
+            return False
+        return int(blocks.max()) <= frame_id
+
     @property
     def has_cached_image(self):
         return hasattr(self, 'image') and self.image is not None
@@ -118,7 +221,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
         return image
 
     @cached_property
-    def screenshot_deque(self):
+    def screenshot_ring(self) -> ScreenshotRing:
         try:
             length = int(self.config.Error_ScreenshotLength)
         except ValueError:
@@ -126,7 +229,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             raise RequestHumanTakeover
         # Limit in 1~400
         length = max(1, min(length, 400))
-        return deque(maxlen=length)
+        return ScreenshotRing(length=length, scale=self.SCREENSHOT_RING_SCALE)
 
     def save_screenshot(self, genre='items', interval=None, to_base_folder=False):
         """Save a screenshot. Use millisecond timestamp as file name.
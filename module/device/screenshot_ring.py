@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+
+class ScreenshotRing:
+    """
+    A fixed size ring buffer of recent screenshots, saved in error logs.
+
+    Frames are copied into preallocated chunks instead of keeping a reference to each screenshot,
+    so memory usage is bounded by `length` and there's no allocation per frame.
+    Chunks are allocated as the ring fills up, so memory grows with the frames actually kept.
+    """
+
+    # Frames in each chunk
+    CHUNK = 16
+
+    def __init__(self, length, scale=1.0):
+        """
+        Args:
+            length (int): Maximum frames to keep.
+            scale (float): Downscale frames to save memory, 1.0 to keep the original resolution.
+        """
+        self.length = length
+        self.scale = scale
+        # Chunks of shape (CHUNK, height, width, channel), allocated when the cursor reaches them
+        self.chunks = []
+        # Shape of each frame
+        self.shape = None
+        # Timestamp of each frame
+        self.times = np.zeros(length, dtype=np.float64)
+        # Index of the next slot to write
+        self.cursor = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _frame_shape(self, image):
+        if self.scale == 1.0:
+            return image.shape
+        height, width = image.shape[:2]
+        return (int(height * self.scale), int(width * self.scale)) + image.shape[2:]
+
+    def append(self, image, timestamp):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+            timestamp (float): Time of the screenshot, in unix timestamp.
+        """
+        shape = self._frame_shape(image)
+        if self.shape != shape:
+            # First frame, or resolution changed
+            self.chunks = []
+            self.shape = shape
+            self.cursor = 0
+            self.count = 0
+
+        chunk, index = divmod(self.cursor, self.CHUNK)
+        if chunk >= len(self.chunks):
+            # Cursor moves forward one by one, so chunks are allocated in order
+            size = min(self.CHUNK, self.length - chunk * self.CHUNK)
+            self.chunks.append(np.empty((size,) + shape, dtype=np.uint8))
+        slot = self.chunks[chunk][index]
+        if self.scale == 1.0:
+            np.copyto(slot, image)
+        else:
+            cv2.resize(image, (shape[1], shape[0]), dst=slot, interpolation=cv2.INTER_AREA)
+        self.times[self.cursor] = timestamp
+
+        self.cursor = (self.cursor + 1) % self.length
+        self.count = min(self.count + 1, self.length)
+
+    def clear(self):
+        # Release chunks, they are allocated again as new frames come
+        self.chunks = []
+        self.cursor = 0
+        self.count = 0
+
+    def __iter__(self):
+        """
+        Yield frames lazily from the oldest to the newest.
+        Frames are views of the buffer, copy them if they need to outlive the next append().
+
+        Yields:
+            tuple[datetime, np.ndarray]: Time, image
+        """
+        start = (self.cursor - self.count) % self.length
+        for i in range(self.count):
+            index = (start + i) % self.length
+            chunk, offset = divmod(index, self.CHUNK)
+            yield datetime.fromtimestamp(self.times[index]), self.chunks[chunk][offset]
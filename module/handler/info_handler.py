@@ -1,7 +1,8 @@
-from scipy import signal
-
 from module.base.base import ModuleBase
 from module.base.button import Button
+from module.base.decorator import cached_property
+from module.base.lazy_import import lazy_import
+from module.base.match_batch import MatchBatch
 from module.base.timer import Timer
 from module.base.utils import *
 from module.exception import GameNotRunningError
@@ -10,6 +11,8 @@ from module.logger import logger
 from module.os_handler.assets import CLICK_SAFE_AREA as OS_CLICK_SAFE_AREA
 from module.ui_white.assets import POPUP_CANCEL_WHITE, POPUP_CONFIRM_WHITE, POPUP_SINGLE_WHITE
 
+signal = lazy_import('scipy.signal')
+
 
 def info_letter_preprocess(image):
     """
@@ -91,9 +94,22 @@ class InfoHandler(ModuleBase):
     """
     _popup_offset = (3, 30)
 
+    @cached_property
+    def popup_batch(self):
+        """
+        Returns:
+            MatchBatch: All popup buttons under default offset.
+        """
+        return MatchBatch(
+            [POPUP_CANCEL, POPUP_CONFIRM, POPUP_CANCEL_WHITE, POPUP_CONFIRM_WHITE],
+            offset=self._popup_offset, name='POPUP_BATCH')
+
     def handle_popup_confirm(self, name='', offset=None, interval=2):
         if offset is None:
             offset = self._popup_offset
+            # Most frames have no popup, check all popup buttons in one pass first
+            if self.appear_any(self.popup_batch) is None:
+                return False
         if self.appear(POPUP_CANCEL, offset=offset) \
                 and self.appear(POPUP_CONFIRM, offset=offset, interval=interval):
             POPUP_CONFIRM.name = POPUP_CONFIRM.name + '_' + name
@@ -110,6 +126,9 @@ class InfoHandler(ModuleBase):
     def handle_popup_cancel(self, name='', offset=None, interval=2):
         if offset is None:
             offset = self._popup_offset
+            # Most frames have no popup, check all popup buttons in one pass first
+            if self.appear_any(self.popup_batch) is None:
+                return False
         if self.appear(POPUP_CONFIRM, offset=offset) \
                 and self.appear(POPUP_CANCEL, offset=offset, interval=interval):
             POPUP_CANCEL.name = POPUP_CANCEL.name + '_' + name
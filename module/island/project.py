@@ -2,9 +2,9 @@ from datetime import datetime, timedelta
 import cv2
 import re
 import numpy as np
-from scipy import signal
 
 from module.base.button import Button, ButtonGrid
+from module.base.lazy_import import lazy_import
 from module.base.timer import Timer
 from module.base.utils import color_similarity_2d, crop, random_rectangle_vector, rgb2gray
 from module.config.deep import deep_get, deep_values
@@ -15,6 +15,8 @@ from module.logger import logger
 from module.map.map_grids import SelectedGrids
 from module.ocr.ocr import Duration, Ocr
 
+signal = lazy_import('scipy.signal')
+
 
 class ProjectNameOcr(Ocr):
     def after_process(self, result):
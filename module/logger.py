@@ -1,7 +1,10 @@
 import datetime
 import logging
 import os
+import queue
+import re
 import sys
+import time
 from typing import Callable, List
 
 from rich.console import Console, ConsoleOptions, ConsoleRenderable, NewLine
@@ -30,63 +33,193 @@ RichHandler.KEYWORDS = []
 
 
 class RichFileHandler(RichHandler):
-    # Rename
-    pass
-
-
-class RichRenderableHandler(RichHandler):
     """
-    Pass renderable into a function
+    Write logs into file, and index byte offsets of sections in a sidecar file, see section_index_file().
+    Sections are started by `logger.hr(title, level=0)`, which is called at the start of each task,
+    so the last task can be read without scanning the whole log, see read_last_section().
     """
 
-    def __init__(self, *args, func: Callable[[ConsoleRenderable], None] = None, **kwargs):
+    def __init__(self, *args, index_file=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.index_file = index_file
+        # Byte offset of the last section in log file
+        self.last_section = None
+
+    def mark_section(self, title):
+        """
+        Args:
+            title (str):
+        """
+        file = self.console.file
+        try:
+            file.flush()
+            offset = file.tell()
+        except (OSError, ValueError):
+            return
+        self.last_section = offset
+        if self.index_file:
+            try:
+                with open(self.index_file, 'a', encoding='utf-8') as f:
+                    f.write(f'{offset}\t{title}\n')
+            except OSError:
+                pass
+
+
+# Kinds of records sent by LogRecordHandler
+# (kind, created, levelname, message, extra)
+RECORD_LOG = 'log'
+RECORD_RULE = 'rule'
+RECORD_RENDERABLE = 'renderable'
+RECORD_DROPPED = 'dropped'
+
+
+class LogRecordHandler(logging.Handler):
+    """
+    Pass lightweight log records into a function, usually `put_nowait` of a multiprocessing queue.
+
+    Records are plain tuples of (kind, created, levelname, message, extra), which are cheap to send,
+    and rendered into Rich renderables by the receiver with LogRecordRender, only when they are displayed.
+    If the function raises queue.Full, the record is dropped and counted,
+    a RECORD_DROPPED record is sent once the receiver catches up.
+    """
+
+    def __init__(self, func: Callable[[tuple], None] = None, console: Console = None, level=logging.NOTSET,
+                 tracebacks_show_locals=True):
+        super().__init__(level=level)
         self._func = func
+        # Only used to collect renderables in print()
+        self.console = console
+        self.tracebacks_show_locals = tracebacks_show_locals
+        # Records dropped since the last RECORD_DROPPED
+        self.dropped = 0
+        self.dropped_total = 0
+
+    def send(self, kind, created, levelname, message, extra=None):
+        if self.dropped:
+            try:
+                self._func((RECORD_DROPPED, created, 'WARNING', '', self.dropped))
+                self.dropped = 0
+            except queue.Full:
+                self.dropped += 1
+                self.dropped_total += 1
+                return
+        try:
+            self._func((kind, created, levelname, message, extra))
+        except queue.Full:
+            self.dropped += 1
+            self.dropped_total += 1
 
     def emit(self, record: logging.LogRecord) -> None:
-        message = self.format(record)
-        traceback = None
-        if (
-                self.rich_tracebacks
-                and record.exc_info
-                and record.exc_info != (None, None, None)
-        ):
+        extra = None
+        if getattr(record, 'markup', False):
+            extra = {'markup': True}
+        if record.exc_info and record.exc_info != (None, None, None):
             exc_type, exc_value, exc_traceback = record.exc_info
-            assert exc_type is not None
-            assert exc_value is not None
-            traceback = Traceback.from_exception(
+            # Trace is pure data, unlike traceback objects
+            trace = Traceback.extract(
                 exc_type,
                 exc_value,
                 exc_traceback,
-                width=self.tracebacks_width,
-                extra_lines=self.tracebacks_extra_lines,
-                theme=self.tracebacks_theme,
-                word_wrap=self.tracebacks_word_wrap,
                 show_locals=self.tracebacks_show_locals,
-                locals_max_length=self.locals_max_length,
-                locals_max_string=self.locals_max_string,
             )
-            message = record.getMessage()
-            if self.formatter:
-                record.message = record.getMessage()
-                formatter = self.formatter
-                if hasattr(formatter, "usesTime") and formatter.usesTime():
-                    record.asctime = formatter.formatTime(
-                        record, formatter.datefmt)
-                message = formatter.formatMessage(record)
-
-        message_renderable = self.render_message(record, message)
-        log_renderable = self.render(
-            record=record, traceback=traceback, message_renderable=message_renderable
-        )
-
-        # Directly put renderable into function
-        self._func(log_renderable)
+            extra = extra or {}
+            extra['trace'] = trace
+        try:
+            self.send(RECORD_LOG, record.created, record.levelname, record.getMessage(), extra)
+        except Exception:
+            self.handleError(record)
+
+    def emit_renderable(self, renderable: ConsoleRenderable) -> None:
+        if isinstance(renderable, Rule):
+            extra = {
+                'characters': renderable.characters,
+                'style': renderable.style,
+                'end': renderable.end,
+                'align': renderable.align,
+            }
+            self.send(RECORD_RULE, time.time(), '', str(renderable.title), extra)
+        else:
+            self.send(RECORD_RENDERABLE, time.time(), '', '', renderable)
 
     def handle(self, record: logging.LogRecord) -> bool:
         if not self._func:
             return True
-        super().handle(record)
+        return super().handle(record)
+
+
+class LogRecordRender(RichHandler):
+    """
+    Render records from LogRecordHandler into Rich renderables,
+    in the same layout as RichHandler renders log records.
+    """
+
+    def __call__(self, record) -> ConsoleRenderable:
+        """
+        Args:
+            record (tuple, str): Record from LogRecordHandler, or plain text.
+
+        Returns:
+            ConsoleRenderable:
+        """
+        if isinstance(record, str):
+            return record
+        kind, created, levelname, message, extra = record
+        if kind == RECORD_RULE:
+            return Rule(title=message, **extra)
+        if kind == RECORD_RENDERABLE:
+            return extra
+        if kind == RECORD_DROPPED:
+            message = f'{extra} log records dropped, web UI is too busy to receive them'
+            extra = None
+
+        log = logging.makeLogRecord({
+            'created': created,
+            'msecs': (created - int(created)) * 1000,
+            'levelname': levelname,
+            'msg': message,
+        })
+        traceback = None
+        if extra:
+            if extra.get('markup'):
+                log.markup = True
+            trace = extra.get('trace')
+            if trace is not None:
+                traceback = Traceback(
+                    trace=trace,
+                    width=self.tracebacks_width,
+                    extra_lines=self.tracebacks_extra_lines,
+                    theme=self.tracebacks_theme,
+                    word_wrap=self.tracebacks_word_wrap,
+                    show_locals=self.tracebacks_show_locals,
+                    locals_max_length=self.locals_max_length,
+                    locals_max_string=self.locals_max_string,
+                )
+        message = self.format(log)
+        message_renderable = self.render_message(log, message)
+        return self.render(record=log, traceback=traceback, message_renderable=message_renderable)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Never attached to a logger
+        pass
+
+
+def log_record_text(record) -> str:
+    """
+    Args:
+        record (tuple, str): Record from LogRecordHandler, or plain text.
+
+    Returns:
+        str: Plain text of the record, without rendering.
+    """
+    if isinstance(record, str):
+        return record
+    kind, created, levelname, message, extra = record
+    if kind == RECORD_RENDERABLE:
+        console = Console(no_color=True)
+        with console.capture() as capture:
+            console.print(extra)
+        return capture.get()
+    return message
 
 
 class HTMLConsole(Console):
@@ -206,6 +339,7 @@ def set_file_logger(name=pyw_name):
     )
 
     hdlr = RichFileHandler(
+        index_file=section_index_file(log_file),
         console=file_console,
         show_path=False,
         show_time=False,
@@ -223,8 +357,87 @@ def set_file_logger(name=pyw_name):
     logger.log_file = log_file
 
 
-def set_func_logger(func):
-    console = HTMLConsole(
+def section_index_file(log_file):
+    """
+    Args:
+        log_file (str): Such as './log/2020-01-01_alas.txt'
+
+    Returns:
+        str: Such as './log/2020-01-01_alas.idx'
+    """
+    return os.path.splitext(log_file)[0] + '.idx'
+
+
+def mark_section(title):
+    for hdlr in logger.handlers:
+        if isinstance(hdlr, RichFileHandler):
+            hdlr.mark_section(title)
+
+
+def _last_section_offset(log_file):
+    """
+    Args:
+        log_file (str):
+
+    Returns:
+        int: Byte offset of the last section, from the file handler or the sidecar index. None if not indexed.
+    """
+    if log_file == getattr(logger, 'log_file', None):
+        for hdlr in logger.handlers:
+            if isinstance(hdlr, RichFileHandler) and hdlr.last_section is not None:
+                return hdlr.last_section
+    try:
+        with open(section_index_file(log_file), 'rb') as f:
+            # Index file is small, but only the last line is needed
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 4096, 0))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        offset = line.split(b'\t', 1)[0]
+        if offset.isdigit():
+            return int(offset)
+    return None
+
+
+def read_last_section(log_file):
+    """
+    Iter lines of the last section in log file, which is usually the last task.
+    Seek to the indexed offset if possible, or scan the whole file as fallback.
+
+    Args:
+        log_file (str):
+
+    Yields:
+        str: Lines with line breaks.
+    """
+    offset = _last_section_offset(log_file)
+    with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+        if offset is not None:
+            f.seek(0, os.SEEK_END)
+            if offset < f.tell():
+                f.seek(offset)
+                first = f.readline()
+                # Section starts with a rule of `═`
+                if first.strip(' \r\t\n').startswith('═'):
+                    yield first
+                    yield from f
+                    return
+            f.seek(0)
+
+        # Not indexed, logs written before the index or by other handlers.
+        # Keep lines after the last `═` rule and 2 lines before it, like the title of hr level 0
+        lines = []
+        for line in f:
+            lines.append(line)
+            if re.match('^═{15,}$', line.strip(' \r\t\n')):
+                lines = lines[-3:]
+        yield from lines
+
+
+def web_console():
+    return HTMLConsole(
         force_terminal=False,
         force_interactive=False,
         width=80,
@@ -234,9 +447,31 @@ def set_func_logger(func):
         highlighter=Highlighter(),
         theme=WEB_THEME
     )
-    hdlr = RichRenderableHandler(
+
+
+def set_func_logger(func):
+    """
+    Args:
+        func (callable): Function to receive records from LogRecordHandler,
+            render them with web_log_render().
+    """
+    hdlr = LogRecordHandler(
         func=func,
-        console=console,
+        console=web_console(),
+        tracebacks_show_locals=True,
+    )
+    logger.handlers = [h for h in logger.handlers if not isinstance(
+        h, LogRecordHandler)]
+    logger.addHandler(hdlr)
+
+
+def web_log_render():
+    """
+    Returns:
+        LogRecordRender: Renderer of records sent by set_func_logger()
+    """
+    hdlr = LogRecordRender(
+        console=web_console(),
         show_path=False,
         show_time=False,
         show_level=True,
@@ -246,9 +481,7 @@ def set_func_logger(func):
         highlighter=Highlighter(),
     )
     hdlr.setFormatter(web_formatter)
-    logger.handlers = [h for h in logger.handlers if not isinstance(
-        h, RichRenderableHandler)]
-    logger.addHandler(hdlr)
+    return hdlr
 
 
 def _get_renderables(
@@ -278,9 +511,11 @@ def _get_renderables(
 
 def print(*objects: ConsoleRenderable, **kwargs):
     for hdlr in logger.handlers:
-        if isinstance(hdlr, RichRenderableHandler):
+        if isinstance(hdlr, LogRecordHandler):
+            if not hdlr._func:
+                continue
             for renderable in _get_renderables(hdlr.console, *objects, **kwargs):
-                hdlr._func(renderable)
+                hdlr.emit_renderable(renderable)
         elif isinstance(hdlr, RichHandler):
             hdlr.console.print(*objects)
 
@@ -302,6 +537,7 @@ def hr(title, level=3):
     if level == 3:
         logger.info(f"[bold]<<< {title} >>>[/bold]", extra={"markup": True})
     if level == 0:
+        mark_section(title)
         logger.rule(characters='═')
         logger.rule(title, characters=' ')
         logger.rule(characters='═')
@@ -356,5 +592,8 @@ logger.rule = rule
 logger.print = print
 logger.log_file: str
 
-logger.set_file_logger()
+# Processes started with `python -c`, such as the multiprocessing forkserver, have no script name,
+# they set their own file logger.
+if pyw_name != '-c':
+    logger.set_file_logger()
 logger.hr('Start', level=0)
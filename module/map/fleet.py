@@ -680,11 +680,8 @@ class Fleet(Camera, AmbushHandler):
                     wall=False,
                     portal=self.config.MAP_HAS_PORTAL,
                 )
-            for grid in diff:
-                self.map.find_path_initial(grid, has_ambush=False)
-                accessible = accessible.add(self.map.select(cost=0)).add(self.map.select(cost=1))
-                if siren:
-                    accessible = accessible.add(self.map.select(cost=2))
+            accessible = accessible.add(self.map.grids_within_cost(
+                diff.location, cost=2 if siren else 1, has_ambush=False))
             # Revert path findings
             if self.config.MAP_HAS_WALL:
                 self.map.grid_connection_initial(
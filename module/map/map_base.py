@@ -1,4 +1,5 @@
 import copy
+import heapq
 
 from module.base.utils import location2node, node2location
 from module.logger import logger
@@ -35,6 +36,10 @@ class CampaignMap:
         self.poor_map_data = False
         self.camera_sight = (-3, -1, 3, 2)
         self.grid_connection = {}
+        # Path finding graph, built from grid_connection
+        self.path_locations = []
+        self._path_index = {}
+        self._path_adjacency = []
 
     def __iter__(self):
         return iter(self.grids.values())
@@ -300,8 +305,21 @@ class CampaignMap:
                 self[start].is_portal = False
                 self[start].portal_link = None
 
+        self._path_graph_initial()
         return True
 
+    def _path_graph_initial(self):
+        """
+        Convert grid_connection into indexed adjacency lists, so path finding runs on list indexes.
+        Call this after grid_connection changed.
+        """
+        self.path_locations = list(self.grids.keys())
+        self._path_index = {loca: index for index, loca in enumerate(self.path_locations)}
+        self._path_adjacency = [
+            tuple(self._path_index[link] for link in self.grid_connection.get(loca, ()) if link in self._path_index)
+            for loca in self.path_locations
+        ]
+
     def fixup_submarine_fleet(self):
         # fixup submarine spawn point
         # If a grid is_submarine, the lower grid may detected as is_fleet, because they have the same ammo icon
@@ -531,6 +549,82 @@ class CampaignMap:
                  range(self.shape[0] + 1)])
             logger.info(text)
 
+    def _path_weights(self, has_ambush=True, has_enemy=True):
+        """
+        Args:
+            has_ambush (bool): MAP_HAS_AMBUSH
+            has_enemy (bool): False if only sea and land are considered
+
+        Returns:
+            tuple[list[int], list[bool]]:
+                Cost to enter each grid, 0 if grid is not accessible.
+                If fleet can go through each grid.
+        """
+        if len(self._path_adjacency) != len(self.grids):
+            self._path_graph_initial()
+        ambush_cost = 10 if has_ambush else 1
+        enter = []
+        through = []
+        for loca in self.path_locations:
+            grid = self.grids[loca]
+            if grid.is_land or grid.is_mechanism_block:
+                enter.append(0)
+            else:
+                enter.append(ambush_cost if grid.may_ambush else 1)
+            through.append(grid.is_sea or not has_enemy)
+        return enter, through
+
+    def _dijkstra(self, source, weights):
+        """
+        Args:
+            source (int): Index of start grid.
+            weights (tuple): Output of _path_weights()
+
+        Returns:
+            tuple[list[int], list[int]]:
+                Cost to each grid, 9999 if not accessible.
+                Index of the previous grid on the route, -1 if None.
+        """
+        enter, through = weights
+        locations = self.path_locations
+        adjacency = self._path_adjacency
+        cost = [9999] * len(locations)
+        connection = [-1] * len(locations)
+        visited = [False] * len(locations)
+        cost[source] = 0
+        queue = [(0, source)]
+        while queue:
+            current, index = heapq.heappop(queue)
+            if visited[index]:
+                continue
+            visited[index] = True
+            # Fleets can walk to enemies but can't walk through them
+            if index != source and not through[index]:
+                continue
+            x = locations[index][0]
+            for link in adjacency[index]:
+                step = enter[link]
+                if not step:
+                    continue
+                new = current + step
+                if new < cost[link]:
+                    cost[link] = new
+                    connection[link] = index
+                    heapq.heappush(queue, (new, link))
+                elif new == cost[link]:
+                    # Prefer to arrive horizontally, same as the previous implementation
+                    if abs(locations[link][0] - x) == 1:
+                        connection[link] = index
+
+        return cost, connection
+
+    def _path_apply(self, cost, connection):
+        locations = self.path_locations
+        for loca, c, prev in zip(locations, cost, connection):
+            grid = self.grids[loca]
+            grid.cost = c
+            grid.connection = locations[prev] if prev >= 0 else None
+
     def find_path_initial(self, location, has_ambush=True, has_enemy=True):
         """
         Args:
@@ -539,36 +633,9 @@ class CampaignMap:
             has_enemy (bool): False if only sea and land are considered
         """
         location = location_ensure(location)
-        ambush_cost = 10 if has_ambush else 1
-        for grid in self:
-            grid.cost = 9999
-            grid.connection = None
-        start = self[location]
-        start.cost = 0
-        visited = [start]
-        visited = set(visited)
-
-        while 1:
-            new = visited.copy()
-            for grid in visited:
-                for arr in self.grid_connection[grid.location]:
-                    arr = self[arr]
-                    if arr.is_land or arr.is_mechanism_block:
-                        continue
-                    cost = ambush_cost if arr.may_ambush else 1
-                    cost += grid.cost
-
-                    if cost < arr.cost:
-                        arr.cost = cost
-                        arr.connection = grid.location
-                    elif cost == arr.cost:
-                        if abs(arr.location[0] - grid.location[0]) == 1:
-                            arr.connection = grid.location
-                    if arr.is_sea or not has_enemy:
-                        new.add(arr)
-            if len(new) == len(visited):
-                break
-            visited = new
+        weights = self._path_weights(has_ambush=has_ambush, has_enemy=has_enemy)
+        cost, connection = self._dijkstra(self._path_index[location], weights)
+        self._path_apply(cost, connection)
 
         # self.show_cost()
         # self.show_connection()
@@ -581,14 +648,49 @@ class CampaignMap:
             has_ambush (bool): MAP_HAS_AMBUSH
         """
         location_dict = sorted(location_dict.items(), key=lambda kv: (int(kv[1] == current),))
+        weights = self._path_weights(has_ambush=has_ambush)
         for fleet, location in location_dict:
             if location == ():
                 continue
-            self.find_path_initial(location, has_ambush=has_ambush)
+            cost, connection = self._dijkstra(self._path_index[location_ensure(location)], weights)
+            self._path_apply(cost, connection)
             attr = f'cost_{fleet}'
             for grid in self:
                 grid.__setattr__(attr, grid.cost)
 
+    def multi_source_cost(self, locations, has_ambush=True, has_enemy=True):
+        """
+        Path finding from multiple grids at once, without modifying grid.cost and grid.connection.
+
+        Args:
+            locations (list[tuple]): Start locations.
+            has_ambush (bool): MAP_HAS_AMBUSH
+            has_enemy (bool): False if only sea and land are considered
+
+        Returns:
+            np.ndarray: Shape (len(locations), len(path_locations)),
+                cost from each start location to each grid in `path_locations`.
+        """
+        weights = self._path_weights(has_ambush=has_ambush, has_enemy=has_enemy)
+        cost = [self._dijkstra(self._path_index[location_ensure(loca)], weights)[0] for loca in locations]
+        return np.array(cost, dtype=int).reshape((len(locations), len(self.path_locations)))
+
+    def grids_within_cost(self, locations, cost, has_ambush=True, has_enemy=True):
+        """
+        Args:
+            locations (list[tuple]): Start locations.
+            cost (int): Maximum cost.
+            has_ambush (bool): MAP_HAS_AMBUSH
+            has_enemy (bool): False if only sea and land are considered
+
+        Returns:
+            SelectedGrids: Grids that can be reached from any of the start locations within cost.
+        """
+        if not len(locations):
+            return SelectedGrids([])
+        nearest = np.min(self.multi_source_cost(locations, has_ambush=has_ambush, has_enemy=has_enemy), axis=0)
+        return SelectedGrids([self.grids[self.path_locations[index]] for index in np.where(nearest <= cost)[0]])
+
     def _find_path(self, location):
         """
         Args:
@@ -804,12 +906,12 @@ class CampaignMap:
             SelectedGrids:
         """
         result = []
+        items = list(kwargs.items())
         for grid in self:
-            flag = True
-            for k, v in kwargs.items():
+            for k, v in items:
                 if grid.__getattribute__(k) != v:
-                    flag = False
-            if flag:
+                    break
+            else:
                 result.append(grid)
 
         return SelectedGrids(result)
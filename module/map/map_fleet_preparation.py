@@ -1,9 +1,9 @@
 import numpy as np
-from scipy import signal
 
 # 此文件处理进入关卡前的编队准备（Fleet Preparation）逻辑。
 # 包含编队的选择与重置、潜艇部署设置以及满足困难地图条件限制的检查、请求人工接管等操作。
 from module.base.button import Button
+from module.base.lazy_import import lazy_import
 from module.base.timer import Timer
 from module.base.utils import *
 from module.exception import RequestHumanTakeover
@@ -14,6 +14,8 @@ from module.handler.info_handler import InfoHandler
 from module.logger import logger
 from module.map.assets import *
 
+signal = lazy_import('scipy.signal')
+
 
 class FleetOperator:
     FLEET_BAR_SHAPE_Y = 33
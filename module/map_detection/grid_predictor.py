@@ -1,3 +1,4 @@
+from module.base.decorator import cached_property, del_cached_property
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.exception import ScriptError
@@ -37,10 +38,57 @@ class GridPredictor:
                 self.template_enemy_genre[f'Siren_{name}'] = globals().get(f'TEMPLATE_SIREN_{name}')
 
         self.area = corner2area(self.corner)
-        self.homo_data = cv2.getPerspectiveTransform(
+        # Rectified sea plane shared with other grids in View, and the upper-left of this grid on it
+        self.plane = None
+        self.plane_origin = None
+        # Key: (area, shape), value: image from relative_crop()
+        self._relative_crop_cache = {}
+
+    @cached_property
+    def homo_data(self):
+        return cv2.getPerspectiveTransform(
             src=self.corner.astype(np.float32),
             dst=area2corner((0, 0, *self.config.HOMO_TILE)).astype(np.float32))
-        self.homo_invt = cv2.invert(self.homo_data)[1]
+
+    @cached_property
+    def homo_invt(self):
+        return cv2.invert(self.homo_data)[1]
+
+    def set_plane(self, plane, origin):
+        """
+        Bind the rectified sea plane of View, so homography and tile images come from it.
+
+        Args:
+            plane (ViewPlane):
+            origin (np.ndarray): Upper-left of this grid on the sea plane.
+        """
+        plane_origin = plane.grid_origin(origin)
+        if plane_origin is None:
+            self.plane = None
+            self.plane_origin = None
+            return
+        self.plane = plane
+        self.plane_origin = plane_origin
+        # Grid homography is the plane homography translated to grid origin
+        x, y = plane_origin
+        translate = np.array([[1, 0, -x], [0, 1, -y], [0, 0, 1]], dtype=np.float64)
+        self.__dict__['homo_data'] = translate.dot(plane.homo_data)
+        self.__dict__['homo_invt'] = np.linalg.inv(self.__dict__['homo_data'])
+
+    def set_image(self, image, plane=None):
+        """
+        Update image and drop everything derived from the previous one.
+
+        Args:
+            image (np.ndarray):
+            plane (ViewPlane): New plane of View, with the same homography.
+        """
+        self.image = image
+        if plane is not None and self.plane is not None:
+            self.plane = plane
+        self._relative_crop_cache = {}
+        del_cached_property(self, 'image_trans')
+        del_cached_property(self, 'image_homo')
 
     def screen2grid(self, points):
         """
@@ -70,10 +118,13 @@ class GridPredictor:
 
     @cached_property
     def image_trans(self):
+        if self.plane is not None and self.plane.request():
+            return self.plane.crop(self.plane.image_trans, self.plane_origin)
         return cv2.warpPerspective(self.image, self.homo_data, self.config.HOMO_TILE)
 
     @cached_property
     def image_homo(self):
+        # Edges are always detected on the tile, edges on the entire plane differ near tile borders
         image_edge = rgb2gray(self.image_trans)
         cv2.Canny(image_edge, 100, 150, dst=image_edge)
         kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
@@ -119,12 +170,21 @@ class GridPredictor:
 
         Returns:
             np.ndarray: Shape (height, width, channel).
+                Rescaled images are cached until image changes, don't modify them in place.
         """
-        area = self._image_center + np.array(area) * self._image_a
-        image = crop(self.image, area=np.rint(area).astype(int), copy=False)
+        if shape is not None:
+            key = (tuple(area), tuple(shape))
+            try:
+                return self._relative_crop_cache[key]
+            except KeyError:
+                pass
+
+        crop_area = self._image_center + np.array(area) * self._image_a
+        image = crop(self.image, area=np.rint(crop_area).astype(int), copy=False)
         if shape is not None:
             # Follow the default re-sampling filter in pillow, which is BICUBIC.
             image = cv2.resize(image, shape, interpolation=cv2.INTER_CUBIC)
+            self._relative_crop_cache[key] = image
         return image
 
     def relative_rgb_count(self, area, color, shape=(50, 50), threshold=221):
@@ -155,8 +215,7 @@ class GridPredictor:
         Returns:
             int: Number of matched pixels.
         """
-        image = self.relative_crop(area, shape=shape)
-        cv2.cvtColor(image, cv2.COLOR_RGB2HSV, dst=image)
+        image = cv2.cvtColor(self.relative_crop(area, shape=shape), cv2.COLOR_RGB2HSV)
         lower = (h[0] / 2, s[0] * 2.55, v[0] * 2.55)
         upper = (h[1] / 2 + 1, s[1] * 2.55 + 1, v[1] * 2.55 + 1)
         # Don't set `dst`, output image is (50, 50) but `image` is (50, 50, 3)
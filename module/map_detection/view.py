@@ -9,6 +9,7 @@ from module.map_detection.detector import MapDetector
 from module.map_detection.grid import Grid
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
+from module.map_detection.view_plane import ViewPlane
 
 
 class View(MapDetector):
@@ -49,6 +50,27 @@ class View(MapDetector):
         else:
             return cv2.copyTo(image, ASSETS.ui_mask_in_map)
 
+    @property
+    def _homo_screen(self):
+        """
+        Returns:
+            np.ndarray: Homography from screen to sea plane, while homo_data is from DETECTING_AREA.
+        """
+        x, y = self.config.DETECTING_AREA[:2]
+        translate = np.array([[1, 0, -x], [0, 1, -y], [0, 0, 1]], dtype=np.float64)
+        return self.homo_data.dot(translate)
+
+    def _create_plane(self, image):
+        """
+        Args:
+            image (np.ndarray): Screenshot with UI cleared.
+
+        Returns:
+            ViewPlane: Sea plane rectified once, all grids take tile images from it.
+        """
+        return ViewPlane(image, homo_data=self._homo_screen, homo_size=self.homo_size,
+                         homo_loca=self.homo_loca, tile=self.config.HOMO_TILE)
+
     def load(self, image):
         """
         Args:
@@ -61,9 +83,13 @@ class View(MapDetector):
         # Create local view map
         grids = {}
 
+        self.plane = self._create_plane(image)
         for loca, points in self.generate():
             if area_in_area(area1=corner2area(points), area2=self.config.DETECTING_AREA):
-                grids[loca] = self.grid_class(location=loca, image=image, corner=points, config=self.config)
+                grid = self.grid_class(location=loca, image=image, corner=points, config=self.config)
+                origin = perspective_transform(points[:1], data=self._homo_screen)[0]
+                grid.set_plane(self.plane, origin=origin)
+                grids[loca] = grid
 
         # Handle grids offset
         offset = list(grids.keys())
@@ -113,9 +139,10 @@ class View(MapDetector):
         """
         image = self._image_clear_ui(image)
         self.image = image
+        self.plane = self._create_plane(image)
         for grid in self:
             grid.reset()
-            grid.image = image
+            grid.set_image(image, plane=self.plane)
 
     def select(self, **kwargs):
         """
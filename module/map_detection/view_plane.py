@@ -0,0 +1,80 @@
+from module.base.decorator import cached_property
+from module.base.utils import *
+
+
+class ViewPlane:
+    """
+    The sea plane of a View, rectified once and shared by all grids.
+
+    Grids used to warp their own tile with their own homography, which is the same homography
+    of the View translated by the grid origin on the sea plane.
+    Grid origins are homo_loca plus multiples of HOMO_TILE, so they all share the same fractional part.
+    Rectifying the plane once with that fractional part compensated makes every grid tile
+    an integer slice, pixel-identical to warping the tile alone.
+
+    Only the rectified image is shared. Edge detection reflects at image borders,
+    so grids still detect edges on their own tiles to keep corner matching on tile borders unchanged.
+    """
+
+    # Extra pixels around the rectified plane, for grids on the edges
+    MARGIN = 140
+    # Rectifying the entire plane costs about the same as warping 10 tiles one by one,
+    # so grids warp their own tiles until this many tiles were requested.
+    TILE_THRESHOLD = 8
+
+    def __init__(self, image, homo_data, homo_size, homo_loca, tile):
+        """
+        Args:
+            image (np.ndarray): Screenshot, with UI cleared.
+            homo_data (np.ndarray): Homography from screen to sea plane, shape (3, 3).
+            homo_size (tuple): Size of the sea plane, (width, height).
+            homo_loca (np.ndarray): Upper-left of a tile on the sea plane.
+            tile (tuple): Tile size, (width, height).
+        """
+        self.image = image
+        self.tile = tuple(tile)
+        self.fraction = np.mod(homo_loca, 1)
+        # Sea plane point (x, y) is at (x, y) + shift on the rectified plane
+        self.shift = self.MARGIN - self.fraction
+        self.size = (int(homo_size[0]) + 2 * self.MARGIN, int(homo_size[1]) + 2 * self.MARGIN)
+        translate = np.array([[1, 0, self.shift[0]], [0, 1, self.shift[1]], [0, 0, 1]], dtype=np.float64)
+        self.homo_data = translate.dot(homo_data)
+        self.requested = 0
+
+    def grid_origin(self, origin):
+        """
+        Args:
+            origin (np.ndarray): Upper-left of a grid on the sea plane.
+
+        Returns:
+            tuple[int]: Upper-left of the grid tile on rectified plane, or None if the grid is not aligned.
+        """
+        x, y = np.add(origin, self.shift)
+        rx, ry = int(round(x)), int(round(y))
+        if abs(x - rx) > 0.01 or abs(y - ry) > 0.01:
+            return None
+        return rx, ry
+
+    def request(self):
+        """
+        Returns:
+            bool: If grid should take its tile from the plane.
+        """
+        self.requested += 1
+        return self.requested > self.TILE_THRESHOLD
+
+    @cached_property
+    def image_trans(self):
+        return cv2.warpPerspective(self.image, self.homo_data, self.size)
+
+    def crop(self, image, origin):
+        """
+        Args:
+            image (np.ndarray): image_trans
+            origin (tuple[int]): From grid_origin()
+
+        Returns:
+            np.ndarray: Tile of the grid, a copy.
+        """
+        x, y = origin
+        return crop(image, (x, y, x + self.tile[0], y + self.tile[1]), copy=True)
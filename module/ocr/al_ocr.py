@@ -9,6 +9,7 @@ from module.logger import logger
 
 try:
     logger.info('Loading OCR dependencies')
+    import mxnet as mx
     from cnocr import CnOcr
     from cnocr.cn_ocr import (check_model_name, data_dir, gen_network, load_module,
                               read_charset)
@@ -37,6 +38,12 @@ class AlOcr(CnOcr):
     # 'cpu' or 'gpu'
     # To use predict in gpu, the gpu version of mxnet must be installed.
     CNOCR_CONTEXT = get_mxnet_context()
+    # Images are grouped into buckets by width, and padded to the next multiple of BUCKET_WIDTH.
+    # Each bucket shape has its own executor bound once and sharing parameters with the main module,
+    # so batches of different shapes don't rebind the main module again and again.
+    BUCKET_WIDTH = 32
+    # Batches are padded to the next batch size, the last one is the maximum images in one forward pass.
+    BUCKET_BATCH = (1, 2, 4, 8, 16, 32, 64, 128)
 
     def __init__(
             self,
@@ -49,6 +56,8 @@ class AlOcr(CnOcr):
     ):
         self._args = (model_name, model_epoch, cand_alphabet, root, context, name)
         self._model_loaded = False
+        # Key: data shape, value: mx.mod.Module
+        self._bucket_modules = {}
 
     def init(self,
              model_name='densenet-lite-gru',
@@ -91,6 +100,7 @@ class AlOcr(CnOcr):
         self._net_prefix = None if name == '' else name
 
         self._mod = self._get_module(AlOcr.CNOCR_CONTEXT)
+        self._bucket_modules = {}
 
     def ocr(self, img_fp):
         if not self._model_loaded:
@@ -111,7 +121,7 @@ class AlOcr(CnOcr):
             self.init(*self._args)
             self._model_loaded = True
 
-        return super().ocr_for_single_lines(img_list)
+        return self._bucket_ocr_for_single_lines(img_list)
 
     def set_cand_alphabet(self, cand_alphabet):
         if not self._model_loaded:
@@ -150,7 +160,7 @@ class AlOcr(CnOcr):
 
         super().set_cand_alphabet(cand_alphabet)
 
-        return super().ocr_for_single_lines(img_list)
+        return self._bucket_ocr_for_single_lines(img_list)
 
     def _assert_and_prepare_model_files(self):
         model_dir = self._model_dir
@@ -232,6 +242,107 @@ class AlOcr(CnOcr):
 
         return res
 
+    def _bucket_module(self, shape):
+        """
+        Args:
+            shape (tuple): Data shape, (batch, channel, height, width)
+
+        Returns:
+            mx.mod.Module: Module bound to the given shape, sharing parameters with self._mod
+        """
+        try:
+            return self._bucket_modules[shape]
+        except KeyError:
+            pass
+
+        main = self._mod
+        mod = mx.mod.Module(main.symbol, data_names=main.data_names, label_names=None, context=main._context)
+        mod.bind(data_shapes=[(main.data_names[0], shape)], for_training=False, shared_module=main)
+        self._bucket_modules[shape] = mod
+        return mod
+
+    def _bucket_predict(self, data):
+        """
+        Args:
+            data (np.ndarray): Shape (batch, channel, height, width)
+
+        Returns:
+            np.ndarray: Probability, shape (seq_len * batch, num_classes)
+        """
+        sample = mx.io.DataBatch(data=[mx.nd.array(data)])
+        # Let cnocr handle the candidate alphabet on the bucket executor
+        main = self._mod
+        self._mod = self._bucket_module(data.shape)
+        try:
+            return self._predict(sample)
+        finally:
+            self._mod = main
+
+    def _bucket_ocr_for_single_lines(self, img_list):
+        """
+        Same as CnOcr.ocr_for_single_lines(), but images are predicted in width buckets.
+
+        Args:
+            img_list (list[np.ndarray]):
+
+        Returns:
+            list[list[str]]:
+        """
+        if len(img_list) == 0:
+            return []
+        img_list = [self._preprocess_img_array(img) for img in img_list]
+        widths = np.array([img.shape[2] for img in img_list])
+        bucket_widths = -(-widths // self.BUCKET_WIDTH) * self.BUCKET_WIDTH
+        max_batch = self.BUCKET_BATCH[-1]
+
+        result = [None] * len(img_list)
+        for bucket_width in np.unique(bucket_widths):
+            index = np.where(bucket_widths == bucket_width)[0]
+            for start in range(0, len(index), max_batch):
+                chunk = index[start:start + max_batch]
+                batch = [b for b in self.BUCKET_BATCH if b >= len(chunk)][0]
+                data = np.zeros((batch, 1, self._hp.img_height, bucket_width), dtype=np.float32)
+                for row, i in enumerate(chunk):
+                    data[row, :, :, :widths[i]] = img_list[i]
+
+                prob = self._bucket_predict(data)
+                # [seq_len, batch, num_classes]
+                prob = np.reshape(prob, (-1, batch, prob.shape[1]))[:, :len(chunk), :]
+                for i, chars in zip(chunk, self._gen_lines_pred_chars(prob, widths[chunk], bucket_width)):
+                    result[i] = chars
+
+        return result
+
+    def _gen_lines_pred_chars(self, lines_prob, img_widths, max_img_width):
+        """
+        Vectorized _gen_line_pred_chars() on a batch.
+
+        Args:
+            lines_prob (np.ndarray): Shape (seq_len, batch, num_classes)
+            img_widths (np.ndarray): Shape (batch,)
+            max_img_width (int):
+
+        Returns:
+            list[list[str]]:
+        """
+        class_ids = np.argmax(lines_prob, axis=-1)
+        # Delete low confidence result
+        class_ids *= np.max(lines_prob, axis=-1) > 0.5
+
+        seq_len = class_ids.shape[0]
+        end_idx = np.where(img_widths < max_img_width, img_widths // self._hp.seq_len_cmpr_ratio, seq_len)
+        class_ids[np.arange(seq_len)[:, None] >= end_idx[None, :]] = 0
+
+        # CTC collapse, drop blanks and repeats
+        class_ids = class_ids.T
+        previous = np.zeros_like(class_ids)
+        previous[:, 1:] = class_ids[:, :-1]
+        keep = (class_ids != 0) & (class_ids != previous)
+
+        alphabet = self._alphabet
+        return [[alphabet[p] if alphabet[p] != '<space>' else ' ' for p in ids[k]]
+                for ids, k in zip(class_ids, keep)]
+
     def debug(self, img_list):
         """
         Args:
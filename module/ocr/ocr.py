@@ -1,10 +1,14 @@
+import hashlib
 import time
+from collections import OrderedDict
 from datetime import timedelta
 from typing import TYPE_CHECKING
 
 import module.config.server as server
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.frame_cache import FRAME_CACHE
+from module.base.metrics import METRICS
 from module.base.utils import *
 from module.logger import logger
 from module.ocr.rpc import ModelProxyFactory
@@ -19,9 +23,86 @@ else:
     OCR_MODEL = ModelProxyFactory()
 
 
+class OcrCache:
+    """
+    LRU cache of OCR results, keyed by (lang, alphabet, hash of the preprocessed image).
+    Static texts like oil, coins and counters are OCR'd again and again while the value doesn't change,
+    a cache hit skips the model entirely.
+
+    Preprocessed images are hashed exactly instead of perceptual hashing,
+    since digits like 14 and 15 are close in perceptual hash.
+    Letter extraction in pre_process() already removes background noise.
+    """
+
+    def __init__(self, size=512):
+        """
+        Args:
+            size (int): Maximum results to keep, 0 to disable cache.
+        """
+        self.size = size
+        self.cache = OrderedDict()
+        self.hit = 0
+        self.miss = 0
+
+    @staticmethod
+    def image_hash(image):
+        """
+        Args:
+            image (np.ndarray):
+
+        Returns:
+            str:
+        """
+        image = np.ascontiguousarray(image)
+        h = hashlib.blake2b(image.tobytes(), digest_size=16)
+        h.update(str(image.shape).encode())
+        return h.hexdigest()
+
+    def ocr(self, cnocr, lang, image_list, alphabet):
+        """
+        Args:
+            cnocr (AlOcr): OCR model
+            lang (str):
+            image_list (list[np.ndarray]): Preprocessed images.
+            alphabet (str):
+
+        Returns:
+            list[list[str]]:
+        """
+        if not self.size:
+            return cnocr.atomic_ocr_for_single_lines(image_list, alphabet)
+
+        keys = [(lang, alphabet, self.image_hash(image)) for image in image_list]
+        result_list = [None] * len(image_list)
+        missing = []
+        for index, key in enumerate(keys):
+            try:
+                result_list[index] = self.cache[key]
+                self.cache.move_to_end(key)
+                self.hit += 1
+            except KeyError:
+                missing.append(index)
+                self.miss += 1
+
+        if missing:
+            results = cnocr.atomic_ocr_for_single_lines([image_list[index] for index in missing], alphabet)
+            for index, result in zip(missing, results):
+                result_list[index] = result
+                self.cache[keys[index]] = result
+            while len(self.cache) > self.size:
+                self.cache.popitem(last=False)
+
+        return result_list
+
+    def clear(self):
+        self.cache.clear()
+
+
 class Ocr:
     SHOW_LOG = True
     SHOW_REVISE_WARNING = False
+    # Shared by all Ocr objects, set CACHE.size to change cache size
+    CACHE = OcrCache(size=512)
 
     def __init__(self, buttons, lang='azur_lane', letter=(255, 255, 255), threshold=128, alphabet=None, name=None):
         """
@@ -69,6 +150,17 @@ class Ocr:
 
         return image.astype(np.uint8)
 
+    def pre_process_area(self, image, area):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+            area (tuple): OCR area.
+
+        Returns:
+            np.ndarray: Shape (width, height)
+        """
+        return self.pre_process(crop(image, area))
+
     def after_process(self, result):
         """
         Args:
@@ -93,19 +185,26 @@ class Ocr:
         if direct_ocr:
             image_list = [self.pre_process(i) for i in image]
         else:
-            image_list = [self.pre_process(crop(image, area)) for area in self.buttons]
+            image_list = [self.pre_process_area(image, area) for area in self.buttons]
 
         # This will show the images feed to OCR model
         # self.cnocr.debug(image_list)
 
-        result_list = self.cnocr.atomic_ocr_for_single_lines(image_list, self.alphabet)
+        cache = self.CACHE
+        hit = cache.hit
+        result_list = cache.ocr(self.cnocr, self.lang, image_list, self.alphabet)
+        hit = cache.hit - hit
         result_list = [''.join(result) for result in result_list]
         result_list = [self.after_process(result) for result in result_list]
 
         if len(self.buttons) == 1:
             result_list = result_list[0]
+        cost = time.time() - start_time
+        # Hit if all images are served from cache
+        METRICS.record('ocr', self.name, cost, hit=hit == len(image_list))
         if self.SHOW_LOG:
-            logger.attr(name='%s %ss' % (self.name, float2str(time.time() - start_time)),
+            logger.attr(name='%s %ss cache %s/%s' % (self.name, float2str(cost),
+                                                      hit, len(image_list)),
                         text=str(result_list))
 
         return result_list
@@ -130,7 +229,28 @@ class OcrYuv(Ocr):
         Returns:
             np.ndarray: Shape (width, height)
         """
-        y = rgb2luma(image)
+        return self.pre_process_luma(rgb2luma(image))
+
+    def pre_process_area(self, image, area):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+            area (tuple): OCR area.
+
+        Returns:
+            np.ndarray: Shape (width, height)
+        """
+        # Luma is cached if image is the current screenshot
+        return self.pre_process_luma(FRAME_CACHE.derive(image, 'luma', area))
+
+    def pre_process_luma(self, y):
+        """
+        Args:
+            y (np.ndarray): Shape (height, width), the Y channel.
+
+        Returns:
+            np.ndarray: Shape (width, height)
+        """
         letter_y = (np.ones(y.shape) * self.letter_y).astype(np.uint8)
         diff = cv2.absdiff(y, letter_y)
         diff = cv2.multiply(diff, 255.0 / self.threshold)
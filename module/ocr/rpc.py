@@ -1,6 +1,10 @@
 import argparse
 import multiprocessing
-import pickle
+import socket
+import threading
+import time
+
+import numpy as np
 
 from module.logger import logger
 from module.webui.setting import State
@@ -8,29 +12,135 @@ from module.webui.setting import State
 process: multiprocessing.Process = None
 
 
+def encode_image(image):
+    """
+    Encode image into a raw buffer plus a shape header, instead of pickling the whole array.
+
+    Args:
+        image (np.ndarray):
+
+    Returns:
+        list: [shape, dtype, buffer]
+    """
+    image = np.ascontiguousarray(image)
+    return [list(image.shape), image.dtype.str, image.tobytes()]
+
+
+def decode_image(data):
+    """
+    Args:
+        data (list): [shape, dtype, buffer]
+
+    Returns:
+        np.ndarray:
+    """
+    shape, dtype, buffer = data
+    return np.frombuffer(buffer, dtype=np.dtype(dtype)).reshape(shape)
+
+
 class ModelProxy:
     client = None
+    address = "127.0.0.1:22268"
     online = True
+    # Reconnect with exponential backoff after the OCR server went offline.
+    # OCR runs with local models in the meantime.
+    # Server is probed in a background thread, OCR calls only check `online`.
+    RECONNECT_BACKOFF_MIN = 1
+    RECONNECT_BACKOFF_MAX = 60
+    RECONNECT_PROBE_TIMEOUT = 0.2
+    reconnect_backoff = RECONNECT_BACKOFF_MIN
+    _probe_thread: threading.Thread = None
 
     @classmethod
     def init(cls, address="127.0.0.1:22268"):
         import zerorpc
 
         logger.info(f"Connecting to OCR server {address}")
+        cls.address = address
         cls.client = zerorpc.Client(timeout=5)
         cls.client.connect(f"tcp://{address}")
         try:
             cls.client.hello()
+            cls.set_online()
             logger.info("Successfully connected to OCR server")
         except:
-            cls.online = False
             logger.warning("Ocr server not running")
+            cls.set_offline()
+
+    @classmethod
+    def set_online(cls):
+        cls.online = True
+        cls.reconnect_backoff = cls.RECONNECT_BACKOFF_MIN
+
+    @classmethod
+    def set_offline(cls):
+        """
+        Switch to local models, and start probing OCR server in background.
+        """
+        cls.online = False
+        cls.close()
+        if cls._probe_thread is None or not cls._probe_thread.is_alive():
+            cls.reconnect_backoff = cls.RECONNECT_BACKOFF_MIN
+            logger.warning(f"OCR server offline, using local models, retry in {cls.reconnect_backoff}s")
+            cls._probe_thread = threading.Thread(target=cls._probe, name='ocr_server_probe', daemon=True)
+            cls._probe_thread.start()
+
+    @classmethod
+    def _probe(cls):
+        """
+        Check if OCR server is listening, with exponential backoff.
+        Only a TCP connection is tried, so a dead server costs at most RECONNECT_PROBE_TIMEOUT here
+        and nothing on the OCR caller's thread.
+        """
+        host, port = cls.address.rsplit(":", 1)
+        while not cls.online:
+            time.sleep(cls.reconnect_backoff)
+            try:
+                with socket.create_connection((host, int(port)), timeout=cls.RECONNECT_PROBE_TIMEOUT):
+                    pass
+            except OSError:
+                cls.reconnect_backoff = min(cls.reconnect_backoff * 2, cls.RECONNECT_BACKOFF_MAX)
+                continue
+            logger.info(f"OCR server {cls.address} is back online")
+            cls.set_online()
+
+    @classmethod
+    def call(cls, method, *args):
+        """
+        Returns:
+            tuple[bool, Any]: If success, and the result.
+        """
+        if not cls.online:
+            return False, None
+        try:
+            if cls.client is None:
+                # Server came back, connecting doesn't block, requests will.
+                import zerorpc
+                cls.client = zerorpc.Client(timeout=5)
+                cls.client.connect(f"tcp://{cls.address}")
+            return True, cls.client(method, *args)
+        except:
+            cls.set_offline()
+            return False, None
+
+    @classmethod
+    def stats(cls):
+        """
+        Returns:
+            dict: Throughput and latency counters of OCR server, see OcrBatcher.stats().
+                None if server offline.
+        """
+        success, result = cls.call("stats")
+        return result if success else None
 
     @classmethod
     def close(cls):
         if cls.client is not None:
             logger.info('Disconnect to OCR server')
-            cls.client.close()
+            try:
+                cls.client.close()
+            except:
+                pass
             logger.info('Successfully disconnected to OCR server')
             cls.client = None
 
@@ -45,12 +155,9 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str = img_fp.dumps()
-            try:
-                return self.client("ocr", self.lang, img_str)
-            except:
-                self.online = False
+        success, result = self.call("ocr", self.lang, encode_image(img_fp))
+        if success:
+            return result
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).ocr(img_fp)
 
@@ -62,12 +169,9 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str = img_fp.dumps()
-            try:
-                return self.client("ocr_for_single_line", self.lang, img_str)
-            except:
-                self.online = False
+        success, result = self.call("ocr_for_single_line", self.lang, encode_image(img_fp))
+        if success:
+            return result
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).ocr_for_single_line(img_fp)
 
@@ -79,21 +183,16 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
-            try:
-                return self.client("ocr_for_single_lines", self.lang, img_str_list)
-            except:
-                self.online = False
+        success, result = self.call("ocr_for_single_lines", self.lang, [encode_image(img_fp) for img_fp in img_list])
+        if success:
+            return result
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).ocr_for_single_lines(img_list)
 
     def set_cand_alphabet(self, cand_alphabet: str):
-        if self.online:
-            try:
-                return self.client("set_cand_alphabet", self.lang, cand_alphabet)
-            except:
-                self.online = False
+        success, result = self.call("set_cand_alphabet", self.lang, cand_alphabet)
+        if success:
+            return result
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).set_cand_alphabet(cand_alphabet)
 
@@ -106,12 +205,9 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str = img_fp.dumps()
-            try:
-                return self.client("atomic_ocr", self.lang, img_str, cand_alphabet)
-            except:
-                self.online = False
+        success, result = self.call("atomic_ocr", self.lang, encode_image(img_fp), cand_alphabet)
+        if success:
+            return result
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).atomic_ocr(img_fp, cand_alphabet)
 
@@ -124,12 +220,9 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str = img_fp.dumps()
-            try:
-                return self.client("atomic_ocr_for_single_line", self.lang, img_str, cand_alphabet)
-            except:
-                self.online = False
+        success, result = self.call("atomic_ocr_for_single_line", self.lang, encode_image(img_fp), cand_alphabet)
+        if success:
+            return result
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).atomic_ocr_for_single_line(img_fp, cand_alphabet)
 
@@ -142,12 +235,10 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
-            try:
-                return self.client("atomic_ocr_for_single_lines", self.lang, img_str_list, cand_alphabet)
-            except:
-                self.online = False
+        img_list_data = [encode_image(img_fp) for img_fp in img_list]
+        success, result = self.call("atomic_ocr_for_single_lines", self.lang, img_list_data, cand_alphabet)
+        if success:
+            return result
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).atomic_ocr_for_single_lines(img_list, cand_alphabet)
 
@@ -159,12 +250,9 @@ class ModelProxy:
         Returns:
 
         """
-        if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
-            try:
-                return self.client("debug", self.lang, img_str_list)
-            except:
-                self.online = False
+        success, result = self.call("debug", self.lang, [encode_image(img_fp) for img_fp in img_list])
+        if success:
+            return result
         from module.ocr.models import OCR_MODEL
         return OCR_MODEL.__getattribute__(self.lang).debug(img_list)
 
@@ -182,28 +270,146 @@ class ModelProxyFactory:
         ModelProxy.close()
 
 
+class OcrBatcher:
+    """
+    Queue atomic_ocr_for_single_lines() requests from all clients,
+    and run requests with the same lang and alphabet in one forward pass.
+    Images in a batch are padded to the same width by cnocr.
+
+    zerorpc handles each request in a greenlet, the first request of a group waits BATCH_WINDOW
+    for others to join, requests arrived during inference join the next batch.
+    """
+    # Seconds to wait for other requests to join the batch
+    BATCH_WINDOW = 0.005
+    # Maximum images in one batch
+    BATCH_MAX_IMAGES = 256
+    # Seconds between two stats logs, 0 to disable
+    STATS_LOG_INTERVAL = 300
+
+    def __init__(self, model):
+        """
+        Args:
+            model (OcrModel):
+        """
+        self.model = model
+        # Key: (lang, alphabet), value: list of (img_list, AsyncResult, time received)
+        self.queue = {}
+        self.started = time.time()
+        self.requests = 0
+        self.images = 0
+        self.batches = 0
+        self.latency_total = 0.
+        self.latency_max = 0.
+        self.inference_total = 0.
+        self.stats_logged = time.time()
+
+    def submit(self, lang, img_list, cand_alphabet):
+        """
+        Args:
+            lang (str):
+            img_list (list[np.ndarray]):
+            cand_alphabet (str):
+
+        Returns:
+            list[list[str]]:
+        """
+        from gevent.event import AsyncResult
+        import gevent
+
+        key = (lang, cand_alphabet)
+        result = AsyncResult()
+        pending = self.queue.setdefault(key, [])
+        pending.append((img_list, result, time.time()))
+        if len(pending) == 1:
+            gevent.spawn_later(self.BATCH_WINDOW, self.flush, key)
+        elif sum(len(r[0]) for r in pending) >= self.BATCH_MAX_IMAGES:
+            gevent.spawn(self.flush, key)
+        return result.get()
+
+    def flush(self, key):
+        pending = self.queue.pop(key, [])
+        if not pending:
+            return
+        lang, cand_alphabet = key
+        img_list = [image for request in pending for image in request[0]]
+
+        start = time.time()
+        try:
+            cnocr = self.model.__getattribute__(lang)
+            result_list = cnocr.atomic_ocr_for_single_lines(img_list, cand_alphabet)
+        except Exception as e:
+            for _, result, _ in pending:
+                result.set_exception(e)
+            return
+        end = time.time()
+
+        self.batches += 1
+        self.images += len(img_list)
+        self.inference_total += end - start
+        for request, result, received in pending:
+            result.set(result_list[:len(request)])
+            result_list = result_list[len(request):]
+            self.requests += 1
+            latency = end - received
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+        if self.STATS_LOG_INTERVAL and end - self.stats_logged > self.STATS_LOG_INTERVAL:
+            self.stats_logged = end
+            logger.info(f"Ocr server stats: {self.stats()}")
+
+    def stats(self):
+        """
+        Returns:
+            dict: Counters since server started.
+                requests, images, batches: Total count.
+                batch_size: Average images per batch.
+                throughput: Images per second of inference time.
+                latency_avg, latency_max: Seconds from request received to result ready.
+        """
+        uptime = time.time() - self.started
+        return {
+            'uptime': round(uptime, 3),
+            'requests': self.requests,
+            'images': self.images,
+            'batches': self.batches,
+            'batch_size': round(self.images / self.batches, 3) if self.batches else 0.,
+            'throughput': round(self.images / self.inference_total, 3) if self.inference_total else 0.,
+            'latency_avg': round(self.latency_total / self.requests, 6) if self.requests else 0.,
+            'latency_max': round(self.latency_max, 6),
+        }
+
+
 def start_ocr_server(port=22268):
     import zerorpc
     import zmq
+    from module.base.decorator import cached_property
     from module.ocr.al_ocr import AlOcr
     from module.ocr.models import OcrModel
 
     class OCRServer(OcrModel):
+        @cached_property
+        def batcher(self):
+            return OcrBatcher(model=self)
+
         def hello(self):
             return "hello"
 
+        def stats(self):
+            return self.batcher.stats()
+
         def ocr(self, lang, img_fp):
-            img_fp = pickle.loads(img_fp)
+            img_fp = decode_image(img_fp)
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.ocr(img_fp)
 
         def ocr_for_single_line(self, lang, img_fp):
-            img_fp = pickle.loads(img_fp)
+            img_fp = decode_image(img_fp)
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.ocr_for_single_line(img_fp)
 
         def ocr_for_single_lines(self, lang, img_list):
-            img_list = [pickle.loads(img_fp) for img_fp in img_list]
+            img_list = [decode_image(img_fp) for img_fp in img_list]
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.ocr_for_single_lines(img_list)
 
@@ -212,22 +418,21 @@ def start_ocr_server(port=22268):
             return cnocr.set_cand_alphabet(cand_alphabet)
 
         def atomic_ocr(self, lang, img_fp, cand_alphabet):
-            img_fp = pickle.loads(img_fp)
+            img_fp = decode_image(img_fp)
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.atomic_ocr(img_fp, cand_alphabet)
 
         def atomic_ocr_for_single_line(self, lang, img_fp, cand_alphabet):
-            img_fp = pickle.loads(img_fp)
+            img_fp = decode_image(img_fp)
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.atomic_ocr_for_single_line(img_fp, cand_alphabet)
 
         def atomic_ocr_for_single_lines(self, lang, img_list, cand_alphabet):
-            img_list = [pickle.loads(img_fp) for img_fp in img_list]
-            cnocr: AlOcr = self.__getattribute__(lang)
-            return cnocr.atomic_ocr_for_single_lines(img_list, cand_alphabet)
+            img_list = [decode_image(img_fp) for img_fp in img_list]
+            return self.batcher.submit(lang, img_list, cand_alphabet)
 
         def debug(self, lang, img_list):
-            img_list = [pickle.loads(img_fp) for img_fp in img_list]
+            img_list = [decode_image(img_fp) for img_fp in img_list]
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.debug(img_list)
 
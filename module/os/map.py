@@ -653,62 +653,25 @@ class OSMap(OSFleet, Map, GlobeCamera, StorageHandler, StrategicSearchHandler):
         return int(getattr(self, '_cl1_auto_search_battle_count', 0))
 
     def _cl1_month_key(self, year: int = None, month: int = None) -> str:
-        from datetime import datetime
-        now = datetime.now()
-        if year is None:
-            year = now.year
-        if month is None:
-            month = now.month
-        return f"{year:04d}-{month:02d}"
-
-    def _cl1_monthly_file(self):
-        from pathlib import Path
-        project_root = Path(__file__).resolve().parents[2]
-        # 使用实例名作为子目录
+        from module.statistics.stats_store import month_key
+        return month_key(year=year, month=month)
+
+    def _cl1_stats_store(self):
+        """
+        Returns:
+            StatsStore: Statistics database of current instance, see module/statistics/stats_store.py
+        """
+        from module.statistics.stats_store import get_stats_store
         instance_name = getattr(self.config, 'config_name', 'default') if hasattr(self, 'config') else 'default'
-        cl1_dir = project_root / 'log' / 'cl1' / instance_name
-        try:
-            cl1_dir.mkdir(parents=True, exist_ok=True)
-            return cl1_dir / 'cl1_monthly.json'
-        except Exception:
-            log_dir = project_root / 'log' / 'cl1' / 'default'
-            log_dir.mkdir(parents=True, exist_ok=True)
-            return log_dir / 'cl1_monthly.json'
-
-    def _load_cl1_monthly(self):
-        import json
-        f = self._cl1_monthly_file()
-        if not f.exists():
-            return {}
-        try:
-            with f.open('r', encoding='utf-8') as fh:
-                return json.load(fh)
-        except Exception:
-            logger.exception('Failed to load CL1 monthly file, resetting data')
-            return {}
-
-    def _save_cl1_monthly(self, data):
-        import json
-        f = self._cl1_monthly_file()
-        try:
-            with f.open('w', encoding='utf-8') as fh:
-                json.dump(data, fh, ensure_ascii=False, indent=2)
-        except Exception:
-            logger.exception('Failed to save CL1 monthly file')
+        return get_stats_store(instance_name=instance_name)
 
     def _cl1_increment_monthly(self, delta: int = 1, year: int = None, month: int = None):
         key = self._cl1_month_key(year=year, month=month)
-        data = self._load_cl1_monthly()
-        try:
-            data[key] = int(data.get(key, 0)) + int(delta)
-        except Exception:
-            data[key] = int(delta)
-        self._save_cl1_monthly(data)
+        return self._cl1_stats_store().counter_add(key, delta)
 
     def get_monthly_cl1_battle_count(self, year: int = None, month: int = None):
         key = self._cl1_month_key(year=year, month=month)
-        data = self._load_cl1_monthly()
-        return int(data.get(key, 0))
+        return self._cl1_stats_store().counter_get(key)
     
     def os_auto_search_daemon(self, drop=None, strategic=False, interrupt=None, skip_first_screenshot=True):
         """
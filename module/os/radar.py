@@ -1,3 +1,4 @@
+from module.base.decorator import cached_property
 from module.base.mask import Mask
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
@@ -6,6 +7,17 @@ from module.map.map_grids import SelectedGrids
 from module.map_detection.utils import fit_points
 
 MASK_RADAR = Mask('./assets/mask/MASK_OS_RADAR.png')
+# Feature name: (area relative to grid center, color, threshold, count), see RadarGrid.image_color_count()
+RADAR_FEATURES = {
+    'enemy': ((-3, -3, 3, 3), (247, 89, 49), 221, 10),
+    'resource': ((-3, -3, 3, 3), (66, 231, 165), 221, 10),
+    'meowfficer': ((-3, 0, 3, 6), (33, 186, 255), 221, 10),
+    'exclamation': ((-3, -3, 3, 3), (255, 203, 49), 221, 10),
+    'boss': ((-3, -3, 3, 3), (147, 12, 8), 221, 10),
+    'port': ((-3, -3, 3, 3), (255, 255, 255), 235, 9),
+    'question': ((0, -7, 6, 0), (255, 255, 255), 235, 9),
+    'archive': ((-3, -3, 3, 3), (173, 113, 255), 235, 10),
+}
 
 
 class RadarGrid:
@@ -80,17 +92,31 @@ class RadarGrid:
 
         # self.is_fleet = False
 
-    def predict(self):
+    def predict(self, features=None):
+        """
+        Args:
+            features (dict): Key: name in RADAR_FEATURES, value: bool.
+                Results from Radar.predict_features(), or None to predict on self.image
+        """
         if self.is_fleet:
             return False
 
-        self.is_enemy = self.predict_enemy() or self.predict_boss()
-        self.is_resource = self.predict_resource()
-        self.is_meowfficer = self.predict_meowfficer()
-        self.is_exclamation = self.predict_exclamation()
-        self.is_port = self.predict_port()
-        self.is_question = self.predict_question()
-        self.is_archive = self.predict_archive()
+        if features is None:
+            self.is_enemy = self.predict_enemy() or self.predict_boss()
+            self.is_resource = self.predict_resource()
+            self.is_meowfficer = self.predict_meowfficer()
+            self.is_exclamation = self.predict_exclamation()
+            self.is_port = self.predict_port()
+            self.is_question = self.predict_question()
+            self.is_archive = self.predict_archive()
+        else:
+            self.is_enemy = features['enemy'] or features['boss']
+            self.is_resource = features['resource']
+            self.is_meowfficer = features['meowfficer']
+            self.is_exclamation = features['exclamation']
+            self.is_port = features['port']
+            self.is_question = features['question']
+            self.is_archive = features['archive']
 
         if self.enemy_genre:
             self.is_enemy = True
@@ -121,28 +147,28 @@ class RadarGrid:
         return np.sum(mask) >= count
 
     def predict_enemy(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(247, 89, 49), threshold=221, count=10)
+        return self.image_color_count(*RADAR_FEATURES['enemy'])
 
     def predict_resource(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(66, 231, 165), threshold=221, count=10)
+        return self.image_color_count(*RADAR_FEATURES['resource'])
 
     def predict_meowfficer(self):
-        return self.image_color_count(area=(-3, 0, 3, 6), color=(33, 186, 255), threshold=221, count=10)
+        return self.image_color_count(*RADAR_FEATURES['meowfficer'])
 
     def predict_exclamation(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(255, 203, 49), threshold=221, count=10)
+        return self.image_color_count(*RADAR_FEATURES['exclamation'])
 
     def predict_boss(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(147, 12, 8), threshold=221, count=10)
+        return self.image_color_count(*RADAR_FEATURES['boss'])
 
     def predict_port(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(255, 255, 255), threshold=235, count=9)
+        return self.image_color_count(*RADAR_FEATURES['port'])
 
     def predict_question(self):
-        return self.image_color_count(area=(0, -7, 6, 0), color=(255, 255, 255), threshold=235, count=9)
+        return self.image_color_count(*RADAR_FEATURES['question'])
 
     def predict_archive(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(173, 113, 255), threshold=235, count=10)
+        return self.image_color_count(*RADAR_FEATURES['archive'])
 
 
 class Radar:
@@ -201,17 +227,78 @@ class Radar:
 
         """
         image = MASK_RADAR.apply(image)
-        for grid in self:
+        features = self.predict_features(image)
+        for index, grid in enumerate(self):
             grid.image = image
             grid.reset()
-            grid.predict()
+            grid.predict(features={name: bool(result[index]) for name, result in features.items()})
+
         # Fixup is_question near is_port
-        for port in self.select(is_port=True):
-            for grid in self.select(is_question=True):
-                if np.sum(np.abs(np.subtract(port.location, grid.location))) == 1:
+        grids = list(self)
+        is_port = np.array([grid.is_port for grid in grids])
+        is_question = np.array([grid.is_question for grid in grids])
+        if np.any(is_port) and np.any(is_question):
+            port = self._grid_locations[is_port]
+            question = self._grid_locations[is_question]
+            # Manhattan distance between each question and each port
+            distance = np.sum(np.abs(question[:, np.newaxis, :] - port[np.newaxis, :, :]), axis=2)
+            for index, near in zip(np.where(is_question)[0], distance == 1):
+                if not np.any(near):
+                    continue
+                grid = grids[index]
+                for port_grid in [grids[i] for i in np.where(is_port)[0][near]]:
                     logger.warning(f'Wrong radar prediction is_question {grid.location} {grid.encode()} '
-                                   f'near {port.location} {port.encode()}')
-                    grid.is_question = False
+                                   f'near {port_grid.location} {port_grid.encode()}')
+                grid.is_question = False
+
+    @cached_property
+    def _grid_locations(self):
+        """
+        Returns:
+            np.ndarray: Location of each grid, in the order of self.grids, shape (n, 2)
+        """
+        return np.array([grid.location for grid in self])
+
+    @cached_property
+    def _grid_centers(self):
+        """
+        Returns:
+            np.ndarray: Center of each grid in pixel, in the order of self.grids, shape (n, 2)
+        """
+        return np.array([grid.center for grid in self])
+
+    def predict_features(self, image):
+        """
+        Predict RADAR_FEATURES on all grids at once.
+        Color similarity is calculated once on the entire radar for each color,
+        then pixels counts of all grids are looked up from integral images.
+
+        Args:
+            image: Screenshot with MASK_RADAR applied.
+
+        Returns:
+            dict: Key: name in RADAR_FEATURES, value: np.ndarray of bool, in the order of self.grids
+        """
+        centers = self._grid_centers
+        areas = np.array([area for area, _, _, _ in RADAR_FEATURES.values()])
+        origin = np.min(centers, axis=0) + np.min(areas[:, :2], axis=0)
+        end = np.max(centers, axis=0) + np.max(areas[:, 2:], axis=0)
+        radar = crop(image, (*origin, *end), copy=False)
+
+        integrals = {}
+        features = {}
+        for name, (area, color, threshold, count) in RADAR_FEATURES.items():
+            key = (color, threshold)
+            if key not in integrals:
+                mask = (color_similarity_2d(radar, color=color) > threshold).astype(np.uint8)
+                integrals[key] = cv2.integral(mask)
+            integral = integrals[key]
+            x1, y1 = (centers + area[:2] - origin).T
+            x2, y2 = (centers + area[2:] - origin).T
+            total = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+            features[name] = total >= count
+
+        return features
 
     def select(self, **kwargs):
         """
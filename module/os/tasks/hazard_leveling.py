@@ -367,12 +367,9 @@ class OpsiHazard1Leveling(OSMap):
             solved_events = getattr(self, '_solved_map_event', set())
             if 'is_akashi' in solved_events:
                 try:
-                    from datetime import datetime
-                    key = f"{datetime.now():%Y-%m}-akashi"
-                    data = self._load_cl1_monthly()
-                    data[key] = int(data.get(key, 0)) + 1
-                    self._save_cl1_monthly(data)
-                    logger.attr('cl1_akashi_monthly', data[key])
+                    key = f"{self._cl1_month_key()}-akashi"
+                    count = self._cl1_stats_store().counter_add(key, 1)
+                    logger.attr('cl1_akashi_monthly', count)
                 except Exception:
                     logger.exception('Failed to persist CL1 akashi monthly count')
 
@@ -1,8 +1,7 @@
 from datetime import timedelta
 
-from scipy import signal
-
 from module.base.decorator import cached_property
+from module.base.lazy_import import lazy_import
 from module.base.utils import *
 from module.device.method.utils import remove_suffix
 from module.logger import logger
@@ -12,6 +11,8 @@ from module.research.project_data import LIST_RESEARCH_PROJECT
 from module.research.series import get_detail_series, get_research_series_3
 from module.statistics.utils import *
 
+signal = lazy_import('scipy.signal')
+
 RESEARCH_SERIES = (SERIES_1, SERIES_2, SERIES_3, SERIES_4, SERIES_5)
 RESEARCH_STATUS = [STATUS_1, STATUS_2, STATUS_3, STATUS_4, STATUS_5]
 OCR_RESEARCH = [OCR_RESEARCH_1, OCR_RESEARCH_2, OCR_RESEARCH_3, OCR_RESEARCH_4, OCR_RESEARCH_5]
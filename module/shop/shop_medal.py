@@ -1,10 +1,10 @@
 import cv2
 import numpy as np
-from scipy import signal
 
 import module.config.server as server
 from module.base.button import ButtonGrid
 from module.base.decorator import cached_property, del_cached_property
+from module.base.lazy_import import lazy_import
 from module.base.timer import Timer
 from module.base.utils import rgb2gray
 from module.logger import logger
@@ -16,6 +16,8 @@ from module.shop.clerk import ShopClerk
 from module.shop.shop_status import ShopStatus
 from module.ui.scroll import AdaptiveScroll
 
+signal = lazy_import('scipy.signal')
+
 
 class ShopAdaptiveScroll(AdaptiveScroll):
     def match_color(self, main):
@@ -6,10 +6,8 @@ CL1 数据自动提交模块
 from __future__ import annotations
 
 import hashlib
-import json
 import platform
 import time
-from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -18,6 +16,7 @@ import requests
 from module.base.device_id import get_device_id
 from module.base.api_client import ApiClient
 from module.logger import logger
+from module.statistics.stats_store import get_stats_store, month_key
 
 
 class Cl1DataSubmitter:
@@ -38,7 +37,7 @@ class Cl1DataSubmitter:
         self.project_root = Path(__file__).resolve().parents[2]
         self._instance_name = instance_name or 'default'
         self.cl1_dir = self.project_root / 'log' / 'cl1' / self._instance_name
-        self.cl1_file = self.cl1_dir / 'cl1_monthly.json'
+        self.store = get_stats_store(instance_name=instance_name)
     
     @property
     def device_id(self) -> str:
@@ -56,49 +55,22 @@ class Cl1DataSubmitter:
         Returns:
             包含统计数据的字典
         """
-        now = datetime.now()
-        if year is None:
-            year = now.year
-        if month is None:
-            month = now.month
+        key = month_key(year=year, month=month)
         
-        month_key = f"{year:04d}-{month:02d}"
-        
-        # 读取cl1_monthly.json
+        # 读取统计数据库
         try:
-            if not self.cl1_file.exists():
-                logger.warning('CL1 monthly file does not exist')
-                return self._empty_data(month_key)
-            
-            with self.cl1_file.open('r', encoding='utf-8') as f:
-                data = json.load(f)
-                if not isinstance(data, dict):
-                    logger.warning('CL1 monthly file is not a dict')
-                    return self._empty_data(month_key)
+            data = self.store.counters(key)
         except Exception as e:
-            logger.exception(f'Failed to load CL1 monthly file: {e}')
-            return self._empty_data(month_key)
+            logger.exception(f'Failed to load CL1 monthly stats: {e}')
+            return self._empty_data(key)
         
         # 提取数据
-        battle_count = int(data.get(month_key, 0))
-        akashi_encounters = int(data.get(f"{month_key}-akashi", 0))
-        akashi_ap = int(data.get(f"{month_key}-akashi-ap", 0))
-        
-        # 如果没有明确的akashi-ap字段,尝试从entries计算
-        if akashi_ap == 0:
-            entries = data.get(f"{month_key}-akashi-ap-entries", [])
-            if isinstance(entries, list):
-                for entry in entries:
-                    try:
-                        if isinstance(entry, dict):
-                            akashi_ap += int(entry.get('amount', 0))
-                        else:
-                            akashi_ap += int(entry)
-                    except Exception:
-                        continue
+        battle_count = data.get(key, 0)
+        akashi_encounters = data.get(f"{key}-akashi", 0)
+        akashi_ap = data.get(f"{key}-akashi-ap", 0)
         
         return {
-            'month': month_key,
+            'month': key,
             'battle_count': battle_count,
             'akashi_encounters': akashi_encounters,
             'akashi_ap': akashi_ap,
@@ -1,5 +1,8 @@
 import csv
+import hashlib
 import shutil
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 
 from tqdm import tqdm
 
@@ -10,10 +13,140 @@ from module.ocr.al_ocr import AlOcr
 from module.ocr.ocr import Ocr
 from module.statistics.battle_status import BattleStatusStatistics
 from module.statistics.campaign_bonus import CampaignBonusStatistics
-from module.statistics.get_items import GetItemsStatistics
+from module.statistics.get_items import ITEM_GROUP, GetItemsStatistics
+from module.statistics.item import strip_name_suffix
 from module.statistics.utils import *
 
 
+class DropManifest:
+    """
+    Files already processed, so reruns only parse new screenshots.
+
+    Rows of (path, mtime, size, hash) are appended to a csv file right after results of a file are written,
+    so an interrupted run resumes from where it stopped.
+    Files touched or copied are compared by hash before being parsed again.
+    """
+
+    def __init__(self, file, root):
+        """
+        Args:
+            file (str): Manifest file.
+            root (str): Paths in manifest are relative to it.
+        """
+        self.file = file
+        self.root = root
+        # Key: relative path, value: (mtime, size, hash)
+        self.records = {}
+        if os.path.exists(file):
+            with open(file, 'r', newline='', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    if len(row) == 4:
+                        path, mtime, size, digest = row
+                        self.records[path] = (float(mtime), int(size), digest)
+        self._f = None
+        self._writer = None
+
+    def key(self, file):
+        return os.path.relpath(file, self.root).replace('\\', '/')
+
+    @staticmethod
+    def file_record(file):
+        """
+        Args:
+            file (str):
+
+        Returns:
+            tuple[float, int, str]: mtime, size, hash
+        """
+        stat = os.stat(file)
+        with open(file, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+        return stat.st_mtime, stat.st_size, digest
+
+    def is_processed(self, file):
+        """
+        Args:
+            file (str):
+
+        Returns:
+            bool:
+        """
+        try:
+            mtime, size, digest = self.records[self.key(file)]
+        except KeyError:
+            return False
+        stat = os.stat(file)
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime == mtime:
+            return True
+        return self.file_record(file)[2] == digest
+
+    def add(self, file, record):
+        """
+        Args:
+            file (str):
+            record (tuple): Output of file_record()
+        """
+        key = self.key(file)
+        self.records[key] = record
+        if self._writer is None:
+            self._f = open(self.file, 'a', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._f)
+        self._writer.writerow([key, *record])
+
+    def flush(self):
+        if self._f is not None:
+            self._f.flush()
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            self._writer = None
+
+    def remove(self):
+        self.close()
+        self.records.clear()
+        if os.path.exists(self.file):
+            logger.info(f'Remove existing manifest: {self.file}')
+            os.remove(self.file)
+
+
+# DropStatistics object in worker processes
+_WORKER = None
+
+
+def _worker_init(settings):
+    """
+    Args:
+        settings (dict): Class attributes of DropStatistics, which are not inherited by spawned processes.
+    """
+    global _WORKER
+    for key, value in settings.items():
+        setattr(DropStatistics, key, value)
+    _WORKER = DropStatistics()
+
+
+def _worker_parse_drop(file):
+    return _WORKER.parse_drop_isolated(file)
+
+
+def _worker_parse_template(file):
+    return _WORKER.parse_template_images(file)
+
+
+def _log_error(error):
+    """
+    Log an exception with its traceback.
+    Exceptions from worker processes carry the remote traceback as their cause.
+
+    Args:
+        error (Exception):
+    """
+    logger.error(''.join(traceback.format_exception(type(error), error, error.__traceback__)).rstrip())
+
+
 class DropStatistics:
     DROP_FOLDER = './screenshots'
     TEMPLATE_FOLDER = 'item_templates'
@@ -22,6 +155,11 @@ class DropStatistics:
     CSV_FILE = 'drop_result.csv'
     CSV_OVERWRITE = True
     CSV_ENCODING = 'utf-8'
+    # Worker processes to decode and recognize images, 0 to run in current process.
+    # Each worker loads its own OCR models.
+    PROCESSES = 4
+    # Files sent to workers at once, bounds memory of pending results
+    BATCH = 64
 
     def __init__(self):
         AlOcr.CNOCR_CONTEXT = DropStatistics.CNOCR_CONTEXT
@@ -33,6 +171,9 @@ class DropStatistics:
         self.get_items = GetItemsStatistics()
         self.campaign_bonus = CampaignBonusStatistics()
         self.get_items.load_template_folder(self.template_folder)
+        # Output names of templates loaded from template folder,
+        # items matched other templates are new to this process
+        self.known_templates = set(strip_name_suffix(name) for name in ITEM_GROUP.templates.keys())
 
     @property
     def template_folder(self):
@@ -46,27 +187,126 @@ class DropStatistics:
     def drop_folder(campaign):
         return os.path.join(DropStatistics.DROP_FOLDER, campaign)
 
+    @cached_property
+    def drop_manifest(self):
+        return DropManifest(os.path.join(DropStatistics.DROP_FOLDER, 'drop_manifest.csv'),
+                            root=DropStatistics.DROP_FOLDER)
+
+    @cached_property
+    def template_manifest(self):
+        return DropManifest(os.path.join(self.template_folder, 'template_manifest.csv'),
+                            root=DropStatistics.DROP_FOLDER)
+
     @cached_property
     def csv_overwrite_check(self):
         """
-        Remove existing csv file. This method only run once.
+        Remove existing csv file and its manifest. This method only run once.
         """
         if DropStatistics.CSV_OVERWRITE:
             if os.path.exists(self.csv_file):
                 logger.info(f'Remove existing csv file: {self.csv_file}')
                 os.remove(self.csv_file)
+            self.drop_manifest.remove()
         return True
 
+    @staticmethod
+    def worker_settings():
+        return {
+            key: getattr(DropStatistics, key)
+            for key in ['DROP_FOLDER', 'TEMPLATE_FOLDER', 'TEMPLATE_BASIC', 'CNOCR_CONTEXT']
+        }
+
+    def iter_results(self, files, func):
+        """
+        Run func on files in worker processes, yield results in the order of files.
+
+        Args:
+            files (list[str]):
+            func (callable): Module-level function that receives a file.
+
+        Yields:
+            tuple[str, Any, Exception]: file, result, error
+        """
+
+        def wrap(file, result=None, error=None):
+            return file, result, error
+
+        if not files:
+            return
+        if DropStatistics.PROCESSES <= 0:
+            # Module-level functions work on _WORKER, which is the current object here
+            global _WORKER
+            _WORKER = self
+            for file in files:
+                try:
+                    yield wrap(file, result=func(file))
+                except Exception as e:
+                    yield wrap(file, error=e)
+            return
+
+        with ProcessPoolExecutor(max_workers=DropStatistics.PROCESSES, initializer=_worker_init,
+                                 initargs=(self.worker_settings(),)) as executor:
+            for start in range(0, len(files), DropStatistics.BATCH):
+                batch = files[start:start + DropStatistics.BATCH]
+                futures = [executor.submit(func, file) for file in batch]
+                for file, future in zip(batch, futures):
+                    try:
+                        yield wrap(file, result=future.result())
+                    except Exception as e:
+                        yield wrap(file, error=e)
+
+    def iter_new_files(self, campaign, manifest):
+        """
+        Args:
+            campaign (str):
+            manifest (DropManifest):
+
+        Returns:
+            list[str]: Files not in manifest, sorted by name.
+        """
+        files = [file for _, file in sorted(load_folder(self.drop_folder(campaign)).items())]
+        new = [file for file in files if not manifest.is_processed(file)]
+        if len(new) < len(files):
+            logger.info(f'Skip {len(files) - len(new)} processed files, {len(new)} files to parse')
+        return new
+
     def parse_template(self, file):
         """
         Extract template from a single file.
         New templates will be given an auto-increased ID.
         """
-        images = unpack(load_image(file))
-        for image in images:
+        self.extract_template_images(self.parse_template_images(file)[0])
+
+    def parse_template_images(self, file):
+        """
+        Decode a file and find images to extract templates from, runs in worker processes.
+
+        Args:
+            file (str):
+
+        Returns:
+            tuple[list[tuple[str, np.ndarray]], tuple]: [(kind, image)], output of DropManifest.file_record()
+        """
+        record = DropManifest.file_record(file)
+        out = []
+        for image in unpack(load_image(file)):
             if self.get_items.appear_on(image):
-                self.get_items.extract_template(image, folder=self.template_folder)
+                out.append(('GET_ITEMS', image))
             if self.campaign_bonus.appear_on(image):
+                out.append(('CAMPAIGN_BONUS', image))
+        return out, record
+
+    def extract_template_images(self, images):
+        """
+        Extract templates in current process, so template IDs are assigned in order of files.
+
+        Args:
+            images (list[tuple[str, np.ndarray]]): Output of parse_template_images()
+        """
+        for kind, image in images:
+            if kind == 'GET_ITEMS':
+                self.get_items.extract_template(image, folder=self.template_folder)
+            else:
                 self.campaign_bonus.extract_template(image, folder=self.template_folder)
 
     def parse_drop(self, file):
@@ -79,6 +319,14 @@ class DropStatistics:
         Yields:
             list: [timestamp, campaign, enemy_name, drop_type, item, amount]
         """
+        for row, _ in self._parse_drop_items(file):
+            yield row
+
+    def _parse_drop_items(self, file):
+        """
+        Yields:
+            tuple[list, Item]: Row and the item.
+        """
         ts = os.path.splitext(os.path.basename(file))[0]
         campaign = os.path.basename(os.path.abspath(os.path.join(file, '../')))
         images = unpack(load_image(file))
@@ -88,10 +336,50 @@ class DropStatistics:
                 enemy_name = self.battle_status.stats_battle_status(image)
             if self.get_items.appear_on(image):
                 for item in self.get_items.stats_get_items(image):
-                    yield [ts, campaign, enemy_name, 'GET_ITEMS', item.name, item.amount]
+                    yield [ts, campaign, enemy_name, 'GET_ITEMS', item.name, item.amount], item
             if self.campaign_bonus.appear_on(image):
                 for item in self.campaign_bonus.stats_get_items(image):
-                    yield [ts, campaign, enemy_name, 'CAMPAIGN_BONUS', item.name, item.amount]
+                    yield [ts, campaign, enemy_name, 'CAMPAIGN_BONUS', item.name, item.amount], item
+
+    def parse_drop_isolated(self, file):
+        """
+        Parse a single file in worker processes.
+        Items not matching templates from the template folder have names local to this worker,
+        so their images are returned to be named again in the main process, see merge_drop().
+
+        Args:
+            file (str):
+
+        Returns:
+            tuple[list[tuple[list, np.ndarray, float]], tuple]:
+                [(row, item image or None if known, similarity)], output of DropManifest.file_record()
+        """
+        record = DropManifest.file_record(file)
+        out = []
+        for row, item in self._parse_drop_items(file):
+            if item.name in self.known_templates:
+                out.append((row, None, ITEM_GROUP.similarity))
+            else:
+                out.append((row, item.image, ITEM_GROUP.similarity))
+        return out, record
+
+    def merge_drop(self, rows):
+        """
+        Name new items in the main process. Files are merged in order,
+        so new templates get the same IDs no matter how files were distributed to workers.
+
+        Args:
+            rows: Output of parse_drop_isolated()
+
+        Returns:
+            list[list]: Rows
+        """
+        out = []
+        for row, image, similarity in rows:
+            if image is not None:
+                row[4] = strip_name_suffix(ITEM_GROUP.match_template(image, similarity=similarity))
+            out.append(row)
+        return out
 
     def extract_template(self, campaign):
         """
@@ -102,16 +390,22 @@ class DropStatistics:
         """
         print('')
         logger.hr(f'Extract templates from {campaign}', level=1)
-        for ts, file in tqdm(load_folder(self.drop_folder(campaign)).items()):
-            try:
-                self.parse_template(file)
-            except ImageError as e:
-                logger.warning(e)
-                continue
-            except Exception as e:
-                logger.exception(e)
-                logger.warning(f'Error on image {ts}')
-                continue
+        manifest = self.template_manifest
+        files = self.iter_new_files(campaign, manifest)
+        try:
+            for file, result, error in tqdm(self.iter_results(files, _worker_parse_template), total=len(files)):
+                if isinstance(error, ImageError):
+                    logger.warning(error)
+                    continue
+                elif error is not None:
+                    _log_error(error)
+                    logger.warning(f'Error on image {file}')
+                    continue
+                images, record = result
+                self.extract_template_images(images)
+                manifest.add(file, record)
+        finally:
+            manifest.close()
 
     def extract_drop(self, campaign):
         """
@@ -123,20 +417,28 @@ class DropStatistics:
         print('')
         logger.hr(f'extract drops from {campaign}', level=1)
         _ = self.csv_overwrite_check
+        manifest = self.drop_manifest
+        files = self.iter_new_files(campaign, manifest)
 
         with open(self.csv_file, 'a', newline='', encoding=DropStatistics.CSV_ENCODING) as csv_file:
             writer = csv.writer(csv_file)
-            for ts, file in tqdm(load_folder(self.drop_folder(campaign)).items()):
-                try:
-                    rows = list(self.parse_drop(file))
-                    writer.writerows(rows)
-                except ImageError as e:
-                    logger.warning(e)
-                    continue
-                except Exception as e:
-                    logger.exception(e)
-                    logger.warning(f'Error on image {ts}')
-                    continue
+            try:
+                for file, result, error in tqdm(self.iter_results(files, _worker_parse_drop), total=len(files)):
+                    if isinstance(error, ImageError):
+                        logger.warning(error)
+                        continue
+                    elif error is not None:
+                        _log_error(error)
+                        logger.warning(f'Error on image {file}')
+                        continue
+                    rows, record = result
+                    writer.writerows(self.merge_drop(rows))
+                    # Results must land before the manifest, or they would be lost on interruption
+                    csv_file.flush()
+                    manifest.add(file, record)
+                    manifest.flush()
+            finally:
+                manifest.close()
 
 
 if __name__ == '__main__':
@@ -153,7 +455,10 @@ if __name__ == '__main__':
     # This will write to {DROP_FOLDER}/{CSV_FILE}.
     DropStatistics.CSV_FILE = 'drop_results.csv'
     # If True, remove existing file before extraction.
+    # If False, append to existing file and skip screenshots already extracted.
     DropStatistics.CSV_OVERWRITE = True
+    # Worker processes to decode and recognize screenshots, 0 to run in current process.
+    DropStatistics.PROCESSES = 4
     # Usually to be 'utf-8'.
     # For better Chinese export to Excel, use 'gbk'.
     DropStatistics.CSV_ENCODING = 'gbk'
@@ -31,6 +31,21 @@ else:
     PRICE_OCR = Digit([], letter=(255, 255, 255), threshold=128, name='Price_ocr')
 
 
+def strip_name_suffix(name):
+    """
+    Args:
+        name (str): Template name, such as 'Javelin_2'
+
+    Returns:
+        str: Output name, such as 'Javelin'. Digit suffix is removed.
+    """
+    if '_' in name:
+        pre, suffix = name.rsplit('_', 1)
+        if suffix.isdigit():
+            name = pre
+    return name
+
+
 class Item:
     IMAGE_SHAPE = (96, 96)
 
@@ -65,11 +80,7 @@ class Item:
             value (str): Item name, such as 'PlateGeneralT3'. Suffix in name will be ignore.
                 For example, 'Javelin' and 'Javelin_2' are different templates, but have same output name 'Javelin'.
         """
-        if '_' in value:
-            pre, suffix = value.rsplit('_', 1)
-            if suffix.isdigit():
-                value = pre
-        self._name = value
+        self._name = strip_name_suffix(value)
 
     @property
     def cost(self):
@@ -77,11 +88,7 @@ class Item:
 
     @cost.setter
     def cost(self, value):
-        if '_' in value:
-            pre, suffix = value.rsplit('_', 1)
-            if suffix.isdigit():
-                value = pre
-        self._cost = value
+        self._cost = strip_name_suffix(value)
 
     def is_known_item(self):
         if self.name == 'DefaultItem':
@@ -123,6 +130,170 @@ class Item:
         return hash(self.name)
 
 
+class ItemTemplateIndex:
+    """
+    Index of item templates, to recognize items among hundreds of templates.
+
+    Templates are filtered by mean color, candidates are ranked by tiny thumbnails,
+    and cv2.matchTemplate() runs on the top-k candidates first.
+    Then only the candidates ordered before the top-k hit are tried, or all the rest if top-k didn't match,
+    so results are the same as matching all templates one by one in order of hits.
+    """
+    # Thumbnails to rank candidates, as normalized vectors
+    THUMBNAIL_SHAPE = (8, 8)
+    # Number of candidates to match exactly before trying the rest
+    TOP_K = 3
+    # Threshold of color_similar() to filter templates
+    COLOR_THRESHOLD = 30
+
+    def __init__(self):
+        # Key: template name, value: template image
+        self.templates = {}
+        # Key: template name, value: mean color
+        self.colors = {}
+        # Key: template name, value: times matched
+        self.hits = {}
+        # Template names in order of index
+        self.names = []
+        # Template names in order to try, known templates first, then frequently hit ones.
+        # Maintained incrementally on each hit.
+        self.order = []
+        # Key: template name, value: position in self.order
+        self.position = {}
+        self._thumbnail_list = []
+        # Stacked colors and thumbnails, built on demand
+        self._colors = np.zeros((0, 3), dtype=np.float32)
+        self._thumbnails = np.zeros((0, 0), dtype=np.float32)
+
+    def __contains__(self, name):
+        return name in self.templates
+
+    @classmethod
+    def thumbnail(cls, image):
+        """
+        Args:
+            image (np.ndarray):
+
+        Returns:
+            np.ndarray: Zero-mean unit vector, so dot products are correlation coefficients.
+        """
+        image = cv2.resize(image, cls.THUMBNAIL_SHAPE, interpolation=cv2.INTER_AREA)
+        vector = image.astype(np.float32).flatten()
+        vector -= vector.mean()
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    @staticmethod
+    def _rank_key(name, hits):
+        return not name.isdigit(), hits
+
+    def _promote(self, name):
+        """
+        Move a template forward in self.order, until it's sorted again.
+        """
+        order = self.order
+        index = self.position[name]
+        key = self._rank_key(name, self.hits[name])
+        while index > 0:
+            prev = order[index - 1]
+            if self._rank_key(prev, self.hits[prev]) >= key:
+                break
+            order[index] = prev
+            self.position[prev] = index
+            index -= 1
+        order[index] = name
+        self.position[name] = index
+
+    def add(self, name, image, hit=0):
+        """
+        Args:
+            name (str): Template name.
+            image (np.ndarray): Template image.
+            hit (int): Initial hits.
+        """
+        if name in self.templates:
+            # Replace the image of an existing template
+            self.templates[name] = image
+            self.colors[name] = cv2.mean(image)[:3]
+            self.hits[name] += hit
+            self._thumbnail_list[self.names.index(name)] = self.thumbnail(image)
+            self._colors = np.zeros((0, 3), dtype=np.float32)
+            self._promote(name)
+            return
+
+        self.templates[name] = image
+        self.colors[name] = cv2.mean(image)[:3]
+        self.hits[name] = hit
+        self.names.append(name)
+        self._thumbnail_list.append(self.thumbnail(image))
+        self.position[name] = len(self.order)
+        self.order.append(name)
+        self._promote(name)
+
+    def hit(self, name):
+        self.hits[name] += 1
+        self._promote(name)
+
+    def _build(self):
+        if len(self._colors) != len(self.names):
+            self._colors = np.array([self.colors[name] for name in self.names], dtype=np.float32)
+            self._thumbnails = np.array(self._thumbnail_list, dtype=np.float32)
+
+    def _match_exact(self, image, name, similarity):
+        res = cv2.matchTemplate(image, self.templates[name], cv2.TM_CCOEFF_NORMED)
+        _, sim, _, _ = cv2.minMaxLoc(res)
+        return sim > similarity
+
+    def match(self, image, area, similarity):
+        """
+        Args:
+            image (np.ndarray): Item image.
+            area (tuple): Area in item image to compare with templates.
+            similarity (float):
+
+        Returns:
+            str: Template name, or None if not matched.
+        """
+        if not self.names:
+            return None
+        self._build()
+        target = crop(image, area)
+        color = cv2.mean(target)[:3]
+        # color_similar() on all templates
+        diff = self._colors - np.array(color, dtype=np.float32)
+        tolerance = np.max(np.maximum(diff, 0), axis=1) - np.min(np.minimum(diff, 0), axis=1)
+        candidates = np.flatnonzero(tolerance <= self.COLOR_THRESHOLD)
+        if not candidates.size:
+            return None
+
+        scores = self._thumbnails[candidates] @ self.thumbnail(target)
+        top = [self.names[index] for index in candidates[np.argsort(-scores)[:self.TOP_K]].tolist()]
+        top.sort(key=self.position.__getitem__)
+        found = None
+        for name in top:
+            if self._match_exact(image, name, similarity):
+                found = name
+                break
+
+        # Several templates may pass, the first one in order wins, as if all templates were tried one by one.
+        # So the rest of the candidates ahead of the top-k hit are still tried.
+        top = set(top)
+        rest = [self.names[index] for index in candidates.tolist() if self.names[index] not in top]
+        rest.sort(key=self.position.__getitem__)
+        for name in rest:
+            if found is not None and self.position[name] > self.position[found]:
+                break
+            if self._match_exact(image, name, similarity):
+                found = name
+                break
+
+        if found is not None:
+            self.hit(found)
+        return found
+
+
 class ItemGrid:
     item_class = Item
     similarity = 0.92
@@ -150,13 +321,13 @@ class ItemGrid:
         self.price_area = price_area
         self.tag_area = tag_area
 
-        self.colors = {}
-        self.templates = {}
-        self.templates_hit = {}
+        self.index = ItemTemplateIndex()
+        self.colors = self.index.colors
+        self.templates = self.index.templates
+        self.templates_hit = self.index.hits
         self.next_template_index = len(self.templates.keys())
         for name, template in templates.items():
-            self.templates[name] = crop(template.image, area=self.template_area)
-            self.templates_hit[name] = 0
+            self.index.add(name, crop(template.image, area=self.template_area))
             if name.isdigit() and int(name) > self.next_template_index:
                 self.next_template_index = int(name)
 
@@ -190,9 +361,7 @@ class ItemGrid:
                 continue
             image = load_image(image)
             image = crop(image, area=self.template_area)
-            self.colors[name] = cv2.mean(image)[:3]
-            self.templates[name] = image
-            self.templates_hit[name] = 0
+            self.index.add(name, image)
             if name.isdigit():
                 max_digit = max(max_digit, int(name))
             self.next_template_index += 1
@@ -219,7 +388,7 @@ class ItemGrid:
 
     def match_template(self, image, similarity=None):
         """
-        Match templates, try most frequent hit templates first.
+        Match templates, try similar templates first, see ItemTemplateIndex.
 
         Args:
             image (np.ndarray):
@@ -230,26 +399,14 @@ class ItemGrid:
         """
         if similarity is None:
             similarity = self.similarity
-        color = cv2.mean(crop(image, self.template_area))[:3]
-        # Match frequently hit templates first
-        names = np.array(list(self.templates.keys()))[np.argsort(list(self.templates_hit.values()))][::-1]
-        # Match known templates first
-        names = [name for name in names if not name.isdigit()] + [name for name in names if name.isdigit()]
-        for name in names:
-            if color_similar(color1=color, color2=self.colors[name], threshold=30):
-                res = cv2.matchTemplate(image, self.templates[name], cv2.TM_CCOEFF_NORMED)
-                _, sim, _, _ = cv2.minMaxLoc(res)
-                if sim > similarity:
-                    self.templates_hit[name] += 1
-                    return name
+        name = self.index.match(image, area=self.template_area, similarity=similarity)
+        if name is not None:
+            return name
 
         self.next_template_index += 1
         name = str(self.next_template_index)
         logger.info(f'New template: {name}')
-        image = crop(image, self.template_area)
-        self.colors[name] = cv2.mean(image)[:3]
-        self.templates[name] = image
-        self.templates_hit[name] = self.templates_hit.get(name, 0) + 1
+        self.index.add(name, crop(image, self.template_area), hit=1)
         return name
 
     def extract_template(self, image, folder=None):
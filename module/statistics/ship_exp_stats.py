@@ -1,17 +1,18 @@
 # 此文件用于统计舰船经验检测数据和战斗时间
 # 包含每日经验效率统计，用于预估升级时间
+# 数据保存在实例的统计数据库中，见 module/statistics/stats_store.py
 
 from __future__ import annotations
 
 import math
 import time
-import json
 from pathlib import Path
 from datetime import datetime, date
 from typing import Dict, Any, Optional, List
 
 from module.os.ship_exp_data import LIST_SHIP_EXP
 from module.logger import logger
+from module.statistics.stats_store import StatsStore, get_stats_store
 
 
 class ShipExpStats:
@@ -32,25 +33,26 @@ class ShipExpStats:
     MAX_DAILY_STATS_DAYS = 30      # 保留最近30天的统计
     
     def __init__(self, path: Optional[Path] = None, instance_name: Optional[str] = None):
+        """
+        Args:
+            path: 统计数据库路径 (默认使用实例的数据库)
+            instance_name: Alas实例名称
+        """
         if path is None:
-            project_root = Path(__file__).resolve().parents[2]
-            instance_dir = instance_name or "default"
-            self._path = project_root / "log" / "cl1" / instance_dir / "ship_exp_data.json"
+            self._store = get_stats_store(instance_name=instance_name)
         else:
-            self._path = Path(path)
+            self._store = StatsStore(path=path)
         self._instance_name = instance_name or "default"
+        # 舰船检测数据快照 (ships, target_level, fleet_index, battle_count_at_check, last_check_time)
         self.data = self._load()
         
         # 当前战斗的开始时间
         self._battle_start_time: Optional[float] = None
     
     def _load(self) -> Dict[str, Any]:
-        """加载数据文件"""
-        if not self._path.exists():
-            return {}
+        """加载舰船检测数据快照"""
         try:
-            text = self._path.read_text(encoding='utf-8')
-            data = json.loads(text)
+            data = self._store.kv_get('ship_exp', {})
             if isinstance(data, dict):
                 return data
             return {}
@@ -59,13 +61,9 @@ class ShipExpStats:
             return {}
     
     def _save(self) -> None:
-        """保存数据文件"""
+        """保存舰船检测数据快照"""
         try:
-            self._path.parent.mkdir(parents=True, exist_ok=True)
-            self._path.write_text(
-                json.dumps(self.data, ensure_ascii=False, indent=2),
-                encoding='utf-8'
-            )
+            self._store.kv_set('ship_exp', self.data)
         except Exception as e:
             logger.warning(f'Failed to save ship exp data: {e}')
     
@@ -96,93 +94,54 @@ class ShipExpStats:
             logger.debug(f'Battle duration {duration:.1f}s out of range, not recorded')
             return duration
         
-        # 记录战斗时间
-        self._record_battle_time(duration)
-        
         # 计算本场经验 (使用平均值，因为每个位置经验不同)
         # 旗舰 431 + 其他位置 288*5 = 1871, 平均 312
         avg_exp = 312
         
-        # 更新每日统计
-        self._update_daily_stats(exp_gained=avg_exp, battle_duration=duration)
+        # 记录战斗时间并更新每日统计
+        self._record_battle(duration=duration, exp_gained=avg_exp)
         
         logger.info(f'Battle recorded: {duration:.1f}s, exp: {avg_exp}')
         return duration
     
-    def _record_battle_time(self, duration: float) -> None:
-        """记录单场战斗时间到样本"""
-        if 'battle_times' not in self.data:
-            self.data['battle_times'] = {'samples': [], 'average': 52.0}
-        
-        samples = self.data['battle_times']['samples']
-        samples.append(round(duration, 2))
-        
-        # 只保留最近N个样本
-        if len(samples) > self.MAX_BATTLE_TIME_SAMPLES:
-            self.data['battle_times']['samples'] = samples[-self.MAX_BATTLE_TIME_SAMPLES:]
-            samples = self.data['battle_times']['samples']
-        
-        # 更新平均值
-        if samples:
-            self.data['battle_times']['average'] = round(sum(samples) / len(samples), 2)
-        
-        self._save()
+    def _record_battle(self, duration: float, exp_gained: int) -> None:
+        """
+        记录单场战斗，累加到当天的统计
+        每场战斗只写入一行战斗记录和一行每日汇总
+        """
+        try:
+            self._store.battle_add(duration=round(duration, 2), exp=exp_gained)
+        except Exception as e:
+            logger.warning(f'Failed to save ship exp data: {e}')
     
     # ========== 每日经验效率统计 ==========
     
-    def _update_daily_stats(self, exp_gained: int, battle_duration: float) -> None:
-        """
-        更新每日统计数据
-        每场战斗结束后调用，累加到当天的统计
-        """
-        today = date.today().isoformat()  # "2026-01-01"
-        
-        if 'daily_stats' not in self.data:
-            self.data['daily_stats'] = {}
-        
-        if today not in self.data['daily_stats']:
-            self.data['daily_stats'][today] = {
-                'total_run_time': 0.0,
-                'total_exp_gained': 0,
-                'battle_count': 0,
-                'exp_per_hour': 0.0
-            }
-        
-        stats = self.data['daily_stats'][today]
-        stats['total_run_time'] += battle_duration
-        stats['total_exp_gained'] += exp_gained
-        stats['battle_count'] += 1
-        
-        # 计算每小时经验效率
+    @staticmethod
+    def _with_exp_per_hour(stats: Dict[str, Any]) -> Dict[str, Any]:
+        """计算每小时经验效率"""
         hours = stats['total_run_time'] / 3600
-        if hours > 0:
-            stats['exp_per_hour'] = round(stats['total_exp_gained'] / hours, 2)
-        
-        # 清理旧数据
-        self._cleanup_old_daily_stats()
-        
-        self._save()
+        stats['exp_per_hour'] = round(stats['total_exp_gained'] / hours, 2) if hours > 0 else 0.0
+        return stats
     
     def _cleanup_old_daily_stats(self) -> None:
         """清理超过30天的旧统计数据"""
-        if 'daily_stats' not in self.data:
-            return
-        
-        dates = sorted(self.data['daily_stats'].keys(), reverse=True)
-        if len(dates) > self.MAX_DAILY_STATS_DAYS:
-            for old_date in dates[self.MAX_DAILY_STATS_DAYS:]:
-                del self.data['daily_stats'][old_date]
+        self._store.daily_cleanup(keep_days=self.MAX_DAILY_STATS_DAYS)
     
     def get_average_battle_time(self) -> float:
         """获取平均每场战斗时间(秒)"""
-        return self.data.get('battle_times', {}).get('average', 52.0)
+        average = self._store.battle_time_average(samples=self.MAX_BATTLE_TIME_SAMPLES)
+        if average is None:
+            return 52.0
+        return round(average, 2)
     
     def get_exp_per_hour(self) -> float:
         """
         获取经验效率 (经验/小时)
         优先使用今日数据，否则计算最近7天平均
         """
-        if 'daily_stats' not in self.data or not self.data['daily_stats']:
+        # 最近7天的统计
+        daily_stats = self._store.daily_stats(days=7)
+        if not daily_stats:
             # 无统计数据，使用理论值估算
             avg_battle_time = self.get_average_battle_time()
             avg_exp_per_battle = 312  # 平均每场经验
@@ -194,19 +153,17 @@ class ShipExpStats:
         today = date.today().isoformat()
         
         # 优先使用今日数据 (如果今日战斗超过10场)
-        if today in self.data['daily_stats']:
-            today_stats = self.data['daily_stats'][today]
+        if daily_stats[0]['date'] == today:
+            today_stats = self._with_exp_per_hour(daily_stats[0])
             if today_stats.get('battle_count', 0) >= 10:
                 exp_per_hour = today_stats.get('exp_per_hour', 0)
                 if exp_per_hour > 0:
                     return exp_per_hour
         
         # 计算最近7天的平均效率
-        dates = sorted(self.data['daily_stats'].keys(), reverse=True)[:7]
         total_exp = 0
         total_time = 0.0
-        for d in dates:
-            stats = self.data['daily_stats'][d]
+        for stats in daily_stats:
             total_exp += stats.get('total_exp_gained', 0)
             total_time += stats.get('total_run_time', 0)
         
@@ -219,9 +176,10 @@ class ShipExpStats:
     def get_today_stats(self) -> Optional[Dict[str, Any]]:
         """获取今日统计数据"""
         today = date.today().isoformat()
-        if 'daily_stats' not in self.data:
+        stats = self._store.daily_stat(today)
+        if stats is None:
             return None
-        return self.data['daily_stats'].get(today)
+        return self._with_exp_per_hour(stats)
     
     # ========== 舰船数据保存与进度计算 ==========
     
@@ -247,6 +205,7 @@ class ShipExpStats:
         self.data['battle_count_at_check'] = battle_count_at_check
         self.data['ships'] = ships
         self._save()
+        self._cleanup_old_daily_stats()
         logger.info(f'Ship exp data saved: {len(ships)} ships, target level {target_level}')
     
     def calculate_progress(
@@ -0,0 +1,410 @@
+# 此文件为每个实例提供嵌入式统计数据库 (SQLite, WAL 模式)
+# 替代每场战斗都整体重写 cl1_monthly.json 和 ship_exp_data.json 的做法,
+# 写入为单行追加/更新, 读取为按索引查询, 开销不随历史数据增长
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from module.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counter (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS akashi_ap (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    month TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    base INTEGER NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS akashi_ap_month ON akashi_ap (month);
+CREATE TABLE IF NOT EXISTS battle (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    duration REAL NOT NULL,
+    exp INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS battle_ts ON battle (ts);
+CREATE TABLE IF NOT EXISTS daily (
+    date TEXT PRIMARY KEY,
+    run_time REAL NOT NULL DEFAULT 0,
+    exp INTEGER NOT NULL DEFAULT 0,
+    battles INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def month_key(year: int = None, month: int = None) -> str:
+    """
+    Args:
+        year: 年份 (默认当前年份)
+        month: 月份 (默认当前月份)
+
+    Returns:
+        月份键, 如 '2026-01'
+    """
+    now = datetime.now()
+    if year is None:
+        year = now.year
+    if month is None:
+        month = now.month
+    return f"{year:04d}-{month:02d}"
+
+
+class StatsStore:
+    """
+    实例统计数据库, 位于 log/cl1/<实例名>/stats.db
+
+    - counter: 月度计数, 键与 cl1_monthly.json 相同, 如 '2026-01', '2026-01-akashi', '2026-01-akashi-ap'
+    - akashi_ap: 明石商店购买行动力的明细
+    - battle: 每场战斗的时间和经验
+    - daily: 每日经验效率汇总, 每场战斗更新一行
+    - kv: 低频写入的快照, 如舰船经验检测数据
+
+    WAL 模式下 Alas 进程写入时 GUI 进程可以同时读取.
+    首次打开时导入同目录下旧的 JSON 文件, 旧文件保留不再更新.
+    """
+    # 等待其他进程写锁的时间(秒)
+    TIMEOUT = 10
+
+    def __init__(self, path: Path | None = None, instance_name: str | None = None):
+        if path is None:
+            project_root = Path(__file__).resolve().parents[2]
+            path = project_root / 'log' / 'cl1' / (instance_name or 'default') / 'stats.db'
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # GUI 在多个线程中读取, 由 self._lock 保证串行
+            conn = sqlite3.connect(str(self.path), timeout=self.TIMEOUT, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # WAL 模式下 NORMAL 不会损坏数据库, 只在断电时可能丢失最后几次提交
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._migrate_json()
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _write(self, func):
+        """
+        在一个事务中执行写入
+
+        Args:
+            func: 接收 sqlite3.Connection 的函数
+
+        Returns:
+            func 的返回值
+        """
+        with self._lock:
+            conn = self.conn
+            with conn:
+                return func(conn)
+
+    def _read(self, sql: str, args: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self.conn.execute(sql, args).fetchall()
+
+    # ========== 旧数据导入 ==========
+
+    def _migrate_json(self) -> None:
+        """
+        导入旧的 cl1_monthly.json 和 ship_exp_data.json, 每个文件只导入一次
+        """
+        conn = self._conn
+        for name, func in [
+            ('cl1_monthly.json', self._migrate_cl1_monthly),
+            ('ship_exp_data.json', self._migrate_ship_exp),
+        ]:
+            file = self.path.parent / name
+            flag = f'migrated:{name}'
+            if not file.exists():
+                continue
+            with conn:
+                # Alas 和 GUI 可能同时打开数据库, 先拿到写锁再检查, 避免重复导入
+                conn.execute('BEGIN IMMEDIATE')
+                if conn.execute('SELECT 1 FROM kv WHERE key=?', (flag,)).fetchone():
+                    continue
+                try:
+                    data = json.loads(file.read_text(encoding='utf-8'))
+                except Exception as e:
+                    logger.warning(f'Failed to load {file}, skip migration: {e}')
+                    data = {}
+                if not isinstance(data, dict):
+                    data = {}
+                func(conn, data)
+                conn.execute('INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)', (flag, json.dumps(time.time())))
+            logger.info(f'Migrated {file} into {self.path}')
+
+    @staticmethod
+    def _migrate_cl1_monthly(conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
+        counters = []
+        entries = []
+        for key, value in data.items():
+            if key.endswith('-akashi-ap-entries'):
+                if not isinstance(value, list):
+                    continue
+                month = key[:-len('-akashi-ap-entries')]
+                for entry in value:
+                    try:
+                        if isinstance(entry, dict):
+                            entries.append((
+                                str(entry.get('ts', '')), month, int(entry.get('amount', 0)),
+                                int(entry.get('base', 0)), int(entry.get('count', 0)), str(entry.get('source', ''))
+                            ))
+                        else:
+                            entries.append(('', month, int(entry), 0, 0, ''))
+                    except Exception:
+                        continue
+            elif key[:4].isdigit():
+                try:
+                    counters.append((key, int(value)))
+                except Exception:
+                    continue
+        # 只有明细没有汇总值的月份, 汇总值从明细计算, 以便之后的购买在其上累加
+        known = set(key for key, _ in counters)
+        totals = {}
+        for _, month, amount, _, _, _ in entries:
+            totals[month] = totals.get(month, 0) + amount
+        for month, total in totals.items():
+            if f'{month}-akashi-ap' not in known:
+                counters.append((f'{month}-akashi-ap', total))
+        conn.executemany('INSERT OR REPLACE INTO counter (key, value) VALUES (?, ?)', counters)
+        conn.executemany(
+            'INSERT INTO akashi_ap (ts, month, amount, base, count, source) VALUES (?, ?, ?, ?, ?, ?)', entries)
+
+    @staticmethod
+    def _migrate_ship_exp(conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
+        # 旧样本没有时间, 记为 0, 只用于计算最近战斗的平均时间
+        samples = data.get('battle_times', {}).get('samples', [])
+        conn.executemany(
+            'INSERT INTO battle (ts, duration, exp) VALUES (0, ?, 0)',
+            [(float(s),) for s in samples if isinstance(s, (int, float))])
+        daily = data.get('daily_stats', {})
+        if isinstance(daily, dict):
+            conn.executemany(
+                'INSERT OR REPLACE INTO daily (date, run_time, exp, battles) VALUES (?, ?, ?, ?)',
+                [(d, float(s.get('total_run_time', 0)), int(s.get('total_exp_gained', 0)), int(s.get('battle_count', 0)))
+                 for d, s in daily.items() if isinstance(s, dict)])
+        snapshot = {k: v for k, v in data.items() if k not in ('battle_times', 'daily_stats')}
+        if snapshot:
+            conn.execute('INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)',
+                         ('ship_exp', json.dumps(snapshot, ensure_ascii=False)))
+
+    # ========== 月度计数 ==========
+
+    def counter_add(self, key: str, delta: int = 1) -> int:
+        """
+        Args:
+            key: 计数键, 如 '2026-01-akashi'
+            delta: 增量
+
+        Returns:
+            增加后的值
+        """
+
+        def write(conn):
+            conn.execute('INSERT OR IGNORE INTO counter (key, value) VALUES (?, 0)', (key,))
+            conn.execute('UPDATE counter SET value = value + ? WHERE key=?', (int(delta), key))
+            return conn.execute('SELECT value FROM counter WHERE key=?', (key,)).fetchone()[0]
+
+        return self._write(write)
+
+    def counter_get(self, key: str, default: int = 0) -> int:
+        rows = self._read('SELECT value FROM counter WHERE key=?', (key,))
+        return int(rows[0][0]) if rows else default
+
+    def counters(self, prefix: str) -> Dict[str, int]:
+        """
+        Args:
+            prefix: 键前缀, 如 '2026-01'
+
+        Returns:
+            所有以 prefix 开头的计数
+        """
+        rows = self._read('SELECT key, value FROM counter WHERE key >= ? AND key < ?', (prefix, prefix + '\uffff'))
+        return {key: int(value) for key, value in rows}
+
+    # ========== 明石行动力 ==========
+
+    def akashi_ap_add(self, amount: int, base: int = 0, count: int = 0, source: str = '') -> int:
+        """
+        记录一次明石商店行动力购买, 并累加到当月的 '<月份>-akashi-ap' 计数
+
+        Args:
+            amount: 购买的行动力总额
+            base: 单个行动力道具的数值
+            count: 购买数量
+            source: 'cl1_akashi' 或 'akashi'
+
+        Returns:
+            当月购买的行动力总额
+        """
+        now = datetime.now()
+        month = month_key(now.year, now.month)
+        key = f'{month}-akashi-ap'
+
+        def write(conn):
+            conn.execute(
+                'INSERT INTO akashi_ap (ts, month, amount, base, count, source) VALUES (?, ?, ?, ?, ?, ?)',
+                (now.isoformat(), month, int(amount), int(base), int(count), source))
+            conn.execute('INSERT OR IGNORE INTO counter (key, value) VALUES (?, 0)', (key,))
+            conn.execute('UPDATE counter SET value = value + ? WHERE key=?', (int(amount), key))
+            return conn.execute('SELECT value FROM counter WHERE key=?', (key,)).fetchone()[0]
+
+        return self._write(write)
+
+    def akashi_ap_total(self, month: str) -> int:
+        """
+        Args:
+            month: 月份键, 如 '2026-01'
+
+        Returns:
+            当月购买的行动力总额
+        """
+        return self.counter_get(f'{month}-akashi-ap')
+
+    def akashi_ap_entries(self, month: str) -> List[Dict[str, Any]]:
+        """
+        Args:
+            month: 月份键, 如 '2026-01'
+
+        Returns:
+            当月的购买明细, 按时间排序
+        """
+        rows = self._read('SELECT ts, amount, base, count, source FROM akashi_ap WHERE month=? ORDER BY id', (month,))
+        return [{'ts': ts, 'amount': amount, 'base': base, 'count': count, 'source': source}
+                for ts, amount, base, count, source in rows]
+
+    # ========== 战斗时间和经验 ==========
+
+    def battle_add(self, duration: float, exp: int, ts: float = None) -> None:
+        """
+        记录一场战斗, 同时更新当天的经验效率汇总
+
+        Args:
+            duration: 战斗耗时(秒)
+            exp: 获得经验
+            ts: 战斗结束时间戳, 默认当前时间
+        """
+        if ts is None:
+            ts = time.time()
+        today = date.fromtimestamp(ts).isoformat()
+
+        def write(conn):
+            conn.execute('INSERT INTO battle (ts, duration, exp) VALUES (?, ?, ?)', (ts, duration, int(exp)))
+            conn.execute('INSERT OR IGNORE INTO daily (date) VALUES (?)', (today,))
+            conn.execute('UPDATE daily SET run_time = run_time + ?, exp = exp + ?, battles = battles + 1 WHERE date=?',
+                         (duration, int(exp), today))
+
+        self._write(write)
+
+    def battle_time_average(self, samples: int) -> Optional[float]:
+        """
+        Args:
+            samples: 取最近的战斗数量
+
+        Returns:
+            最近战斗的平均耗时(秒), 无记录时返回 None
+        """
+        rows = self._read(
+            'SELECT AVG(duration) FROM (SELECT duration FROM battle ORDER BY id DESC LIMIT ?)', (int(samples),))
+        return rows[0][0]
+
+    def battles_between(self, start: float, end: float) -> List[tuple]:
+        """
+        Args:
+            start: 起始时间戳
+            end: 结束时间戳
+
+        Returns:
+            [(ts, duration, exp)], 按时间排序
+        """
+        return self._read('SELECT ts, duration, exp FROM battle WHERE ts >= ? AND ts < ? ORDER BY ts', (start, end))
+
+    def daily_stats(self, days: int) -> List[Dict[str, Any]]:
+        """
+        Args:
+            days: 取最近有记录的天数
+
+        Returns:
+            每日汇总, 按日期倒序, 键为 date, total_run_time, total_exp_gained, battle_count
+        """
+        rows = self._read('SELECT date, run_time, exp, battles FROM daily ORDER BY date DESC LIMIT ?', (int(days),))
+        return [{'date': d, 'total_run_time': run_time, 'total_exp_gained': exp, 'battle_count': battles}
+                for d, run_time, exp, battles in rows]
+
+    def daily_stat(self, day: str) -> Optional[Dict[str, Any]]:
+        """
+        Args:
+            day: 日期, 如 '2026-01-01'
+
+        Returns:
+            当天汇总, 无记录时返回 None
+        """
+        rows = self._read('SELECT run_time, exp, battles FROM daily WHERE date=?', (day,))
+        if not rows:
+            return None
+        run_time, exp, battles = rows[0]
+        return {'total_run_time': run_time, 'total_exp_gained': exp, 'battle_count': battles}
+
+    def daily_cleanup(self, keep_days: int) -> None:
+        """
+        删除最近 keep_days 个有记录的日期之前的每日汇总
+        """
+        self._write(lambda conn: conn.execute(
+            'DELETE FROM daily WHERE date < (SELECT MIN(date) FROM '
+            '(SELECT date FROM daily ORDER BY date DESC LIMIT ?))', (int(keep_days),)))
+
+    # ========== 快照 ==========
+
+    def kv_get(self, key: str, default: Any = None) -> Any:
+        rows = self._read('SELECT value FROM kv WHERE key=?', (key,))
+        if not rows:
+            return default
+        try:
+            return json.loads(rows[0][0])
+        except Exception:
+            return default
+
+    def kv_set(self, key: str, value: Any) -> None:
+        text = json.dumps(value, ensure_ascii=False)
+        self._write(lambda conn: conn.execute('INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)', (key, text)))
+
+
+_stores: Dict[str, StatsStore] = {}
+
+
+def get_stats_store(instance_name: str | None = None) -> StatsStore:
+    """获取实例的 StatsStore, 每个实例共用一个连接"""
+    key = instance_name or 'default'
+    if key not in _stores:
+        _stores[key] = StatsStore(instance_name=instance_name)
+    return _stores[key]
+
+
+__all__ = ['StatsStore', 'get_stats_store', 'month_key']
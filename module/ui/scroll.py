@@ -1,12 +1,14 @@
 import numpy as np
-from scipy import signal
 
 from module.base.base import ModuleBase
 from module.base.button import Button
+from module.base.lazy_import import lazy_import
 from module.base.timer import Timer
 from module.base.utils import color_similarity_2d, random_rectangle_point, rgb2gray
 from module.logger import logger
 
+signal = lazy_import('scipy.signal')
+
 
 class Scroll:
     color_threshold = 221
@@ -1,5 +1,6 @@
 from module.base.button import Button
-from module.base.decorator import run_once
+from module.base.decorator import cached_property, run_once
+from module.base.match_batch import MatchBatch
 from module.base.timer import Timer
 from module.coalition.assets import NEONCITY_FLEET_PREPARATION, NEONCITY_PREPARATION_EXIT, DAL_DIFFICULTY_EXIT
 from module.combat.assets import GET_ITEMS_1, GET_ITEMS_2, GET_SHIP
@@ -41,6 +42,35 @@ class UI(InfoHandler):
             return False
         return self.appear(page.check_button, offset=offset, interval=interval)
 
+    @cached_property
+    def ui_page_batch(self):
+        """
+        Check buttons of all known pages, in the order of `Page.iter_pages()`,
+        so page detection costs one batched evaluation per screenshot.
+
+        Returns:
+            tuple[MatchBatch, dict[Button, Page]]: Batch and a map from check button to page.
+        """
+        entries = []
+        button_to_page = {}
+
+        def add(button, offset, page):
+            if button in button_to_page:
+                return
+            entries.append((button, offset))
+            button_to_page[button] = page
+
+        for page in Page.iter_pages():
+            if page.check_button is None:
+                continue
+            if page == page_main:
+                add(page_main_white.check_button, (30, 30), page)
+                add(page_main.check_button, (5, 5), page)
+            else:
+                add(page.check_button, (30, 30), page)
+
+        return MatchBatch(entries, name='UI_PAGE_BATCH'), button_to_page
+
     def is_in_main(self, offset=(30, 30), interval=0):
         return self.ui_page_appear(page_main, offset=offset, interval=interval)
 
@@ -182,13 +212,13 @@ class UI(InfoHandler):
                 break
 
             # Known pages
-            for page in Page.iter_pages():
-                if page.check_button is None:
-                    continue
-                if self.ui_page_appear(page=page):
-                    logger.attr("UI", page.name)
-                    self.ui_current = page
-                    return page
+            batch, button_to_page = self.ui_page_batch
+            button = self.appear_any(batch)
+            if button is not None:
+                page = button_to_page[button]
+                logger.attr("UI", page.name)
+                self.ui_current = page
+                return page
 
             # Unknown page but able to handle
             logger.info("Unknown ui page")
@@ -482,6 +512,55 @@ class UI(InfoHandler):
         if self.handle_story_skip():
             return True
 
+        # Popups detected by template matching
+        # Evaluate all of them in one pass, most frames don't have any
+        if self.appear_any(self.ui_additional_batch) is not None:
+            if self.ui_additional_popups():
+                return True
+
+        # Idle page
+        if self.handle_idle_page():
+            return True
+        # Switch on ui_white, no offset just color match
+        if self.appear(MAIN_GOTO_MEMORIES_WHITE, interval=3):
+            logger.info(f'UI additional: {MAIN_GOTO_MEMORIES_WHITE} -> {MAIN_TAB_SWITCH_WHITE}')
+            self.device.click(MAIN_TAB_SWITCH_WHITE)
+            return True
+
+        return False
+
+    @cached_property
+    def ui_additional_batch(self):
+        """
+        Buttons checked in `ui_additional_popups()`, with the same offsets and similarities.
+
+        Returns:
+            MatchBatch:
+        """
+        return MatchBatch([
+            GAME_TIPS,
+            (DORM_INFO, (30, 30), 0.75),
+            DORM_FEED_CANCEL,
+            DORM_TROPHY_CONFIRM,
+            MEOWFFICER_INFO,
+            MEOWFFICER_BUY,
+            MAP_PREPARATION,
+            (FLEET_PREPARATION, (20, 50)),
+            RAID_FLEET_PREPARATION,
+            (AUTO_SEARCH_MENU_EXIT, (200, 30)),
+            (AUTO_SEARCH_REWARD, (50, 50)),
+            WITHDRAW,
+            LOGIN_CHECK,
+            MAINTENANCE_ANNOUNCE,
+            (EXERCISE_PREPARATION, 0),
+            (NEONCITY_FLEET_PREPARATION, (20, 20)),
+        ], name='UI_ADDITIONAL_BATCH')
+
+    def ui_additional_popups(self):
+        """
+        Returns:
+            bool: If handled
+        """
         # Game tips
         # Event commission in Vacation Lane.
         # 2025.05.29 game tips that infos skin feature when you enter dock
@@ -568,15 +647,6 @@ class UI(InfoHandler):
         # if self.appear_then_click(DAL_DIFFICULTY_EXIT, offset=(20, 20), interval=3):
         #     return True
 
-        # Idle page
-        if self.handle_idle_page():
-            return True
-        # Switch on ui_white, no offset just color match
-        if self.appear(MAIN_GOTO_MEMORIES_WHITE, interval=3):
-            logger.info(f'UI additional: {MAIN_GOTO_MEMORIES_WHITE} -> {MAIN_TAB_SWITCH_WHITE}')
-            self.device.click(MAIN_TAB_SWITCH_WHITE)
-            return True
-
         return False
 
     def handle_idle_page(self):
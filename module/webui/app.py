@@ -32,6 +32,7 @@ from pywebio.output import (
     put_column,
     put_error,
     put_html,
+    put_image,
     put_link,
     put_loading,
     put_markdown,
@@ -47,6 +48,7 @@ from pywebio.pin import pin, pin_on_change
 from pywebio.session import download, go_app, info, local, register_thread, run_js, set_env, eval_js
 
 import module.webui.lang as lang
+from module.base.metrics import aggregate_metrics, read_metrics
 from module.config.config import AzurLaneConfig, Function
 from module.config.deep import deep_get, deep_iter, deep_set
 from module.config.env import IS_ON_PHONE_CLOUD
@@ -61,6 +63,7 @@ from module.config.utils import (
     readable_time,
 )
 from module.config.utils import time_delta
+from module.device.live_frame import LiveFrame
 from module.log_res.log_res import LogRes
 from module.logger import logger
 from module.log_res import LogRes
@@ -137,6 +140,11 @@ class AlasGUI(Frame):
     ALAS_ARGS: Dict[str, Dict[str, Dict[str, Dict[str, str]]]]
     theme = "default"
     _log = RichLog
+    _live_frame: LiveFrame = None
+    # Live screenshot in overview, refresh interval in seconds, output size and JPEG quality
+    LIVE_FRAME_INTERVAL = 1
+    LIVE_FRAME_SIZE = (640, 360)
+    LIVE_FRAME_QUALITY = 70
 
     def initial(self) -> None:
         self.ALAS_MENU = read_file(filepath_args("menu", self.alas_mod))
@@ -745,6 +753,15 @@ class AlasGUI(Frame):
                     put_scope("waiting_tasks"),
                 ],
             )
+            if 'Maa' not in self.ALAS_ARGS:
+                put_scope(
+                    "screen",
+                    [
+                        put_text(t("Gui.Overview.Screen")),
+                        put_html('<hr class="hr-group">'),
+                        put_scope("screen_frame"),
+                    ],
+                )
 
         switch_scheduler = BinarySwitchButton(
             label_on=t("Gui.Button.Stop"),
@@ -826,6 +843,11 @@ class AlasGUI(Frame):
         self.task_handler.add(self.alas_update_overview_task, 10, True)
         if 'Maa' not in self.ALAS_ARGS:
             self.task_handler.add(self.alas_update_dashboard, 10, True)
+            if self._live_frame is not None:
+                self._live_frame.close()
+            self._live_frame = LiveFrame(self.alas_name)
+            self._live_frame_sequence = 0
+            self.task_handler.add(self.alas_update_live_frame, self.LIVE_FRAME_INTERVAL, True)
         if hasattr(self, 'alas') and self.alas is not None:
             self.task_handler.add(log.put_log(self.alas), 0.25, True)
 
@@ -919,9 +941,31 @@ class AlasGUI(Frame):
                     f"Save config {filepath_config(config_name)}, {dict_to_kv(modified)}"
                 )
                 config_updater.write_file(config_name, config)
+                ProcessManager.get_manager(config_name).notify_config_changed()
         except Exception as e:
             logger.exception(e)
 
+    def alas_update_live_frame(self) -> None:
+        """
+        Show the latest screenshot of the instance.
+        Instance publishes screenshots only while being watched, and frames are encoded only if changed.
+        """
+        if not self.visible:
+            return
+        self._live_frame.watch()
+        result = self._live_frame.read(self._live_frame_sequence)
+        if result is None:
+            return
+        sequence, _, frame = result
+        self._live_frame_sequence = sequence
+
+        import cv2
+        frame = cv2.resize(frame, self.LIVE_FRAME_SIZE, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=frame)
+        _, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.LIVE_FRAME_QUALITY])
+        with use_scope("screen_frame", clear=True):
+            put_image(data.tobytes(), format="jpeg", width="100%")
+
     def alas_update_overview_task(self) -> None:
         if not self.visible:
             return
@@ -996,7 +1040,7 @@ class AlasGUI(Frame):
                 value_limit = ''
             elif group_name == 'Pt':
                 value_limit = ' / ' + re.sub(r'[,.\'"，。]', '',
-                                             str(deep_get(self.alas_config.data, 'EventGeneral.EventGeneral.PtLimit')))
+                                             str(self.alas_config.cross_get('EventGeneral.EventGeneral.PtLimit')))
                 if value_limit == ' / 0':
                     value_limit = ''
             else:
@@ -1218,6 +1262,12 @@ class AlasGUI(Frame):
             color="menu",
         ).style(f"--menu-Utils--")
 
+        put_button(
+            label=t("Gui.MenuDevelop.Profiling"),
+            onclick=self.dev_profiling,
+            color="menu",
+        ).style(f"--menu-Profiling--")
+
     def dev_translate(self) -> None:
         go_app("translate", new_window=True)
         lang.TRANSLATE_MODE = True
@@ -1409,6 +1459,50 @@ class AlasGUI(Frame):
 
         put_button(label=t("Gui.MenuDevelop.ForceRestart"), onclick=_force_restart)
 
+    @use_scope("content", clear=True)
+    def dev_profiling(self) -> None:
+        self.init_menu(name="Profiling")
+        self.set_title(t("Gui.MenuDevelop.Profiling"))
+        put_text(t("Gui.Profiling.Help"))
+        put_scope("profiling")
+
+        def ratio(calls, hits):
+            return f'{hits / calls * 100:.1f}%' if calls else '-'
+
+        def ms(second):
+            return f'{second * 1000:.2f}ms'
+
+        def update():
+            dumps = read_metrics()
+            with use_scope("profiling", clear=True):
+                if not dumps:
+                    put_text(t("Gui.Profiling.Empty"))
+                    return
+
+                # Time of each kind of calls in each task
+                rows = aggregate_metrics(dumps, group=lambda config_name, task, kind, name: (config_name, task, kind))
+                put_markdown(f'### {t("Gui.Profiling.Tasks")}')
+                put_table(
+                    [[config_name, task, kind, calls, ratio(calls, hits), f'{total:.1f}s', ms(total / calls)]
+                     for config_name, task, kind, calls, hits, total, _ in rows],
+                    header=[t("Gui.Profiling.Instance"), t("Gui.Profiling.Task"), t("Gui.Profiling.Kind"),
+                            t("Gui.Profiling.Calls"), t("Gui.Profiling.HitRatio"), t("Gui.Profiling.Total"),
+                            t("Gui.Profiling.Average")],
+                )
+
+                # Buttons and OCR that burn the most time across all instances
+                rows = aggregate_metrics(dumps, group=lambda config_name, task, kind, name: (kind, name))
+                put_markdown(f'### {t("Gui.Profiling.Records")}')
+                put_table(
+                    [[kind, name, calls, ratio(calls, hits), f'{total:.1f}s', ms(total / calls), ms(max_)]
+                     for kind, name, calls, hits, total, max_ in rows[:50]],
+                    header=[t("Gui.Profiling.Kind"), t("Gui.Profiling.Name"), t("Gui.Profiling.Calls"),
+                            t("Gui.Profiling.HitRatio"), t("Gui.Profiling.Total"), t("Gui.Profiling.Average"),
+                            t("Gui.Profiling.Max")],
+                )
+
+        self.task_handler.add(update, delay=10, pending_delete=True)
+
     @use_scope("content", clear=True)
     def dev_remote(self) -> None:
         self.init_menu(name="Remote")
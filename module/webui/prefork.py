@@ -0,0 +1,20 @@
+"""
+Preloaded by the forkserver that starts Alas instances, see ProcessManager.get_context().
+
+Modules imported here are shared copy-on-write by all instances forked from the server,
+so each instance no longer imports the whole module tree by itself.
+OCR models are not preloaded, mxnet is not fork-safe, use the OCR server to share them.
+"""
+import numpy
+import cv2
+from PIL import Image
+
+from module.logger import logger
+
+# Forkserver has no script name, write logs into the GUI log before instances set their own
+logger.set_file_logger('gui')
+from module.base.asset_pack import ASSET_PACK
+from module.base.button import Button
+from module.base.template import Template
+from module.config.config import AzurLaneConfig
+from module.device.device import Device
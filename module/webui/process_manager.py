@@ -1,6 +1,7 @@
 import argparse
 # 此文件专门用于管理 Alas 运行时各实例进程的生存周期及其子进程。
 # 负责多账号多开时的进程池维护、状态（运行中、停止、异常）追踪及进程间通信的安全处理逻辑。
+import multiprocessing
 import os
 import queue
 import threading
@@ -8,7 +9,6 @@ from multiprocessing import Process
 from typing import Dict, List, Union
 
 import inflection
-from rich.console import Console, ConsoleRenderable
 
 # Since this file does not run under the same process or subprocess of app.py
 # the following code needs to be repeated
@@ -17,7 +17,8 @@ from module.webui.fake_pil_module import *
 
 import_fake_pil_module()
 
-from module.logger import logger, set_file_logger, set_func_logger
+from module.base.task_budget import TaskBudget
+from module.logger import RECORD_DROPPED, log_record_text, logger, set_file_logger, set_func_logger
 from module.submodule.submodule import load_mod
 from module.submodule.utils import get_available_func, get_available_mod, get_available_mod_func, get_config_mod, \
     get_func_mod, list_mod_instance
@@ -26,13 +27,58 @@ from module.webui.setting import State
 
 class ProcessManager:
     _processes: Dict[str, "ProcessManager"] = {}
+    # Maximum log records waiting in the pipe,
+    # records are dropped and counted in the subprocess if GUI can't keep up.
+    RECORD_QUEUE_SIZE = 2000
+    # Modules preloaded by the forkserver when deploy option PreforkInstance is enabled
+    PREFORK_MODULES = ["module.webui.prefork"]
+    _context = None
+    _budget: TaskBudget = None
+
+    @classmethod
+    def get_context(cls):
+        """
+        Returns:
+            multiprocessing context to start alas instances.
+                If PreforkInstance is enabled and forkserver is available (not on Windows),
+                instances are forked from a warm template process, sharing imported modules copy-on-write.
+        """
+        if cls._context is not None:
+            return cls._context
+        if State.deploy_config.PreforkInstance \
+                and "forkserver" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(cls.PREFORK_MODULES)
+            logger.info("Start alas instances from forkserver")
+        else:
+            ctx = multiprocessing.get_context()
+        cls._context = ctx
+        return ctx
+
+    @classmethod
+    def get_budget(cls) -> TaskBudget:
+        """
+        Returns:
+            TaskBudget: Shared by all instances, or None if MaxRunningInstance is not set.
+        """
+        if cls._budget is None:
+            limit = State.deploy_config.MaxRunningInstance
+            if limit and int(limit) > 0:
+                cls._budget = TaskBudget(limit=int(limit), ctx=cls.get_context())
+                logger.info(f"Maximum alas instances running tasks: {limit}")
+        return cls._budget
 
     def __init__(self, config_name: str = "alas") -> None:
         self.config_name = config_name
-        self._renderable_queue: queue.Queue[ConsoleRenderable] = State.manager.Queue()
-        self.renderables: List[ConsoleRenderable] = []
-        self.renderables_max_length = 400
-        self.renderables_reduce_length = 80
+        self._record_queue: multiprocessing.Queue = None
+        # Set after GUI writes the config, to wake up the scheduler waiting for tasks
+        self._config_event: multiprocessing.Event = None
+        # Log records from LogRecordHandler, or plain text
+        self.records: List[Union[tuple, str]] = []
+        self.records_max_length = 400
+        self.records_reduce_length = 80
+        # Total records dropped by subprocess
+        self.records_dropped = 0
         self._process: Process = None
         self._process_locks: Dict[str, threading.Lock] = {}
         self.thd_log_queue_handler: threading.Thread = None
@@ -41,13 +87,21 @@ class ProcessManager:
         if not self.alive:
             if func is None:
                 func = get_config_mod(self.config_name)
+            # A new queue for each process, the previous one is broken if its process was killed while writing.
+            # Records are plain tuples sent through a pipe, no round trip to the manager process.
+            # Queues and events must come from the same context as the process
+            ctx = self.get_context()
+            self._record_queue = ctx.Queue(maxsize=self.RECORD_QUEUE_SIZE)
+            self._config_event = ctx.Event()
             args = (
                 self.config_name,
                 func,
-                self._renderable_queue,
+                self._record_queue,
                 ev,
+                self._config_event,
+                self.get_budget(),
             )
-            self._process = Process(
+            self._process = ctx.Process(
                 target=ProcessManager.run_process,
                 args=args,
             )
@@ -73,30 +127,58 @@ class ProcessManager:
             self._process_locks[self.config_name] = lock
 
         with lock:
+            killed = False
             if self.alive:
                 self._process.kill()
-                self.renderables.append(
-                    f"[{self.config_name}] exited. Reason: Manual stop\n"
-                )
+                killed = True
             if self.thd_log_queue_handler is not None:
                 self.thd_log_queue_handler.join(timeout=1)
                 if self.thd_log_queue_handler.is_alive():
                     logger.warning(
                         "Log queue handler thread does not stop within 1 seconds"
                     )
+            if killed:
+                # After the handler drained remaining records, so exit reason is the last line
+                self.records.append(
+                    f"[{self.config_name}] exited. Reason: Manual stop\n"
+                )
         logger.info(f"[{self.config_name}] exited")
 
+    def _receive_record(self, record) -> None:
+        if record[0] == RECORD_DROPPED:
+            self.records_dropped += record[4]
+        self.records.append(record)
+        if len(self.records) > self.records_max_length:
+            self.records = self.records[self.records_reduce_length :]
+
     def _thread_log_queue_handler(self) -> None:
         while self.alive:
             try:
-                log = self._renderable_queue.get(timeout=1)
+                record = self._record_queue.get(timeout=1)
             except queue.Empty:
                 continue
-            self.renderables.append(log)
-            if len(self.renderables) > self.renderables_max_length:
-                self.renderables = self.renderables[self.renderables_reduce_length :]
+            self._receive_record(record)
+        # Records flushed by the subprocess before exit, including the exit reason
+        while True:
+            try:
+                record = self._record_queue.get_nowait()
+            except (queue.Empty, OSError, EOFError):
+                break
+            self._receive_record(record)
+        # Release budget held by the dead process
+        budget = self.get_budget()
+        if budget is not None and self._process is not None:
+            # Don't hang GUI if the lock was left held by a killed instance
+            budget.release(self._process.pid, timeout=5)
         logger.info("End of log queue handler loop")
 
+    def notify_config_changed(self) -> None:
+        """
+        Call this after writing the config, so a waiting scheduler reloads it immediately.
+        """
+        if self._config_event is not None and self.alive:
+            self._config_event.set()
+
     @property
     def alive(self) -> bool:
         if self._process is not None:
@@ -108,13 +190,10 @@ class ProcessManager:
     def state(self) -> int:
         if self.alive:
             return 1
-        elif len(self.renderables) == 0:
+        elif len(self.records) == 0:
             return 2
         else:
-            console = Console(no_color=True)
-            with console.capture() as capture:
-                console.print(self.renderables[-1])
-            s = capture.get().strip()
+            s = log_record_text(self.records[-1]).strip()
             if s.endswith("Reason: Manual stop"):
                 return 2
             elif s.endswith("Reason: Finish"):
@@ -135,7 +214,8 @@ class ProcessManager:
 
     @staticmethod
     def run_process(
-        config_name, func: str, q: queue.Queue, e: threading.Event = None
+        config_name, func: str, q: multiprocessing.Queue, e: threading.Event = None,
+        config_event: multiprocessing.Event = None, budget: TaskBudget = None
     ) -> None:
         parser = argparse.ArgumentParser()
         parser.add_argument(
@@ -151,7 +231,7 @@ class ProcessManager:
             logger.info("Electron detected, remove log output to stdout")
             from module.logger import console_hdlr
             logger.removeHandler(console_hdlr)
-        set_func_logger(func=q.put)
+        set_func_logger(func=q.put_nowait)
 
         from module.config.config import AzurLaneConfig
 
@@ -159,6 +239,8 @@ class ProcessManager:
         remove_fake_pil_module()
 
         AzurLaneConfig.stop_event = e
+        AzurLaneConfig.config_event = config_event
+        AzurLaneConfig.task_budget = budget
         try:
             # Run alas
             if func == "alas":
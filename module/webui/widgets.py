@@ -13,7 +13,7 @@ from pywebio.output import *
 from pywebio.session import eval_js, local, run_js
 from rich.console import ConsoleRenderable
 
-from module.logger import HTMLConsole, Highlighter, WEB_THEME
+from module.logger import HTMLConsole, Highlighter, WEB_THEME, web_log_render
 from module.webui.lang import t
 from module.webui.pin import put_checkbox, put_input, put_select, put_textarea
 from module.webui.process_manager import ProcessManager
@@ -93,6 +93,8 @@ class RichLog:
             highlighter=Highlighter(),
             theme=WEB_THEME,
         )
+        # Log records are rendered here, only when displayed
+        self.record_render = web_log_render()
         # self.callback_id = output_register_callback(
         #     self._callback_set_width, serial_mode=True)
         # self._callback_thread = None
@@ -200,22 +202,25 @@ class RichLog:
     #     self._callback_thread = None
     #     self.console.width = int(_width)
 
+    def render_record(self, record) -> str:
+        return self.render(self.record_render(record))
+
     def put_log(self, pm: ProcessManager) -> Generator:
         yield
         try:
             while True:
-                last_idx = len(pm.renderables)
-                html = "".join(map(self.render, pm.renderables[:]))
+                last_idx = len(pm.records)
+                html = "".join(map(self.render_record, pm.records[:]))
                 self.reset()
                 self.extend(html)
                 counter = last_idx
-                while counter < pm.renderables_max_length * 2:
+                while counter < pm.records_max_length * 2:
                     yield
-                    idx = len(pm.renderables)
+                    idx = len(pm.records)
                     if idx < last_idx:
-                        last_idx -= pm.renderables_reduce_length
+                        last_idx -= pm.records_reduce_length
                     if idx != last_idx:
-                        html = "".join(map(self.render, pm.renderables[last_idx:idx]))
+                        html = "".join(map(self.render_record, pm.records[last_idx:idx]))
                         self.extend(html)
                         counter += idx - last_idx
                         last_idx = idx
@@ -1,65 +1,74 @@
 """
-诊断并修复 CL1 战斗统计问题的脚本
-该脚本用于检查和修复 cl1_monthly.json 文件的数据结构
+诊断 CL1 战斗统计问题的脚本
+该脚本用于检查各实例统计数据库 log/cl1/<实例名>/stats.db 中的月度计数和明石行动力记录
+旧的 cl1_monthly.json 在首次打开数据库时已导入, 之后不再更新, 修改它不会有任何效果
+
+用法: python tools/diagnose_cl1_stats.py [实例名]
 """
-import json
+import sqlite3
+import sys
 from pathlib import Path
-from datetime import datetime
 
 # 定位项目根目录
 script_dir = Path(__file__).resolve().parent
 project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
 
-# 定位 cl1_monthly.json
-cl1_dir = project_root / 'log' / 'cl1'
-json_file = cl1_dir / 'cl1_monthly.json'
-
-print(f"检查文件: {json_file}")
+from module.statistics.stats_store import StatsStore, month_key
 
-# 确保目录存在
-cl1_dir.mkdir(parents=True, exist_ok=True)
+cl1_dir = project_root / 'log' / 'cl1'
 
-# 读取现有数据
-if json_file.exists():
-    try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        print(f"\n当前数据内容:")
-        print(json.dumps(data, indent=2, ensure_ascii=False))
-    except Exception as e:
-        print(f"读取文件失败: {e}")
-        data = {}
+if len(sys.argv) > 1:
+    instances = sys.argv[1:]
 else:
-    print("文件不存在，将创建新文件")
-    data = {}
+    instances = sorted(p.name for p in cl1_dir.iterdir() if p.is_dir()) if cl1_dir.exists() else []
+
+if not instances:
+    print(f"未找到任何实例的统计数据库: {cl1_dir}")
+    sys.exit(0)
 
 # 获取当前月份
-now = datetime.now()
-current_month = f"{now.year:04d}-{now.month:02d}"
+current_month = month_key()
 akashi_key = f"{current_month}-akashi"
-
-print(f"\n当前月份: {current_month}")
+print(f"当前月份: {current_month}")
 print(f"战斗场次键名: {current_month}")
 print(f"明石遇见键名: {akashi_key}")
 
-# 检查数据结构
-battles = data.get(current_month, 0)
-akashi = data.get(akashi_key, 0)
+for instance in instances:
+    db_file = cl1_dir / instance / 'stats.db'
+    print(f"\n========== 实例: {instance} ==========")
+    print(f"检查文件: {db_file}")
+    if not db_file.exists() and not (cl1_dir / instance / 'cl1_monthly.json').exists():
+        print("数据库不存在, 该实例尚未记录过统计")
+        continue
+
+    store = StatsStore(path=db_file)
+    try:
+        # 检查数据结构
+        battles = store.counter_get(current_month)
+        akashi = store.counter_get(akashi_key)
+        akashi_ap = store.akashi_ap_total(current_month)
+        entries = store.akashi_ap_entries(current_month)
 
-print(f"\n当前统计:")
-print(f"  战斗场次: {battles}")
-print(f"  遇见明石: {akashi}")
+        print(f"\n当前统计:")
+        print(f"  战斗场次: {battles}")
+        print(f"  遇见明石: {akashi}")
+        print(f"  明石行动力: {akashi_ap} (明细 {len(entries)} 条, 合计 {sum(e['amount'] for e in entries)})")
 
-print(f"\n数据键列表:")
-for key in sorted(data.keys()):
-    print(f"  {key}: {data[key]}")
+        print(f"\n计数键列表:")
+        for key, value in sorted(store.counters('').items()):
+            print(f"  {key}: {value}")
 
-# 保存备份
-if data:
-    backup_file = json_file.with_suffix('.json.backup')
-    with open(backup_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"\n已保存备份至: {backup_file}")
+        # 保存备份, 使用 SQLite 在线备份, Alas 运行时也能得到一致的副本
+        backup_file = db_file.with_suffix('.db.backup')
+        backup = sqlite3.connect(str(backup_file))
+        try:
+            store.conn.backup(backup)
+        finally:
+            backup.close()
+        print(f"\n已保存备份至: {backup_file}")
+    finally:
+        store.close()
 
 print("\n诊断完成！")
 print("\n如果战斗场次为 0 但明石次数不为 0，说明战斗统计逻辑没有被触发。")